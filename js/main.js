@@ -1,44 +1,77 @@
-import { createElement } from "./utils.js";
+import { createElement, escapeHTML } from "./utils.js";
 import { navbarOnLoad, navbarOnResize, navbarToggleDropdown } from "./navbar.js";
 
 // HTML Elements.
-const galleryIconContainers = document.querySelectorAll(".gallery-icon-container");
 const landscapeContainer = document.getElementById("landscape-container");
 const landscapeExitButtons = document.querySelectorAll(".landscape-exit-button");
-const landscapeImages = document.querySelectorAll(".landscape-latent");
 const loadingBar = document.getElementById("navbar-loading-fill");
-const signContainers = document.querySelectorAll(".sign-container");
 const signsContainers = document.getElementById("signs-container");
+const parksData = document.getElementById("parks-data");
+
+const signContainers = new Map(); // Rendered sign containers by park code. Kept when filtering parks.
+
+// Reads the park data back from the sign containers unrolled into pages built before the park data was inlined, such
+// as an index.html that hasn't been built again. The sign containers are kept and shown a page at a time like the
+// rendered ones.
+const readUnrolledParks = () => {
+  const unrolledSignContainers = [...signsContainers.querySelectorAll(".sign-container")];
+  signsContainers.replaceChildren();
+  if (!document.getElementById("signs-sentinel")) {
+    signsContainers.after(createElement(`<div id="signs-sentinel"></div>`));
+  }
+  return unrolledSignContainers.map((signContainer) => {
+    signContainers.set(signContainer.id, signContainer);
+    const type = [...signContainer.classList].find((name) => name !== "sign-container" && name !== "visited");
+    return { code: signContainer.id, type, visited: signContainer.classList.contains("visited") };
+  });
+};
+
+// Park data. Sign containers are rendered from this a page at a time as the signs are scrolled.
+const parks = parksData ? JSON.parse(parksData.textContent) : readUnrolledParks();
+const parksByCode = new Map(parks.map((park) => [park.code, park])); // Parks by park code. Used to name nearby parks.
+const signsSentinel = document.getElementById("signs-sentinel");
+const overlaySprite = signsContainers.getAttribute("data-overlay-sprite");
+// Srcset widths, none on pages built before photos were offered at several widths.
+const photoWidths = (signsContainers.getAttribute("data-photo-widths") || "").split(",").filter(Boolean);
+const photoOption = signsContainers.getAttribute("data-photo-option") || ""; // Google Photos size option suffix.
+const signSizes = signsContainers.getAttribute("data-sign-sizes"); // Shown sign photo widths for srcset.
+const landscapeSizes = signsContainers.getAttribute("data-landscape-sizes"); // Shown landscape photo widths for srcset.
+const photoLoads = { sign: { queued: 0, loaded: 0 }, landscape: { queued: 0, loaded: 0 } }; // Photo load progress.
 
 let activeSignContainerId = null; // Active sign container ID. Used to show and hide park icons.
+let filteredParks = parks; // Parks shown with the active filter.
 let maxSignWidth = 250; // Max park sign width for Google Photos.
+let mirrorFormat = "webp"; // Format of mirrored photo thumbnails, AVIF when the browser supports it.
+let renderedCount = 0; // Count of filtered parks shown.
+let signsObserver = null; // Observes the sentinel below the signs to render the next page of signs.
 
 const LANDSCAPE_IMAGE_COUNT = 3; // Total count of landscape images.
+const LANDSCAPE_WIDTH = 900; // Landscape photo width for browsers without srcset support.
 const MAX_SIGN_PCT = 1.5; // Percentage of sign width the sign is allowed to expand.
 const MIN_SIGN_WIDTH = 120; // Minimum sign width.
 const SIGN_MOUSE_ALLOWANCE_PCT = 0.25; // Percentage of sign width mouse is allowed to travel.
+const SIGN_PAGE_SIZE = 48; // Count of sign containers rendered at a time.
 const SIGN_WIDTH_PCT = 0.2; // Ideal sign width as a percentage of screen width.
+// 1x1 AVIF image used to check whether the browser shows AVIF images.
+const AVIF_TEST_IMAGE = "data:image/avif;base64,AAAAIGZ0eXBhdmlmAAAAAGF2aWZtaWYxbWlhZk1BMUIAAADrbWV0YQAAAAAAAAAhaGRscgAAAAAAAAAAcGljdAAAAAAAAAAAAAAAAAAAAAAOcGl0bQAAAAAAAQAAAB5pbG9jAAAAAEQAAAEAAQAAAAEAAAETAAAAIQAAAChpaW5mAAAAAAABAAAAGmluZmUCAAAAAAEAAGF2MDFDb2xvcgAAAABqaXBycAAAAEtpcGNvAAAAFGlzcGUAAAAAAAAAAQAAAAEAAAAQcGl4aQAAAAADCAgIAAAADGF2MUOBAAwAAAAAE2NvbHJuY2x4AAEADQAGgAAAABdpcG1hAAAAAAAAAAEAAQQBAoMEAAAAKW1kYXQSAAoIGAAGiAhoNCAyExlHh4Yhh5555oAAAJBAyRxgimo=";
 
 // Handles page setup.
 window.onload = () => {
   navbarOnLoad(); // Handles navbar setup (js/navbar.js).
   displaySignsContainer(); // Calculates park sign widths then displays park signs.
-  photoLoadManager(); // Loads park sign and landscape photos.
-  galleryIconContainers.forEach((galleryIconContainer) => {
-    galleryIconContainer.addEventListener("click", (event) => {
-      showLandscapes(event);
-    });
-  });
+  checkAvifSupport().then(signsLoadManager); // Renders park signs as they are scrolled into view.
   landscapeExitButtons.forEach((exitButton) => {
     exitButton.addEventListener("click", () => {
       hideLandscapes();
     });
   });
-  signContainers.forEach((signContainer) => {
-    signContainer.addEventListener("click", (event) => {
-      navbarToggleDropdown("close");
-      handleSignClick(event);
-    });
+  signsContainers.addEventListener("click", (event) => {
+    const galleryIconContainer = event.target.closest(".gallery-icon-container");
+    if (galleryIconContainer) {
+      showLandscapes(galleryIconContainer);
+    }
+    navbarToggleDropdown("close");
+    handleSignClick(event);
   });
   signsContainers.addEventListener("mousemove", (event) => {
     handleSignsContainerMouseMove(event);
@@ -64,15 +97,12 @@ window.onresize = () => {
 
 // Filters the type of park signs shown.
 export const filterParks = (type) => {
-  // Hide all visible park signs.
-  signContainers.forEach((sign) => {
-    sign.classList.add("hidden");
-  });
-  // Show filtered park signs.
-  const targetType = type === "all" ? "sign-container" : type;
-  document.querySelectorAll(`.${targetType}`).forEach((sign) => {
-    sign.classList.remove("hidden");
-  });
+  removeIcons();
+  activeSignContainerId = null;
+  filteredParks = type === "all" ? parks : parks.filter((park) => park.type === type);
+  renderedCount = 0;
+  signsContainers.replaceChildren();
+  renderSigns();
 };
 
 // Hides landscape photos.
@@ -91,102 +121,249 @@ const displaySignsContainer = () => {
   signsContainers.classList.add("grid");
 };
 
-// Handles common processes when adding a new park sign photo or landscape photo.
-const processImage = (imageCount, totalImages, loadingBar) => {
-  const newImageCount = imageCount + 1;
-  const percentLoaded = parseFloat(loadingBar.style.width);
-  const percentLoadedNew = ((newImageCount / totalImages) * 100).toFixed(2);
-  if (percentLoadedNew > percentLoaded) {
-    loadingBar.style.width = `${percentLoadedNew}%`;
+// Checks whether the browser shows AVIF images to pick the format of mirrored photo thumbnails.
+const checkAvifSupport = () =>
+  new Promise((resolve) => {
+    const testImage = new Image();
+    testImage.onload = () => {
+      if (testImage.width > 0) {
+        mirrorFormat = "avif";
+      }
+      resolve();
+    };
+    testImage.onerror = () => resolve();
+    testImage.src = AVIF_TEST_IMAGE;
+  });
+
+// Renders the first page of park signs, then the next page whenever the bottom of the signs comes into view.
+const signsLoadManager = () => {
+  loadingBar.className = "green-background";
+  loadingBar.style.width = "0%";
+  signsObserver = new IntersectionObserver(
+    (entries) => {
+      if (entries.some((entry) => entry.isIntersecting)) {
+        renderSigns();
+      }
+    },
+    { rootMargin: "0px 0px 100% 0px" }
+  );
+  renderSigns();
+};
+
+// Renders the next page of filtered park signs.
+const renderSigns = () => {
+  const pageParks = filteredParks.slice(renderedCount, renderedCount + SIGN_PAGE_SIZE);
+  const newSignContainers = [];
+  pageParks.forEach((park) => {
+    let signContainer = signContainers.get(park.code);
+    if (!signContainer) {
+      signContainer = createSignContainer(park);
+      signContainers.set(park.code, signContainer);
+      newSignContainers.push(signContainer);
+    }
+    signsContainers.appendChild(signContainer);
+  });
+  renderedCount += pageParks.length;
+  if (newSignContainers.length) {
+    signPhotosLoad(newSignContainers);
+  }
+  // Observing the sentinel again so another page is rendered if it is still in view.
+  if (signsObserver) {
+    signsObserver.disconnect();
+    if (renderedCount < filteredParks.length) {
+      signsObserver.observe(signsSentinel);
+    }
+  }
+};
+
+// Creates a sign container for a park.
+const createSignContainer = (park) => {
+  const code = escapeHTML(park.code);
+  const name = escapeHTML(park.name);
+  const signSrc = park.visited ? park.sign : `images/parks/${park.code}.svg`;
+  let overlay = "";
+  if (park.overlay && overlaySprite) {
+    overlay = `<svg class="park-sign-overlay hidden" viewBox="0 0 975 1300" role="img"
+      aria-label="${name} Sign Overlay"><use href="${escapeHTML(overlaySprite)}#o-${code}"></use></svg>`;
+  } else if (park.overlay) {
+    overlay = `<img class="park-sign-overlay hidden" src="images/overlay/${code}.svg" alt="${name} Sign Overlay">`;
+  }
+  const mirrors = park.mirrors || []; // Mirrored sign and landscape photos.
+  let gallery = "";
+  let landscapes = "";
+  if (park.visited) {
+    gallery = `<a class="gallery-icon-container sign-icon-container invisible icon-loading">
+      <img class="sign-icon" src="images/icon/landscape-button-loading.svg" alt="Landscape Photos Icon"></a>`;
+    park.landscapes.forEach((landscape, index) => {
+      if (landscape) {
+        landscapes += `<img class="landscape-latent landscape-latent-${index + 1} hidden"
+          ${getPlaceholderAttributes(mirrors[index + 1], "images/loading/loading-landscape.svg")}
+          data-src="${escapeHTML(landscape)}" data-photo="${index + 1}"
+          alt="${name} Landscape Photo ${index + 1}" data-load="false">`;
+      }
+    });
+  }
+  let mapsTitle = "";
+  if (park.nearby) {
+    const nearbyParks = park.nearby.map(
+      ([nearbyCode, distance]) => `${parksByCode.get(nearbyCode).name} (${distance} km)`
+    );
+    mapsTitle = ` title="${escapeHTML(`Nearby unvisited parks: ${nearbyParks.join(", ")}`)}"`;
+  }
+  return createElement(`
+    <div id="${code}" class="sign-container${park.visited ? " visited" : ""} ${escapeHTML(park.type)}">
+      <img class="park-sign" ${getPlaceholderAttributes(mirrors[0], "images/loading/loading-sign.svg")}
+        data-src="${escapeHTML(signSrc)}"
+        referrerpolicy="no-referrer" alt="${name} Sign Photo" fetchpriority="high">
+      ${overlay}
+      <a class="maps-icon-container sign-icon-container invisible"${mapsTitle}
+        href="https://maps.google.com/maps?saddr=My+Location&daddr=${escapeHTML(park.coordinates)}">
+        <img class="sign-icon" src="images/icon/google-maps-pin.svg" alt="Google Maps Icon">
+      </a>
+      <a class="website-icon-container sign-icon-container invisible"
+        href="https://www.parks.ca.gov/?page_id=${code}">
+        <img class="sign-icon" src="images/icon/park-emblem.svg" alt="State Parks Website Icon">
+      </a>
+      ${gallery}
+      <div class="landscape-latent-container">${landscapes}</div>
+    </div>
+  `);
+};
+
+// Gets the src attributes of a photo shown while it loads. Mirrored photos show their placeholder at the photo size.
+const getPlaceholderAttributes = (mirror, loadingSrc) => {
+  if (!mirror) {
+    return `src="${loadingSrc}"`;
+  }
+  return `src="${escapeHTML(mirror.placeholder)}" width="${mirror.width}" height="${mirror.height}"`;
+};
+
+// Sets the width srcset of a photo on a loading image, with a fallback width for its src. Mirrored photos are loaded
+// from their thumbnails and other photo links from Google Photos.
+const setPhotoSrc = (loadImage, link, sizes, fallbackWidth, mirror) => {
+  if (mirror) {
+    const widths = mirror.widths;
+    const fallback = widths.filter((width) => width <= fallbackWidth).pop() || widths[0];
+    loadImage.sizes = sizes;
+    loadImage.srcset = widths.map((width) => `${mirror.src}-${width}.${mirrorFormat} ${width}w`).join(", ");
+    loadImage.src = `${mirror.src}-${fallback}.${mirrorFormat}`;
+    return;
+  }
+  if (photoWidths.length) {
+    loadImage.sizes = sizes;
+    loadImage.srcset = photoWidths.map((width) => `${link}=w${width}${photoOption} ${width}w`).join(", ");
+  }
+  loadImage.src = `${link}=w${fallbackWidth}${photoOption}`;
+};
+
+// Gets the mirrored photo of a sign container by photo index, 0 for the sign and 1 to 3 for the landscapes.
+const getPhotoMirror = (signContainer, index) => {
+  const mirrors = parksByCode.get(signContainer.id).mirrors;
+  return mirrors ? mirrors[index] : null;
+};
+
+// Shows a loaded image, keeping its srcset so the browser can switch widths as the page resizes.
+const showLoadedImage = (imageElement, loadImage) => {
+  imageElement.sizes = loadImage.sizes;
+  imageElement.srcset = loadImage.srcset;
+  imageElement.src = loadImage.src;
+};
+
+// Updates the loading bar. Green while sign photos load, blue while landscape photos load, and brown once done.
+const updateLoadingBar = () => {
+  const signLoads = photoLoads.sign;
+  const landscapeLoads = photoLoads.landscape;
+  if (signLoads.loaded < signLoads.queued) {
+    loadingBar.className = "green-background";
+    loadingBar.style.width = `${((signLoads.loaded / signLoads.queued) * 100).toFixed(2)}%`;
+  } else if (landscapeLoads.loaded < landscapeLoads.queued) {
+    loadingBar.className = "blue-background";
+    loadingBar.style.width = `${((landscapeLoads.loaded / landscapeLoads.queued) * 100).toFixed(2)}%`;
   } else {
-    console.error("lock issue - processImage");
+    loadingBar.className = "brown-background";
+    loadingBar.style.width = "100%";
   }
-  return newImageCount;
 };
 
-// Loads park sign and landscape photos.
-const photoLoadManager = () => {
-  // Setting up loading bar for park sign photos.
-  loadingBar.className = "green-background";
-  loadingBar.style.width = "0%";
-  // Load park sign photos. Once park sign photos are complete landscape photos are loaded next.
+// Loads park sign photos of newly rendered sign containers. Once they are complete landscape photos are loaded next.
+const signPhotosLoad = (newSignContainers) => {
   let signCount = 0;
-  signContainers.forEach((signContainer) => {
+  photoLoads.sign.queued += newSignContainers.length;
+  updateLoadingBar();
+  const processSign = () => {
+    signCount += 1;
+    photoLoads.sign.loaded += 1;
+    updateLoadingBar();
+    if (signCount === newSignContainers.length) {
+      landscapePhotosLoad(newSignContainers); // Load landscape photos after park sign photos are complete.
+    }
+  };
+  newSignContainers.forEach((signContainer) => {
+    const signImageElement = signContainer.querySelector(".park-sign");
     const loadImage = new Image();
     loadImage.onload = () => {
-      signImageElement.src = loadImage.src;
+      showLoadedImage(signImageElement, loadImage);
       const overlayImage = signContainer.querySelector(".park-sign-overlay");
       if (overlayImage) {
         overlayImage.classList.remove("hidden");
       }
-      signCount = processImage(signCount, signContainers.length, loadingBar);
-      if (signCount === signContainers.length) {
-        landscapePhotosLoad(); // Load landscape photos after park sign photos are complete.
-      }
+      processSign();
     };
     loadImage.onerror = () => {
       const overlayImage = signContainer.querySelector(".park-sign-overlay");
       if (overlayImage) {
         overlayImage.classList.remove("hidden");
       }
-      signCount = processImage(signCount, signContainers.length, loadingBar);
       signImageElement.src = "images/loading/broken-sign.svg";
       if (overlayImage === null) {
         const failOverlayImageSrc = `images/overlay/${signContainer.id}.svg`;
         const failOverlayImageAlt = signImageElement.alt.replace("Photo", "Overlay");
         const failOverlayImage = createElement(`
-          <img class="park-sign-overlay" src=${failOverlayImageSrc} alt="${failOverlayImageAlt}">
+          <img class="park-sign-overlay" src=${failOverlayImageSrc} alt="${escapeHTML(failOverlayImageAlt)}">
         `);
-        signContainer.appendChild(failOverlayImage);
-      }
-      if (signCount === signContainers.length) {
-        landscapePhotosLoad(); // Load landscape photos after park sign photos are complete.
+        signContainer.insertBefore(failOverlayImage, signImageElement.nextSibling);
       }
+      processSign();
     };
-    const signImageElement = signContainer.querySelector(".park-sign");
-    let newImageSrc = signImageElement.getAttribute("data-src");
-    if (!newImageSrc.toLowerCase().endsWith(".svg")) {
-      newImageSrc += `=w${maxSignWidth}`;
+    const newImageSrc = signImageElement.getAttribute("data-src");
+    if (newImageSrc.toLowerCase().endsWith(".svg")) {
+      loadImage.src = newImageSrc;
+    } else {
+      setPhotoSrc(loadImage, newImageSrc, signSizes, maxSignWidth, getPhotoMirror(signContainer, 0));
     }
-    loadImage.src = newImageSrc;
   });
 };
 
-// Loads all landscape photos.
-const landscapePhotosLoad = () => {
-  // Setting up loading bar for landscape photos.
-  loadingBar.className = "blue-background";
-  loadingBar.style.width = "0%";
-  // Load landscape photos.
-  let landscapeCount = 0;
+// Loads the landscape photos of sign containers.
+const landscapePhotosLoad = (loadedSignContainers) => {
+  const landscapeImages = [];
+  loadedSignContainers.forEach((signContainer) => {
+    landscapeImages.push(...signContainer.querySelectorAll(".landscape-latent"));
+  });
+  photoLoads.landscape.queued += landscapeImages.length;
+  updateLoadingBar();
   landscapeImages.forEach((landscapeImage) => {
+    const galleryIconContainer = landscapeImage.parentElement.parentElement.querySelector(".gallery-icon-container");
     const loadImage = new Image();
     loadImage.onload = () => {
-      landscapeImage.src = loadImage.src;
-      landscapeCount = processImage(landscapeCount, landscapeImages.length, loadingBar);
+      showLoadedImage(landscapeImage, loadImage);
+      photoLoads.landscape.loaded += 1;
+      updateLoadingBar();
       landscapeImage.setAttribute("data-load", "true");
-      if (landscapeImage.parentElement.querySelectorAll("[data-load='true']").length === 3) {
-        const galleryIconContainer =
-          landscapeImage.parentElement.parentElement.querySelector(".gallery-icon-container");
+      if (landscapeImage.parentElement.querySelectorAll("[data-load='true']").length === LANDSCAPE_IMAGE_COUNT) {
         galleryIconContainer.classList.remove("icon-loading");
         galleryIconContainer.querySelector(".sign-icon").src = "images/icon/landscape-button.svg";
       }
-      if (landscapeCount === landscapeImages.length) {
-        loadingBar.className = "brown-background";
-      }
     };
     loadImage.onerror = () => {
       console.error("Error on landscape image: ", loadImage.src);
-      landscapeCount = processImage(landscapeCount, landscapeImages.length, loadingBar);
-      const galleryIconContainer = landscapeImage.parentElement.parentElement.querySelector(".gallery-icon-container");
+      photoLoads.landscape.loaded += 1;
+      updateLoadingBar();
       galleryIconContainer.querySelector(".sign-icon").src = "images/icon/landscape-button-broken.svg";
-      if (landscapeCount === landscapeImages.length) {
-        loadingBar.className = "brown-background";
-      }
       landscapeImage.src = "images/loading/broken-landscape.svg";
     };
-    const newImageSrc = `${landscapeImage.getAttribute("data-src")}=w900`;
-    loadImage.src = newImageSrc;
+    const mirror = getPhotoMirror(landscapeImage.closest(".sign-container"), landscapeImage.getAttribute("data-photo"));
+    setPhotoSrc(loadImage, landscapeImage.getAttribute("data-src"), landscapeSizes, LANDSCAPE_WIDTH, mirror);
   });
 };
 
@@ -235,14 +412,21 @@ const handleSignsContainerMouseMove = (event) => {
 };
 
 // Shows landscape photos.
-const showLandscapes = (event) => {
-  const iconContainerElement = event.target.parentElement;
+const showLandscapes = (iconContainerElement) => {
   if (!iconContainerElement.classList.contains("icon-loading")) {
     const signContainerElement = iconContainerElement.parentElement;
     for (let i = 0; i < LANDSCAPE_IMAGE_COUNT; i++) {
-      document.getElementById(`landscape-${i + 1}`).src = signContainerElement.querySelector(
-        `.landscape-latent-${i + 1}`
-      ).src;
+      const landscapeImage = document.getElementById(`landscape-${i + 1}`);
+      const latentImage = signContainerElement.querySelector(`.landscape-latent-${i + 1}`);
+      // Keeping the size of mirrored photos so the landscapes don't shift as they are shown.
+      ["width", "height"].forEach((attribute) => {
+        if (latentImage.hasAttribute(attribute)) {
+          landscapeImage.setAttribute(attribute, latentImage.getAttribute(attribute));
+        } else {
+          landscapeImage.removeAttribute(attribute);
+        }
+      });
+      showLoadedImage(landscapeImage, latentImage);
     }
     document.body.classList.add("overlay-background", "no-scroll");
     landscapeContainer.classList.remove("hidden");
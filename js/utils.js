@@ -4,3 +4,8 @@ export const createElement = (htmlString) => {
   wrapper.innerHTML = htmlString.trim();
   return wrapper.firstChild;
 };
+
+// Escapes text for use in an HTML string.
+export const escapeHTML = (text) => {
+  return String(text).replace(/[&<>"']/g, (character) => `&#${character.charCodeAt(0)};`);
+};
@@ -0,0 +1,461 @@
+"""bench.py benchmarks the update scripts offline against fixtures."""
+
+# This script is used to benchmark the update scripts without touching the real parks.json file, image directories, or
+# the California State Parks website. Each stage runs a script in a temporary copy of the project:
+#
+# scrape
+# Runs scrape.py against the California State Parks html file in the assets directory, served from a local http server.
+# Coordinate prompts are skipped.
+#
+# sign
+# Runs sign.py for the full park list in the California State Parks html file in the assets directory. The stage runs
+# twice, first with empty image directories (sign-cold) and then again with nothing changed (sign-warm).
+#
+# extract
+# Runs stateparks/extract.py with every extractor on the California State Parks html file in the assets directory, which
+# times the extractor and checks its output matches BeautifulSoup.
+#
+# photos
+# Runs photos.py for every park in the California State Parks html file in the assets directory against a local stub
+# of Google Photos. Every fifth request gets a 429 or 503 response the first time to exercise the retries.
+#
+# mirror
+# Runs mirror.py for the first MIRROR_PARKS parks in the California State Parks html file in the assets directory
+# against a local stub serving a generated photo for every link. The stage runs twice, first with an empty photo store
+# (mirror-cold) and then again with nothing changed (mirror-warm). Needs the Pillow package.
+#
+# build
+# Runs build.py against a synthetic parks.json with the number of parks set by the -s/--sizes argument. The stage runs
+# three times, first with an empty keystore (build-N), then again with nothing changed (build-N-warm), and then with one
+# more park visited (build-N-visit).
+#
+# Each stage records wall time, peak resident set size, and a per-phase breakdown. A phase starts at every progress line
+# the script prints (lines starting with "..." are folded into the current phase). Results are output as json so they
+# can be compared between commits.
+#
+# Example: [python bench.py -t build -s 1000,10000 -o bench.json]
+
+import argparse  # Used to process command line arguments.
+import html  # Used to unescape park names in the California State Parks html file.
+import io  # Used to encode the photos served to the mirror stage.
+import http.server  # Used to serve the California State Parks html file locally.
+import json  # Used to create parks.json fixtures and output results.
+import os  # Used to process directories and files.
+import platform  # Used to record the python version and platform.
+import re  # Used to match parks in the California State Parks html file.
+import shutil  # Used to copy the project into a temporary directory.
+import subprocess  # Used to run the update scripts.
+import sys  # Used to run scripts with the current python interpreter.
+import tempfile  # Used to create a temporary copy of the project.
+import threading  # Used to run the local http server.
+import time  # Used to time stages and phases.
+
+try:
+    from PIL import Image  # Used to generate the photos served to the mirror stage.
+except ImportError:
+    Image = None
+
+# pylint: disable=C0103
+
+UPDATE_DIR = os.path.dirname(os.path.abspath(__file__))  # Directory containing the update scripts.
+LISTING_FILE = "CaliforniaStateParksListing_9_25_2023.html"  # California State Parks html fixture.
+RESULTS_RE = re.compile(r'<ul class="[^"]*results-area[^"]*">(.*?)</ul>', re.DOTALL)  # Park lists in the html fixture.
+LISTING_RE = re.compile(r'<li><a href="[^"]*page_id=(\d+)">([^<]+)</a></li>')  # Park entries in the html fixture.
+PHOTO_TYPES = ["sign", "landscape1", "landscape2", "landscape3"]  # Park photo types in parks.json.
+PARK_TYPES = [  # Park types used for synthetic parks.
+    "State Park",
+    "State Historic Park",
+    "State Beach",
+    "State Recreation Area",
+    "State Natural Reserve",
+    "State Vehicular Recreation Area",
+    "Other",
+]
+STAGES = ["scrape", "extract", "sign", "photos", "mirror", "build"]  # Available benchmark stages.
+MIRROR_PARKS = 25  # Number of parks with photos mirrored in the mirror stage.
+MIRROR_PHOTO_SIZE = (2000, 1500)  # Width and height of the photos served to the mirror stage.
+
+def create_workspace():
+    """Creating a temporary copy of the update scripts, stateparks package, assets, and empty image directories."""
+    workspace = tempfile.mkdtemp(prefix="stateparks-bench-")
+    update_dir = os.path.join(workspace, "update")
+    os.makedirs(update_dir)
+    for filename in os.listdir(UPDATE_DIR):
+        if filename.endswith(".py"):
+            shutil.copy(os.path.join(UPDATE_DIR, filename), update_dir)
+    shutil.copytree(
+        os.path.join(UPDATE_DIR, "stateparks"),
+        os.path.join(update_dir, "stateparks"),
+        ignore=shutil.ignore_patterns("__pycache__"),
+    )
+    shutil.copytree(
+        os.path.join(UPDATE_DIR, "assets"),
+        os.path.join(update_dir, "assets"),
+        ignore=shutil.ignore_patterns(
+            "parks.json", "passphrase.txt", "manifest.json", "extents.json", "decisions.json", "report.json",
+            "route.json", "mirror.json", "http-cache", ".*"
+        ),
+    )
+    os.makedirs(os.path.join(workspace, "images", "parks"))
+    os.makedirs(os.path.join(workspace, "images", "overlay"))
+    return workspace
+
+def new_photos(code, visited):
+    """Creating synthetic photo links for a park."""
+    photos = {}
+    for photo_type in PHOTO_TYPES:
+        link = "https://lh3.googleusercontent.com/pw/" + code + "-" + photo_type if visited else ""
+        photos[photo_type] = {
+            "encrypt": {"share": "https://photos.app.goo.gl/" + code if visited else "", "photo": link},
+            "guest": {"share": "", "photo": ""},
+        }
+    return photos
+
+def write_parks_json(workspace, parks):
+    """Writing a parks.json fixture to the workspace. Parks are written one at a time to keep memory use low."""
+    with open(os.path.join(workspace, "update", "assets", "parks.json"), "w", encoding="utf-8") as outfile:
+        outfile.write('{"firstname": "Bench", "lastname": "Mark", "parks": [')
+        for i, park in enumerate(parks):
+            outfile.write(("," if i else "") + "\n" + json.dumps(park, indent=2))
+        outfile.write("\n]}")
+
+def get_listing_parks():
+    """Getting the park codes and names in the California State Parks html fixture with overrides applied."""
+    with open(os.path.join(UPDATE_DIR, "assets", LISTING_FILE), encoding="utf-8") as listing_file:
+        listing = listing_file.read()
+    with open(os.path.join(UPDATE_DIR, "assets", "overrides.json"), encoding="utf-8") as overrides_file:
+        aliases = {x["code"]: x["alias"] for x in json.load(overrides_file)["overrides"]}
+    parks = []
+    for results_list in RESULTS_RE.findall(listing):
+        for code, name in LISTING_RE.findall(results_list):
+            parks.append({"code": code, "name": aliases.get(code, html.unescape(name).strip())})
+    return parks
+
+def create_synthetic_parks(count):
+    """Creating synthetic parks with about a third visited."""
+    for i in range(count):
+        code = str(100000 + i)
+        park_type = PARK_TYPES[i % len(PARK_TYPES)]
+        visited = i % 3 == 0
+        yield {
+            "code": code,
+            "name": "Synthetic Park " + str(i) + " " + park_type,
+            "type": park_type,
+            "coordinates": "36.30952528162378,-121.88637073076984",
+            "visited": visited,
+            "overlay": False,
+            "photos": new_photos(code, visited),
+        }
+
+def visit_park(parks, index):
+    """Marking the synthetic park at index as visited."""
+    for i, park in enumerate(parks):
+        if i == index:
+            park = dict(park, visited=True, photos=new_photos(park["code"], True))
+        yield park
+
+def run_script(workspace, args, stdin_text="", env=None):
+    """Running an update script in the workspace. Returns wall time, peak rss, and phase timings."""
+    phases = []
+    output = []
+    start = time.perf_counter()
+    with subprocess.Popen(
+        [sys.executable] + args,
+        cwd=os.path.join(workspace, "update"),
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        env=dict(os.environ, PYTHONUNBUFFERED="1", STATEPARKS_CACHE=os.path.join(workspace, "cache"), **(env or {})),
+    ) as process:
+        process.stdin.write(stdin_text)
+        process.stdin.close()
+        for line in process.stdout:
+            now = time.perf_counter() - start
+            line = line.rstrip("\n")
+            output.append(line)
+            if line and not line.startswith("..."):
+                if phases:
+                    phases[-1]["seconds"] = round(now - phases[-1].pop("start"), 6)
+                phases.append({"name": line, "start": now})
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+    wall = time.perf_counter() - start
+    if phases:
+        phases[-1]["seconds"] = round(wall - phases[-1].pop("start"), 6)
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS.
+    peak_rss_kb = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return {
+        "wall_seconds": round(wall, 6),
+        "peak_rss_kb": peak_rss_kb,
+        "returncode": process.returncode,
+        "phases": phases,
+        "output_tail": output[-5:],
+    }
+
+class ListingHandler(http.server.BaseHTTPRequestHandler):
+    """Serves the California State Parks html fixture for every request."""
+
+    def do_GET(self):  # pylint: disable=C0103
+        """Handles get requests."""
+        with open(os.path.join(UPDATE_DIR, "assets", LISTING_FILE), "rb") as listing_file:
+            body = listing_file.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        """Silences request logging."""
+
+class PhotosHandler(http.server.BaseHTTPRequestHandler):
+    """Serves Google Photos shared album pages. Every fifth request fails the first time it is made."""
+
+    requests_seen = set()  # Paths requested at least once.
+    request_count = 0  # Number of requests served.
+
+    def do_GET(self):  # pylint: disable=C0103
+        """Handles get requests."""
+        PhotosHandler.request_count += 1
+        if PhotosHandler.request_count % 5 == 0 and self.path not in PhotosHandler.requests_seen:
+            PhotosHandler.requests_seen.add(self.path)
+            self.send_response(429 if PhotosHandler.request_count % 10 == 0 else 503)
+            self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        PhotosHandler.requests_seen.add(self.path)
+        body = (
+            '<html><head><meta property="og:image" content="https://lh3.googleusercontent.com/pw'
+            + self.path
+            + '=w600-h315-p-k"></head><body></body></html>'
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        """Silences request logging."""
+
+class MirrorHandler(http.server.BaseHTTPRequestHandler):
+    """Serves a generated jpeg photo for every photo link, ignoring the Google Photos size option."""
+
+    def do_GET(self):  # pylint: disable=C0103
+        """Handles get requests."""
+        # Photos are gradients tinted by their link, so different links mostly get different photos.
+        tint = sum(self.path.split("=")[0].encode("utf-8")) % 256
+        gradient = Image.linear_gradient("L").resize(MIRROR_PHOTO_SIZE)
+        mirrored = gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+        photo = Image.merge("RGB", [gradient, mirrored, Image.new("L", MIRROR_PHOTO_SIZE, tint)])
+        buffer = io.BytesIO()
+        photo.save(buffer, "JPEG", quality=85)
+        body = buffer.getvalue()
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        """Silences request logging."""
+
+def bench_scrape():
+    """Benchmarking scrape.py against the California State Parks html fixture."""
+    workspace = create_workspace()
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), ListingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = "http://127.0.0.1:" + str(server.server_address[1]) + "/?page_id=21805"
+        return {"scrape": run_script(workspace, ["scrape.py"], "skip-all\n" * 10, {"STATEPARKS_PARKS_URL": url})}
+    finally:
+        server.shutdown()
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def bench_extract():
+    """Benchmarking every html extractor on the California State Parks html fixture."""
+    workspace = create_workspace()
+    try:
+        results = {}
+        for name in ["stream", "lxml", "bs4"]:
+            results["extract-" + name] = run_script(
+                workspace, ["-m", "stateparks.extract", "-e", name, "-n", "50", os.path.join("assets", LISTING_FILE)]
+            )
+        return results
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def bench_sign(jobs):
+    """Benchmarking sign.py for every park in the California State Parks html fixture."""
+    workspace = create_workspace()
+    try:
+        write_parks_json(workspace, get_listing_parks())
+        return {
+            "sign-cold": run_script(workspace, ["sign.py", "-j", str(jobs)]),
+            "sign-warm": run_script(workspace, ["sign.py", "-j", str(jobs)]),
+        }
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def bench_photos():
+    """Benchmarking photos.py for every park in the California State Parks html fixture against a local stub."""
+    workspace = create_workspace()
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), PhotosHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = "http://127.0.0.1:" + str(server.server_address[1]) + "/"
+        parks = []
+        for park in get_listing_parks():
+            photos = {}
+            for photo_type in PHOTO_TYPES:
+                photos[photo_type] = {
+                    "encrypt": {"share": url + park["code"] + "-" + photo_type, "photo": ""},
+                    "guest": {"share": "", "photo": ""},
+                }
+            parks.append(dict(park, type="Other", coordinates="", visited=True, overlay=False, photos=photos))
+        write_parks_json(workspace, parks)
+        return {"photos": run_script(workspace, ["photos.py", "-c", "8", "-r", "60000"])}
+    finally:
+        server.shutdown()
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def bench_mirror(jobs):
+    """Benchmarking mirror.py for parks in the California State Parks html fixture against a local stub."""
+    if Image is None:
+        print("Skipping mirror benchmark, which needs the Pillow package", file=sys.stderr)
+        return {}
+    workspace = create_workspace()
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), MirrorHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = "http://127.0.0.1:" + str(server.server_address[1]) + "/pw/"
+        parks = []
+        for park in get_listing_parks()[:MIRROR_PARKS]:
+            photos = {}
+            for photo_type in PHOTO_TYPES:
+                link = url + park["code"] + "-" + photo_type
+                photos[photo_type] = {"encrypt": {"share": "", "photo": link}, "guest": {"share": "", "photo": link}}
+            parks.append(dict(park, type="Other", coordinates="", visited=True, overlay=False, photos=photos))
+        write_parks_json(workspace, parks)
+        return {
+            "mirror-cold": run_script(workspace, ["mirror.py", "-j", str(jobs)]),
+            "mirror-warm": run_script(workspace, ["mirror.py", "-j", str(jobs)]),
+        }
+    finally:
+        server.shutdown()
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def bench_build(size):
+    """Benchmarking build.py against a synthetic parks.json."""
+    workspace = create_workspace()
+    try:
+        write_parks_json(workspace, create_synthetic_parks(size))
+        with open(os.path.join(workspace, "update", "assets", "passphrase.txt"), "w", encoding="utf-8") as outfile:
+            outfile.write("benchmark\n")
+        keystore = {"STATEPARKS_KEYSTORE": os.path.join(workspace, "keystore")}
+        result = run_script(workspace, ["build.py"], env=keystore)
+        result["output_bytes"] = {
+            filename: os.path.getsize(os.path.join(workspace, filename))
+            for filename in ["main.html", "guest.html", "index.html"]
+            if os.path.isfile(os.path.join(workspace, filename))
+        }
+        results = {
+            "build-" + str(size): result,
+            "build-" + str(size) + "-warm": run_script(workspace, ["build.py"], env=keystore),
+        }
+        write_parks_json(workspace, visit_park(create_synthetic_parks(size), 1))
+        results["build-" + str(size) + "-visit"] = run_script(workspace, ["build.py"], env=keystore)
+        return results
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def get_commit():
+    """Getting the current git commit if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=UPDATE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(stages, sizes, jobs):
+    """Running the benchmark stages. Returns the results."""
+    results = {
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "stages": {},
+    }
+    for stage in stages:
+        print("Running " + stage + " benchmark", file=sys.stderr)
+        if stage == "scrape":
+            results["stages"].update(bench_scrape())
+        elif stage == "extract":
+            results["stages"].update(bench_extract())
+        elif stage == "sign":
+            results["stages"].update(bench_sign(jobs))
+        elif stage == "photos":
+            results["stages"].update(bench_photos())
+        elif stage == "mirror":
+            results["stages"].update(bench_mirror(jobs))
+        elif stage == "build":
+            for size in sizes:
+                results["stages"].update(bench_build(size))
+    for name, result in results["stages"].items():
+        print(
+            f"{name}: {result['wall_seconds']:.3f}s, {result['peak_rss_kb']} KB peak rss, exit {result['returncode']}",
+            file=sys.stderr,
+        )
+    return results
+
+# Running file from command line.
+if __name__ == "__main__":
+
+    def stages_type_check(arg):
+        """Validates stages argument."""
+        stages = [stage.strip() for stage in arg.split(",") if stage.strip()]
+        for stage in stages:
+            if stage not in STAGES:
+                raise argparse.ArgumentTypeError('the stage "' + stage + '" is not one of ' + ", ".join(STAGES))
+        return stages
+
+    def sizes_type_check(arg):
+        """Validates sizes argument."""
+        sizes = [size.strip() for size in arg.split(",") if size.strip()]
+        for size in sizes:
+            if not size.isdigit() or int(size) < 1:
+                raise argparse.ArgumentTypeError('the size "' + size + '" needs to be a positive integer')
+        return [int(size) for size in sizes]
+
+    parser = argparse.ArgumentParser(description="Script is used to benchmark the update scripts offline")
+    parser.add_argument(
+        "-t",
+        "--stages",
+        help="comma separated stages to run. Defaults to " + ",".join(STAGES),
+        default=STAGES,
+        type=stages_type_check,
+    )
+    parser.add_argument(
+        "-s",
+        "--sizes",
+        help="comma separated synthetic park counts for the build stage. Defaults to 1000,10000",
+        default=[1000, 10000],
+        type=sizes_type_check,
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="number of worker processes for the sign and mirror stages. Defaults to the number of CPUs",
+        default=os.cpu_count() or 1,
+        type=int,
+    )
+    parser.add_argument("-o", "--output", help="json file to write results to. Defaults to printing results")
+    args = vars(parser.parse_args())
+    bench_results = run_benchmarks(args["stages"], args["sizes"], args["jobs"])
+    if args["output"]:
+        with open(args["output"], "w", encoding="utf-8") as results_file:
+            results_file.write(json.dumps(bench_results, indent=2))
+    else:
+        print(json.dumps(bench_results, indent=2))
@@ -13,182 +13,137 @@
 #
 # index.html
 # This file is the login page that contains the encrypted main.html code. This file was adapted from PageCrypt
-# (https://github.com/MaxLaumeister/pagecrypt).
+# (https://github.com/MaxLaumeister/pagecrypt). The number of PBKDF2 iterations used to derive the encryption key can be
+# set with the -i/--iterations argument and is written to index.html for the login page. Derived keys and the last
+# encrypted main.html are cached in a keystore outside the repository (~/.cache/stateparks by default, or the
+# STATEPARKS_KEYSTORE environment variable), so index.html only changes when main.html, the passphrase, or the
+# iterations change.
 #
 # guest.html
 # This file serves as the guest page that should only contain image links that you don't mind being publicly accessible.
 # This file also acts as a demo page for this website.
+#
+# overlay-sprite.svg
+# Running this script with the -s/--sprite argument combines the overlay svg images of parks using the overlay option
+# into a single svg sprite in the images directory. The html files then reference each overlay from the sprite instead
+# of requesting one svg file per park.
+#
+# Photo widths
+# Sign and landscape photos list Google Photos links at several widths in their srcset so browsers download the smallest
+# photo that is sharp on their screen. The -w/--widths argument sets the comma separated widths offered, defaulting to
+# 320 to 1600 pixels, and the --no-webp argument requests the photos in their original format instead of WebP.
+#
+# Example: [python build.py -w 320,640,1280 --no-webp]
+#
+# mirror.json
+# Running this script with the -m/--mirror argument serves the photos mirrored by mirror.py from the images/mirror
+# directory instead of Google Photos, showing a blurred placeholder of each photo at its size while it loads.
+#
+# route.json
+# Running this script with the -r/--route argument adds the route planned by route.py to the html files as a list above
+# the park signs.
+#
+# The dataset entries of every park are saved to a snapshot in the keystore directory after each build, so the next run
+# only serializes the parks that changed in parks.json since then.
+#
+# The html building itself lives in stateparks/pages.py. This script is a command line entry point around it.
+#
+# Example: [python build.py -s]
 
-from base64 import b64encode  # Used to encrypt html file.
-import json  # Used for loading parks.json file.
-import os.path  # Used to process parks.json file.
+import argparse  # Used to process command line arguments.
 import sys  # Used to exit script on errors.
-import jinja2  # Used to build html files based on jinja html templates.
-from Crypto import Random  # Used to encrypt html file.
-from Crypto.Cipher import AES  # Used to encrypt html file.
-from Crypto.Hash import SHA256  # Used to encrypt html file.
-from Crypto.Protocol.KDF import PBKDF2  # Used to encrypt html file.
-
-# pylint: disable=C0103
-# pylint: disable=W0718
-
-def build_html(template_path, result_path, context):
-    """Builds html file using jinja templates."""
-    environment = jinja2.Environment(loader=jinja2.FileSystemLoader("./"))
-    with open(result_path, mode="w", encoding="utf-8") as results:
-        results.write(environment.get_template(template_path).render(context))
-        print(f"... wrote {result_path}")
-
-# Start script execution.
-print("Running build.py")
-
-# Loading parks.json file.
-if os.path.isfile("./assets/parks.json"):
-    print("Opening parks.json")
-    with open("./assets/parks.json", encoding="utf-8") as parks_json_file:
-        try:
-            parks_json = json.load(parks_json_file)
-            parks_json_file.close()
-        except ValueError as e:
-            print("Invalid parks.json file: " + str(e))
-            print("Exiting")
-            parks_json_file.close()
-            sys.exit()
-else:
-    print("File parks.json doesn't exist")
-    print("Exiting")
-    sys.exit()
-
-# Loading passphrase.txt file.
-if os.path.isfile("./assets/passphrase.txt"):
-    print("Opening passphrase.txt")
-    with open("./assets/passphrase.txt", encoding="utf-8") as passphrase_txt_file:
-        try:
-            passphrase = passphrase_txt_file.readline().rstrip()
-            passphrase_txt_file.close()
-        except ValueError as e:
-            print("Invalid passphrase.txt file: " + str(e))
-            print("Exiting")
-            parks_json_file.close()
-            sys.exit()
-else:
-    print("File passphrase.txt doesn't exist")
-    print("Exiting")
-    sys.exit()
-
-# Initializing jinja template variables.
-print("Initializing jinja template variables")
-parks_encrypt = []
-parks_guest = []
-parks_visit_stats = {
-    "all": {"count": 0, "visited": 0},
-    "state-park": {"count": 0, "visited": 0},
-    "state-historic-park": {"count": 0, "visited": 0},
-    "state-beach": {"count": 0, "visited": 0},
-    "state-recreation-area": {"count": 0, "visited": 0},
-    "state-natural-reserve": {"count": 0, "visited": 0},
-    "state-vehicular-recreation-area": {"count": 0, "visited": 0},
-    "other": {"count": 0, "visited": 0},
-}
-
-# Building jinja template variables.
-for park in parks_json["parks"]:
-    park_data = {
-        "code": park["code"],
-        "name": park["name"],
-        "type": park["type"].replace(" ", "-").lower(),
-        "visited": park["visited"],
-        "overlay": park["overlay"],
-        "coordinates": park["coordinates"],
-    }
-    # Keeping track of number of parks per type.
-    parks_visit_stats[park_data["type"]]["count"] += 1
-    parks_visit_stats["all"]["count"] += 1
-    if park["visited"]:
-        # Keeping track of number of parks visited per type.
-        parks_visit_stats[park_data["type"]]["visited"] += 1
-        parks_visit_stats["all"]["visited"] += 1
-        # Gathering links for encrypted site.
-        park_data_encrypt = park_data.copy()
-        park_data_encrypt["sign"] = park["photos"]["sign"]["encrypt"]["photo"]
-        park_data_encrypt["landscape1"] = park["photos"]["landscape1"]["encrypt"]["photo"]
-        park_data_encrypt["landscape2"] = park["photos"]["landscape2"]["encrypt"]["photo"]
-        park_data_encrypt["landscape3"] = park["photos"]["landscape3"]["encrypt"]["photo"]
-        parks_encrypt.append(park_data_encrypt)
-        # Gathering links for guest site.
-        park_data_guest = park_data.copy()
-        park_data_guest["sign"] = park["photos"]["sign"]["guest"]["photo"]
-        if park["photos"]["landscape1"]["guest"]["photo"] != "":
-            park_data_guest["landscape1"] = park["photos"]["landscape1"]["guest"]["photo"]
-        else:
-            park_data_guest["landscape1"] = park["photos"]["landscape1"]["encrypt"]["photo"]
-        if park["photos"]["landscape2"]["guest"]["photo"] != "":
-            park_data_guest["landscape2"] = park["photos"]["landscape2"]["guest"]["photo"]
-        else:
-            park_data_guest["landscape2"] = park["photos"]["landscape2"]["encrypt"]["photo"]
-        if park["photos"]["landscape3"]["guest"]["photo"] != "":
-            park_data_guest["landscape3"] = park["photos"]["landscape3"]["guest"]["photo"]
-        else:
-            park_data_guest["landscape3"] = park["photos"]["landscape3"]["encrypt"]["photo"]
-        parks_guest.append(park_data_guest)
-    else:
-        parks_encrypt.append(park_data)
-        parks_guest.append(park_data)
+from stateparks import dataset  # Used for loading parks.json and passphrase.txt files.
+from stateparks import encrypt  # Used to get the default PBKDF2 iterations.
+from stateparks import pages  # Used to build html files.
 
-# Building main.html.
-print("Building main.html")
-build_html(
-    "./assets/main.html.jinja2",
-    "../main.html",
-    {
-        "firstname": parks_json["firstname"],
-        "lastname": parks_json["lastname"],
-        "parks": parks_encrypt,
-        "stats": parks_visit_stats,
-    },
-)
+# Running file from command line.
+if __name__ == "__main__":
+    # Start script execution.
+    print("Running build.py")
 
-# Building guest.html.
-print("Building guest.html")
-build_html(
-    "./assets/main.html.jinja2",
-    "../guest.html",
-    {
-        "firstname": parks_json["firstname"],
-        "lastname": parks_json["lastname"],
-        "parks": parks_guest,
-        "stats": parks_visit_stats,
-    },
-)
+    # Processing command line arguments.
+    def iterations_type_check(arg):
+        """Validates iterations argument."""
+        if not arg.isdigit() or int(arg) < 1:
+            raise argparse.ArgumentTypeError('the iterations value "' + arg + '" needs to be a positive integer')
+        return int(arg)
 
-# Building index.html adding encrypted main.html file.
-# Adapted from this PageCrypt (https://github.com/MaxLaumeister/pagecrypt).
-print("Building index.html")
+    def widths_type_check(arg):
+        """Validates photo widths argument."""
+        widths = arg.replace(" ", "").split(",")
+        if not all(width.isdigit() and int(width) > 0 for width in widths):
+            raise argparse.ArgumentTypeError('the widths "' + arg + '" need to be comma separated positive integers')
+        return [int(width) for width in widths]
 
-# Sanitizing input.
-print("Sanitizing main.html for encryption")
-try:
-    with open("../main.html", "rb") as main_html_file:
-        data = main_html_file.read()
-except Exception as e:
-    print("Cannot open file main.html: " + str(e))
-    sys.exit()
+    parser = argparse.ArgumentParser(description="Script is used to compile html files from data in parks.json")
+    parser.add_argument(
+        "-s",
+        "--sprite",
+        help="combine park overlay svg images into a single svg sprite referenced by the html files",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-i",
+        "--iterations",
+        help="PBKDF2 iterations used to encrypt main.html, defaults to " + str(encrypt.ITERATIONS),
+        type=iterations_type_check,
+        default=encrypt.ITERATIONS,
+    )
+    parser.add_argument(
+        "-r",
+        "--route",
+        help="add the route planned by route.py in route.json to the html files",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-m",
+        "--mirror",
+        help="serve the photos mirrored by mirror.py in mirror.json",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-w",
+        "--widths",
+        help="comma separated Google Photos widths offered to browsers, defaults to "
+        + ",".join(str(width) for width in pages.PHOTO_WIDTHS),
+        type=widths_type_check,
+    )
+    parser.add_argument(
+        "--no-webp",
+        help="request Google Photos images in their original format instead of WebP",
+        action="store_true",
+    )
+    args = vars(parser.parse_args())
 
-# Encrypting input.
-print("Encrypting main.html for index.html")
-salt = Random.new().read(32)
-key = PBKDF2(passphrase.encode("utf-8"), salt, count=100000, dkLen=32, hmac_hash_module=SHA256)
-iv = Random.new().read(16)
-cipher = AES.new(key, AES.MODE_GCM, nonce=iv)
-encrypted, tag = cipher.encrypt_and_digest(data)
-encryptedHTML = f'"{b64encode(salt+iv+encrypted+tag).decode("utf-8")}"'
+    # Loading parks.json, passphrase.txt, route.json, and mirror.json files.
+    route_json = None  # Planned route through unvisited parks.
+    mirror_json = None  # Mirrored photos by photo link.
+    try:
+        print("Opening " + dataset.get_parks_name())
+        parks_json = dataset.load_parks()
+        print("Opening passphrase.txt")
+        passphrase = dataset.load_passphrase()
+        if args["route"]:
+            print("Opening route.json")
+            route_json = dataset.load_route()
+        if args["mirror"]:
+            print("Opening mirror.json")
+            mirror_json = dataset.load_mirror()
+    except dataset.DatasetError as e:
+        print(e)
+        print("Exiting")
+        sys.exit()
 
-# Building index.html.
-build_html(
-    "./assets/index.html.jinja2",
-    "../index.html",
-    {
-        "encryptedHTML": encryptedHTML,
-    },
-)
-print("Execution of build.py complete")
+    # Building main.html, guest.html, and index.html.
+    pages.build_pages(
+        parks_json,
+        passphrase,
+        args["sprite"],
+        args["iterations"],
+        route_json,
+        args["widths"],
+        not args["no_webp"],
+        mirror_json,
+        snapshot=True,
+    )
+    print("Execution of build.py complete")
@@ -0,0 +1,84 @@
+"""mirror.py mirrors park photos locally and outputs their thumbnails and placeholders to mirror.json."""
+
+# This script is used to serve park photos from the website instead of Google Photos. Run it after photos.py has
+# gathered the direct image links in parks.json. Every photo link is downloaded once into a photo-store directory
+# outside the repository (~/.cache/stateparks by default or the STATEPARKS_CACHE environment variable), then rendered
+# into AVIF and WebP thumbnails at several widths in the images/mirror directory. The width, height, and a tiny blurred
+# placeholder of every photo are output to mirror.json in the assets directory, which is left out of the repository
+# like parks.json since it is keyed by photo link.
+# Running build.py with the -m/--mirror argument then serves the mirrored photos, showing the placeholders while they
+# load.
+#
+# Example: [python mirror.py -j 4]
+#
+# The thumbnails are public once the website is published. Only the photos shown on guest.html are mirrored unless the
+# -a/--all argument is set, which also mirrors the main.html photos. Running this script again without the -a/--all
+# argument removes the main.html photos mirrored before.
+#
+# Photos already mirrored are skipped, so running this script again only mirrors new or failed photos. Mirroring
+# photos needs the Pillow package. The mirroring itself lives in stateparks/mirror.py. This script is a command line
+# entry point around it.
+
+import argparse  # Used to process command line arguments.
+import os  # Used to get the number of CPUs.
+import sys  # Used to exit script on errors.
+from stateparks import dataset  # Used for loading parks.json and mirror.json files.
+from stateparks import mirror  # Used to mirror photos.
+
+# Running file from command line.
+if __name__ == "__main__":
+    # Start script execution.
+    print("Running mirror.py")
+
+    # Processing command line arguments.
+    def jobs_type_check(arg):
+        """Validates jobs argument."""
+        if not arg.isdigit() or int(arg) < 1:
+            raise argparse.ArgumentTypeError('the jobs value "' + arg + '" needs to be a positive integer')
+        return int(arg)
+
+    parser = argparse.ArgumentParser(description="Script is used to mirror park photos locally")
+    parser.add_argument(
+        "-a",
+        "--all",
+        help="also mirror the main.html photos, which makes them public",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="number of photos mirrored in parallel, defaults to the number of CPUs",
+        type=jobs_type_check,
+        default=os.cpu_count() or 1,
+    )
+    args = vars(parser.parse_args())
+
+    # Loading parks.json and mirror.json files.
+    try:
+        print("Opening " + dataset.get_parks_name())
+        parks_json = dataset.load_parks()
+        mirror_json = {}  # Mirrored photos by photo link.
+        if dataset.has_mirror():
+            print("Opening mirror.json")
+            mirror_json = dataset.load_mirror()
+    except dataset.DatasetError as e:
+        print(e)
+        print("Exiting")
+        sys.exit()
+
+    # Mirroring photos.
+    variants = ["guest", "encrypt"] if args["all"] else ["guest"]
+    try:
+        results = mirror.mirror_photos(parks_json, mirror_json, variants, args["jobs"])
+    except mirror.MirrorError as e:
+        print(e)
+        print("Exiting")
+        sys.exit()
+    print("Mirrored " + str(results["mirrored"]) + " photo(s), " + str(len(results["failed"])) + " failed")
+    if results["failed"]:
+        print("Run mirror.py again to retry the " + str(len(results["failed"])) + " failed photo(s)")
+
+    # Outputting results to mirror.json.
+    print("Outputting mirror.json")
+    dataset.save_mirror(mirror_json)
+    print("Execution of mirror.py complete")
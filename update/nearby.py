@@ -0,0 +1,149 @@
+"""nearby.py lists the parks near a location or within a bounding box."""
+
+# This script is used to find parks by location using the park coordinates in parks.json. The location is either a park
+# code or coordinates in the same "lat,lng" format as parks.json. By default the 5 parks nearest to the location are
+# listed. The -n/--nearest argument sets how many parks are listed and the -r/--radius argument only lists parks within
+# that many kilometers. Setting only the -r/--radius argument lists every park within the radius.
+#
+# Example: [python nearby.py 536 -n 10]
+# Example: [python nearby.py 37.1,-122.3 -r 50]
+#
+# The -b/--bbox argument lists the parks within a "south,west,north,east" bounding box instead.
+#
+# Example: [python nearby.py -b 36.5,-122.5,38,-121]
+#
+# The -u/--unvisited argument only lists parks that haven't been visited. The -c/--coords argument searches the park
+# coordinates in coords.json instead of parks.json, which also covers parks left out of parks.json.
+#
+# The spatial index itself lives in stateparks/geo.py. This script is a command line entry point around it.
+
+import argparse  # Used to process command line arguments.
+import re  # Used to validate coordinates.
+import sys  # Used to exit script on errors.
+from stateparks import dataset  # Used for loading parks.json and coords.json files.
+from stateparks import geo  # Used to index and query park coordinates.
+from stateparks import prompts  # Used to get the coordinates regex.
+
+# Running file from command line.
+if __name__ == "__main__":
+    # Start script execution.
+    print("Running nearby.py")
+
+    # Processing command line arguments.
+    def positive_type_check(arg):
+        """Validates positive integer arguments."""
+        if not arg.isdigit() or int(arg) < 1:
+            raise argparse.ArgumentTypeError('the value "' + arg + '" needs to be a positive integer')
+        return int(arg)
+
+    def radius_type_check(arg):
+        """Validates radius argument."""
+        try:
+            radius = float(arg)
+        except ValueError:
+            radius = -1
+        if radius <= 0:
+            raise argparse.ArgumentTypeError('the radius "' + arg + '" needs to be a positive number of kilometers')
+        return radius
+
+    def bbox_type_check(arg):
+        """Validates bounding box argument."""
+        bounds = arg.replace(" ", "").split(",")
+        if len(bounds) != 4 or not all(
+            re.match(prompts.COORDS_RE, bounds[i] + "," + bounds[i + 1]) for i in range(0, 4, 2)
+        ):
+            raise argparse.ArgumentTypeError('the bounding box "' + arg + '" needs to be "south,west,north,east"')
+        return [float(bound) for bound in bounds]
+
+    parser = argparse.ArgumentParser(description="Script is used to list the parks near a location")
+    parser.add_argument("location", help='park code or "lat,lng" coordinates', nargs="?")
+    parser.add_argument(
+        "-n",
+        "--nearest",
+        help="number of nearest parks listed, defaults to 5",
+        type=positive_type_check,
+    )
+    parser.add_argument(
+        "-r",
+        "--radius",
+        help="only list parks within this many kilometers",
+        type=radius_type_check,
+    )
+    parser.add_argument(
+        "-b",
+        "--bbox",
+        help='list the parks within a "south,west,north,east" bounding box instead',
+        type=bbox_type_check,
+    )
+    parser.add_argument(
+        "-u",
+        "--unvisited",
+        help="only list parks that haven't been visited",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-c",
+        "--coords",
+        help="search the park coordinates in coords.json instead of parks.json",
+        action="store_true",
+    )
+    args = vars(parser.parse_args())
+    if (args["location"] is None) == (args["bbox"] is None):
+        parser.error("either a location or the -b/--bbox argument is required")
+
+    # Loading parks.json and coords.json files.
+    try:
+        print("Opening " + dataset.get_parks_name())
+        parks_json = dataset.load_parks()
+        coords_json = {park["code"]: park["coordinates"] for park in parks_json["parks"]}
+        if args["coords"]:
+            print("Opening coords.json")
+            coords_json = dataset.load_coords()
+    except dataset.DatasetError as e:
+        print(e)
+        print("Exiting")
+        sys.exit()
+    names = {park["code"]: park["name"] for park in parks_json["parks"]}
+    visited = {park["code"] for park in parks_json["parks"] if park["visited"]}
+
+    # Indexing the park coordinates.
+    points = geo.get_coords_points(coords_json)
+    if args["unvisited"]:
+        points = [point for point in points if point[0] not in visited]
+    index = geo.create_index(points)
+    print("Indexed " + str(len(points)) + " park(s) with coordinates")
+
+    # Listing the parks within the bounding box.
+    if args["bbox"] is not None:
+        codes = geo.query_bbox(index, *args["bbox"])
+        print("Found " + str(len(codes)) + " park(s) within the bounding box")
+        for code in codes:
+            print("... " + code + " " + names.get(code, ""))
+        print("Execution of nearby.py complete")
+        sys.exit()
+
+    # Finding the location. A park isn't listed as near itself.
+    location = geo.parse_coordinates(args["location"])
+    exclude = None
+    if location is None:
+        exclude = args["location"]
+        if args["location"] not in coords_json:
+            print('Location "' + args["location"] + '" is neither a park code nor "lat,lng" coordinates')
+            print("Exiting")
+            sys.exit()
+        location = geo.parse_coordinates(coords_json[args["location"]])
+        if location is None:
+            print("Park " + args["location"] + " doesn't have coordinates")
+            print("Exiting")
+            sys.exit()
+
+    # Listing the parks nearest to the location.
+    if args["radius"] is not None and args["nearest"] is None:
+        found = geo.query_radius(index, location[0], location[1], args["radius"])
+        found = [(code, distance) for code, distance in found if code != exclude]
+    else:
+        found = geo.query_nearest(index, location[0], location[1], args["nearest"] or 5, args["radius"], exclude)
+    print("Found " + str(len(found)) + " park(s) near " + ",".join(str(value) for value in location))
+    for code, distance in found:
+        print(f"... {distance:.1f} km {code} {names.get(code, '')}")
+    print("Execution of nearby.py complete")
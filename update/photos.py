@@ -10,74 +10,67 @@
 # the direct image link from the Google Photos shared album page's html and add it to the parks.json file under the
 # appropriate park photo "photo" property. Note that this script will rely on Google Photos url and html structure
 # staying consistent.This may have changed since this script was last run.
+#
+# The link gathering itself lives in stateparks/photos.py. This script is a command line entry point around it. Links
+# are gathered concurrently with the number of requests in flight set by the -c/--concurrency argument and the number of
+# requests per minute set by the -r/--rate argument. Every gathered link is written to the parks journal right away and
+# parks.json is saved every hundred links, so running this script again after it was interrupted resumes with the links
+# still missing.
+#
+# Example: [python photos.py -c 4 -r 20]
 
-import json  # Used for loading and modifying parks.json file.
-import os.path  # Used to process parks.json file.
+import argparse  # Used to process command line arguments.
 import sys  # Used to exit script on errors.
-import time  # Used to delay script execution.
-import requests  # Used to get the Google Photos html files.
-from bs4 import BeautifulSoup  # Used to parse Google Photos html files.
+from stateparks import dataset  # Used for loading and modifying parks.json file.
+from stateparks import photos  # Used to gather direct image links.
 
-# pylint: disable=C0103
+# Running file from command line.
+if __name__ == "__main__":
+    # Start script execution.
+    print("Running photos.py")
 
-parks_json = {}  # California State Parks json.
-sleep_time = 60  # Sleep time between html get requests to avoid flagging script as a robot.
+    # Processing command line arguments.
+    def positive_type_check(arg):
+        """Validates positive integer arguments."""
+        if not arg.isdigit() or int(arg) < 1:
+            raise argparse.ArgumentTypeError('the value "' + arg + '" needs to be a positive integer')
+        return int(arg)
 
-def get_direct_link(url):
-    """Gets the direct image link from a Google Photos shared album link."""
+    parser = argparse.ArgumentParser(
+        description="Script is used to gather direct image links from Google Photos shared album links in parks.json"
+    )
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        help="maximum number of requests in flight, defaults to " + str(photos.CONCURRENCY),
+        type=positive_type_check,
+        default=photos.CONCURRENCY,
+    )
+    parser.add_argument(
+        "-r",
+        "--rate",
+        help="maximum number of requests per minute, defaults to " + str(photos.RATE),
+        type=positive_type_check,
+        default=photos.RATE,
+    )
+    args = vars(parser.parse_args())
+
+    # Loading parks.json file.
     try:
-        req = requests.get(url, timeout=15)
-    except requests.exceptions.Timeout:
-        print("Request Timeout. Exiting")
+        print("Opening " + dataset.get_parks_name())
+        parks_json = dataset.load_parks()
+    except dataset.DatasetError as e:
+        print(e)
+        print("Exiting")
         sys.exit()
-    soup = BeautifulSoup(req.content, "html.parser")
-    link = soup.find("meta", property="og:image")["content"].split("=")[0]
-    return link
 
-def create_photo_links():
-    """Updating parks.json photo links from Google Photos shared album links in parks.json."""
-    print("Creating direct image links from Google Photos shared album links")
-    print("Sleep time in between requests set to " + str(sleep_time) + " seconds")
-    for park in parks_json["parks"]:
-        for photo_type in ["sign", "landscape1", "landscape2", "landscape3"]:
-            encrypt = park["photos"][photo_type]["encrypt"]
-            guest = park["photos"][photo_type]["guest"]
-            if encrypt["share"] != "" and encrypt["photo"] == "":
-                photo_link = get_direct_link(encrypt["share"])
-                encrypt["photo"] = photo_link
-                print("Gathered " + park["name"] + " " + photo_type + " encrypt direct link")
-                time.sleep(sleep_time)  # Sleep to avoid Google Photos flagging script as a robot.
-            if guest["share"] != "" and guest["photo"] == "":
-                photo_link = get_direct_link(guest["share"])
-                guest["photo"] = photo_link
-                print("Gathered " + park["name"] + " " + photo_type + " guest direct link")
-                time.sleep(sleep_time)  # Sleep to avoid Google Photos flagging script as a robot.
-    # Outputting results to parks.json
-    print("Outputting parks.json")
-    json_output = json.dumps(parks_json, indent=2)
-    with open("./assets/parks.json", "w", encoding="utf-8") as outfile:
-        outfile.write(json_output)
+    # Creating direct image links from Google Photos shared albums and outputting them to parks.json as they come in.
+    try:
+        failed = photos.create_photo_links(parks_json, args["concurrency"], args["rate"], save=True)
+    except KeyboardInterrupt:
+        print("Interrupted. Links gathered so far are saved in " + dataset.get_parks_name())
+        print("Exiting")
+        sys.exit()
+    if failed:
+        print("Run photos.py again to retry the " + str(len(failed)) + " failed link(s)")
     print("Execution of photos.py complete")
-
-# Start script execution.
-print("Running photos.py")
-
-# Loading parks.json file.
-if os.path.isfile("./assets/parks.json"):
-    print("Opening parks.json")
-    with open("./assets/parks.json", encoding="utf-8") as parks_json_file:
-        try:
-            parks_json = json.load(parks_json_file)
-            parks_json_file.close()
-        except ValueError as e:
-            print("Invalid parks.json file: " + str(e))
-            print("Exiting")
-            parks_json_file.close()
-            sys.exit()
-else:
-    print("File parks.json doesn't exist")
-    print("Exiting")
-    sys.exit()
-
-# Creating direct image links from Google Photos shared albums and adding them to parks.json file.
-create_photo_links()
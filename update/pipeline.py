@@ -0,0 +1,137 @@
+"""pipeline.py runs the whole website update in a single process."""
+
+# This script is used to run the update scripts one after another in a single process. The parks data is scraped from
+# the official California State Parks website, the svg images are synced, the direct image links are gathered from
+# Google Photos and the html files are built. Running everything in one process loads the dataset files once and reuses
+# the HTTP session, the text measurements and the jinja environment instead of starting a new interpreter per script.
+#
+# Gathering Google Photos links is paced to avoid flagging requests as a robot so it is skipped unless the -p/--photos
+# argument is set. The -n/--no-scrape argument skips scraping to rebuild the svg images and html files from the current
+# parks.json file. The -b/--batch argument scrapes without prompting like scrape.py -b, using assets/decisions.json and
+# assets/report.json.
+#
+# Example: [python pipeline.py -b -s]
+
+import argparse  # Used to process command line arguments.
+import os  # Used to process files.
+import sys  # Used to exit script on errors.
+from stateparks import batch  # Used to answer park changes from a decisions file.
+from stateparks import dataset  # Used for creating, loading, and modifying json files.
+from stateparks import pages  # Used to build html files.
+from stateparks import paths  # Used to locate the json files.
+from stateparks import photos  # Used to gather direct image links.
+from stateparks import prompts  # Used to prompt the user.
+from stateparks import scrape  # Used to scrape the California State Parks website.
+from stateparks import sign  # Used to generate state parks svg files.
+
+# Running file from command line. Guarded so svg worker processes can safely import this module.
+if __name__ == "__main__":
+    # Start script execution.
+    print("Running pipeline.py")
+
+    # Processing command line arguments.
+    def jobs_type_check(arg):
+        """Validates jobs argument."""
+        if not arg.isdigit() or int(arg) < 1:
+            raise argparse.ArgumentTypeError('the jobs value "' + arg + '" needs to be a positive integer')
+        return int(arg)
+
+    parser = argparse.ArgumentParser(description="Script is used to run the whole website update in a single process")
+    parser.add_argument(
+        "-n",
+        "--no-scrape",
+        help="skip scraping the California State Parks website",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-b",
+        "--batch",
+        help="answer park changes from the decisions file and report pending changes instead of prompting",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-p",
+        "--photos",
+        help="gather direct image links from Google Photos shared album links",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-s",
+        "--sprite",
+        help="combine park overlay svg images into a single svg sprite referenced by the html files",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="number of worker processes used to render svg images, defaults to rendering in this process",
+        type=jobs_type_check,
+        default=1,
+    )
+    args = vars(parser.parse_args())
+
+    try:
+        # Loading parks.json and passphrase.txt files.
+        parks_json = dataset.new_parks_json()  # California State Parks json.
+        if dataset.has_parks() or args["no_scrape"]:
+            print("Opening " + dataset.get_parks_name())
+            parks_json = dataset.load_parks()
+        else:
+            print("File parks.json doesn't exist. Will create new parks.json")
+        print("Opening passphrase.txt")
+        passphrase = dataset.load_passphrase()
+
+        # Scraping California State Parks website.
+        if not args["no_scrape"]:
+            coords_json = {}  # California State Parks coordinates.
+            coords = True  # Flag sets whether or not to have user enter coords.
+            if dataset.has_coords():
+                print("Opening coords.json")
+                coords_json = dataset.load_coords()
+            else:
+                print("File coords.json doesn't exist")
+                if not args["batch"]:
+                    coords = prompts.ask_enter_coords()
+            overrides_json = None  # Abbreviations for park names and park type overrides.
+            if os.path.isfile(paths.OVERRIDES_JSON):
+                print("Opening overrides.json")
+                overrides_json = dataset.load_overrides()
+            print("Pulling state parks data from: " + scrape.PARKS_URL)
+            new_parks_data = scrape.scrape_parks(overrides_json)
+            if args["batch"]:
+                decisions = {}  # Reviewed park change decisions by key.
+                if os.path.isfile(paths.DECISIONS_JSON):
+                    print("Opening decisions.json")
+                    decisions = batch.load_decisions(paths.DECISIONS_JSON)
+                callbacks = batch.create_batch_callbacks(decisions, coords_json)
+                diff = scrape.update_parks(parks_json, new_parks_data, callbacks["confirm"], callbacks["get_coords"])
+                batch.add_missing_coords(parks_json, callbacks["get_coords"])
+                print("Outputting report.json with " + str(len(callbacks["pending"])) + " pending decision(s)")
+                batch.save_report(paths.REPORT_JSON, diff, callbacks["pending"])
+            else:
+                scrape.update_parks(
+                    parks_json,
+                    new_parks_data,
+                    prompts.confirm_change,
+                    prompts.create_coords_prompt(coords_json, coords),
+                )
+            dataset.compact_coords(coords_json)
+
+        # Creating svg images for new and changed parks and removing svg images for removed parks.
+        sign.print_svg_errors(sign.sync_parks_svgs(parks_json["parks"], args["jobs"]))
+
+        # Creating direct image links from Google Photos shared albums.
+        if args["photos"]:
+            photos.create_photo_links(parks_json, save=True)
+
+        # Outputting results to parks.json.
+        print("Outputting parks.json")
+        dataset.save_parks(parks_json)
+
+        # Building main.html, guest.html, and index.html.
+        pages.build_pages(parks_json, passphrase, args["sprite"], snapshot=True)
+    except (dataset.DatasetError, scrape.ScrapeError) as e:
+        print(e)
+        print("Exiting")
+        sys.exit()
+    print("Execution of pipeline.py complete")
@@ -0,0 +1,124 @@
+"""route.py plans a trip through unvisited parks and outputs it to route.json."""
+
+# This script is used to plan the order to visit unvisited parks in from a starting point. The start is either a park
+# code or coordinates in the same "lat,lng" format as parks.json. The route is limited to the number of parks set by the
+# -n/--parks argument, the number of kilometers set by the -k/--km argument, or both. Without either argument the route
+# visits 10 parks. Routes end at the last park unless the -t/--round-trip argument is set.
+#
+# Example: [python route.py 536 -n 8]
+# Example: [python route.py 37.1,-122.3 -k 400 -t]
+#
+# The route is output to route.json in the assets directory, or the file set by the -o/--output argument. Running
+# build.py with the -r/--route argument adds the route from route.json to the html files.
+#
+# Distances are great circle distances between park coordinates rather than driving distances. Planning routes needs
+# the numpy package. The route planning itself lives in stateparks/route.py. This script is a command line entry point
+# around it.
+
+import argparse  # Used to process command line arguments.
+import sys  # Used to exit script on errors.
+from stateparks import dataset  # Used for loading parks.json and outputting route.json files.
+from stateparks import geo  # Used to parse coordinates.
+from stateparks import paths  # Used to locate route.json.
+from stateparks import route  # Used to plan routes.
+
+# Running file from command line.
+if __name__ == "__main__":
+    # Start script execution.
+    print("Running route.py")
+
+    # Processing command line arguments.
+    def positive_type_check(arg):
+        """Validates positive integer arguments."""
+        if not arg.isdigit() or int(arg) < 1:
+            raise argparse.ArgumentTypeError('the value "' + arg + '" needs to be a positive integer')
+        return int(arg)
+
+    def km_type_check(arg):
+        """Validates kilometers argument."""
+        try:
+            km = float(arg)
+        except ValueError:
+            km = -1
+        if km <= 0:
+            raise argparse.ArgumentTypeError('the distance "' + arg + '" needs to be a positive number of kilometers')
+        return km
+
+    parser = argparse.ArgumentParser(description="Script is used to plan a route through unvisited parks")
+    parser.add_argument("start", help='park code or "lat,lng" coordinates the route starts at')
+    parser.add_argument(
+        "-n",
+        "--parks",
+        help="maximum number of parks visited, defaults to 10 without the -k/--km argument",
+        type=positive_type_check,
+    )
+    parser.add_argument(
+        "-k",
+        "--km",
+        help="maximum number of kilometers traveled",
+        type=km_type_check,
+    )
+    parser.add_argument(
+        "-t",
+        "--round-trip",
+        help="return to the start after the last park",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="route file path, defaults to assets/route.json",
+        default=paths.ROUTE_JSON,
+    )
+    args = vars(parser.parse_args())
+    if args["parks"] is None and args["km"] is None:
+        args["parks"] = 10
+
+    # Loading parks.json file.
+    try:
+        print("Opening " + dataset.get_parks_name())
+        parks_json = dataset.load_parks()
+    except dataset.DatasetError as e:
+        print(e)
+        print("Exiting")
+        sys.exit()
+
+    # Finding the start. The park the route starts at isn't part of the route.
+    start = geo.parse_coordinates(args["start"])
+    start_code = None
+    if start is None:
+        start_code = args["start"]
+        start_parks = [park for park in parks_json["parks"] if park["code"] == start_code]
+        if not start_parks:
+            print('Start "' + start_code + '" is neither a park code nor "lat,lng" coordinates')
+            print("Exiting")
+            sys.exit()
+        start = geo.parse_coordinates(start_parks[0]["coordinates"])
+        if start is None:
+            print("Park " + start_code + " doesn't have coordinates")
+            print("Exiting")
+            sys.exit()
+
+    # Planning the route.
+    print("Planning a route from " + args["start"])
+    try:
+        route_json = route.plan_route(
+            parks_json["parks"], start, args["parks"], args["km"], args["round_trip"], start_code
+        )
+    except route.RouteError as e:
+        print(e)
+        print("Exiting")
+        sys.exit()
+    if start_code is not None:
+        route_json["start_name"] = start_parks[0]["name"]
+    for stop in route_json["stops"]:
+        print(f"... {stop['total']:.1f} km {stop['code']} {stop['name']}")
+    print(
+        "Planned a route through " + str(len(route_json["stops"])) + " park(s) of "
+        + str(route_json["distance"]) + " km"
+    )
+
+    # Outputting results to route.json.
+    print("Outputting " + paths.display(args["output"]))
+    dataset.save_route(route_json, args["output"])
+    print("Execution of route.py complete")
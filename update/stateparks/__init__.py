@@ -0,0 +1,23 @@
+"""stateparks is the library behind the update scripts used to maintain the California State Parks website."""
+
+# The update scripts (scrape.py, sign.py, photos.py, build.py, and pipeline.py) are thin command line entry points
+# around the modules in this package. Every module can be imported without side effects so the whole update pipeline can
+# run in a single process, reusing the http session, Cairo font face, and jinja environment between stages.
+#
+# paths.py    Locates the asset, template, image, and html files.
+# dataset.py  Loads and saves parks.json, coords.json, overrides.json, and passphrase.txt.
+# store.py    Stores the parks in a SQLite database as an alternative to parks.json.
+# journal.py  Journals single dataset changes so interrupted runs can resume.
+# scrape.py   Scrapes the California State Parks website and merges the results into parks.json.
+# sign.py     Renders park sign and overlay svg images (with layout.py, svgmin.py, and sprite.py).
+# photos.py   Gathers direct image links from Google Photos shared album links.
+# mirror.py   Mirrors park photos locally as thumbnails with placeholders.
+# geo.py      Indexes park coordinates for nearest park, radius, and bounding box queries.
+# route.py    Plans routes through unvisited parks.
+# pages.py    Renders the html files from jinja templates.
+# encrypt.py  Encrypts main.html for index.html.
+# watch.py    Rebuilds the html files as their inputs change and serves the website.
+# fetch.py    Caches http requests made through one shared http session.
+# extract.py  Extracts park links and image links from html files.
+# prompts.py  Prompts the user to accept park changes and enter coordinates.
+# batch.py    Answers the scrape prompts from a reviewed decisions file.
@@ -0,0 +1,100 @@
+"""batch.py answers scrape prompts from a reviewed decisions file instead of prompting the user."""
+
+# Running scrape.py in batch mode never prompts. Every rename, recode, removal, and missing coordinate is looked up in a
+# decisions file. Changes without a decision are left as they are and written to a change report. The change report
+# uses the same format as the decisions file, so after setting "accept" (and "value" for coordinates) on the pending
+# entries it can be used as the next decisions file.
+#
+# {
+#   "decisions": [
+#     {"kind": "rename", "code": "536", "name": "Butano State Park", "value": "Butano SP", "accept": true},
+#     {"kind": "remove", "code": "123", "name": "Old State Beach", "accept": false},
+#     {"kind": "coords", "code": "1234", "name": "New State Park", "value": "37.1,-122.3", "accept": true}
+#   ]
+# }
+#
+# Coordinates are looked up for every park missing them, not only for new parks, so a reviewed coordinate is applied on
+# the next run. A decision only applies to the exact change it was made for. If the park listing changes again before
+# the decisions file is applied, the change is reported again.
+
+import re  # Used to match regex patterns.
+from stateparks import dataset  # Used to load and save the decisions and report files.
+from stateparks import prompts  # Used to validate coordinates.
+
+DECISION_KINDS = ["rename", "recode", "remove", "coords"]  # Kinds of changes that need a decision.
+
+def get_decision_key(kind, change):
+    """Getting the key used to match a change with its decision."""
+    value = "" if kind in ["remove", "coords"] else change.get("value", "")
+    return (kind, change["code"], change["name"], value)
+
+def load_decisions(path):
+    """Loading a decisions file into a dict of decisions by key. Raises DatasetError if the file is invalid."""
+    decisions = {}
+    for decision in dataset.load_json(path).get("decisions", []):
+        if decision.get("kind") not in DECISION_KINDS or decision.get("accept") is None:
+            continue
+        decisions[get_decision_key(decision["kind"], decision)] = decision
+    return decisions
+
+def create_batch_callbacks(decisions, coords_json):
+    """Creating scrape callbacks that answer from the decisions instead of prompting the user.
+
+    Returns a dict with the "confirm" and "get_coords" callbacks used by scrape.update_parks and the "pending" list of
+    changes without a decision.
+    """
+    pending = []
+    pending_keys = set()
+
+    def add_pending(kind, change):
+        """Adding a change without a decision to the change report once."""
+        key = get_decision_key(kind, change)
+        if key not in pending_keys:
+            pending_keys.add(key)
+            pending.append(dict({"kind": kind}, **change, accept=None))
+
+    def confirm(kind, message, change):
+        """Accepts a park change if the decisions file accepts it."""
+        decision = decisions.get(get_decision_key(kind, change))
+        if decision is None:
+            print("Pending decision: " + message)
+            add_pending(kind, change)
+            return False
+        return bool(decision["accept"])
+
+    def get_coords(code, name):
+        """Getting park coordinates from coords.json or the decisions file."""
+        if code in coords_json:
+            return coords_json[code]
+        decision = decisions.get(get_decision_key("coords", {"code": code, "name": name}))
+        if decision is None:
+            print("Pending decision: " + name + " (" + code + ") is missing coordinates")
+            add_pending("coords", {"code": code, "name": name, "value": ""})
+            return ""
+        if not decision["accept"]:
+            return ""
+        if not re.match(prompts.COORDS_RE, decision.get("value", "")):
+            print("Invalid coordinates in decisions file for the park " + name + " (" + code + ")")
+            add_pending("coords", {"code": code, "name": name, "value": ""})
+            return ""
+        print("Updating coords.json with new coordinates for the park " + name + " (" + code + ")")
+        dataset.add_coords(coords_json, code, decision["value"])
+        return decision["value"]
+
+    return {"confirm": confirm, "get_coords": get_coords, "pending": pending}
+
+def add_missing_coords(parks_json, get_coords):
+    """Adding coordinates to parks.json parks that are still missing them."""
+    for park in parks_json["parks"]:
+        if park["coordinates"] == "":
+            park["coordinates"] = get_coords(park["code"], park["name"])
+
+def save_report(path, diff, pending):
+    """Outputting the change report with a summary of the parks diff and the changes waiting for a decision."""
+    dataset.save_json(
+        {
+            "summary": {kind: len(parks) for kind, parks in diff.items()},
+            "decisions": pending,
+        },
+        path,
+    )
@@ -0,0 +1,245 @@
+"""dataset.py loads and saves the json and text files used by the update scripts."""
+
+# The parks are stored in parks.json by default. Setting the STATEPARKS_DATASET environment variable to sqlite stores
+# them in parks.db instead (see store.py), which only writes the parks that changed on every save. Either way the
+# scripts load and save the parks as a parks.json dict.
+#
+# Single changes made during long runs, such as gathered photo links and entered coordinates, are appended to a journal
+# instead of saving the whole file (see journal.py). Single park changes made with the sqlite dataset update the
+# park's rows in parks.db right away instead, since that only writes the changed row. Json files are saved to a
+# temporary file that then replaces the original, so an interrupted save never leaves a half written file behind.
+
+import json  # Used for loading and saving json files.
+import os  # Used to process files.
+from stateparks import journal  # Used to journal single park and coordinate changes.
+from stateparks import paths  # Used to locate the dataset files.
+from stateparks import store  # Used to load and save parks in parks.db.
+
+DATASET_BACKEND = os.environ.get("STATEPARKS_DATASET", "json")  # Parks storage, json or sqlite.
+
+PHOTO_TYPES = ["sign", "landscape1", "landscape2", "landscape3"]  # Park photo types in parks.json.
+PARKS_TYPES = [  # California State Parks types of parks.
+    "State Park",
+    "State Historic Park",
+    "State Beach",
+    "State Recreation Area",
+    "State Natural Reserve",
+    "State Vehicular Recreation Area",
+]
+OTHER_PARK_TYPE = "Other"  # Type of parks not matching any of the California State Parks types.
+
+class DatasetError(Exception):
+    """Raised when a dataset file is missing or invalid."""
+
+def load_json(path):
+    """Loading a json file. Raises DatasetError if the file is missing or invalid."""
+    name = os.path.basename(path)
+    if not os.path.isfile(path):
+        raise DatasetError("File " + name + " doesn't exist")
+    with open(path, encoding="utf-8") as json_file:
+        try:
+            return json.load(json_file)
+        except ValueError as e:
+            raise DatasetError("Invalid " + name + " file: " + str(e)) from e
+
+def save_json(data, path):
+    """Outputting a json file, replacing the previous file only once the new one is completely written."""
+    json_output = json.dumps(data, indent=2)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as outfile:
+        outfile.write(json_output)
+        outfile.flush()
+        os.fsync(outfile.fileno())
+    os.replace(temp_path, path)
+
+def new_parks_json():
+    """Creating an empty parks.json."""
+    return {"firstname": "", "lastname": "", "parks": []}
+
+def use_store():
+    """Checking if parks are stored in parks.db. Raises DatasetError if the backend is unknown."""
+    if DATASET_BACKEND not in ["json", "sqlite"]:
+        raise DatasetError('Unknown STATEPARKS_DATASET "' + DATASET_BACKEND + '". Valid datasets: json, sqlite')
+    return DATASET_BACKEND == "sqlite"
+
+def get_parks_path():
+    """Getting the path of the file the parks are stored in."""
+    return paths.PARKS_DB if DATASET_BACKEND == "sqlite" else paths.PARKS_JSON
+
+def get_parks_name():
+    """Getting the name of the file the parks are stored in."""
+    return os.path.basename(get_parks_path())
+
+def has_parks():
+    """Checking if the parks have been stored yet."""
+    return os.path.isfile(get_parks_path())
+
+def replay_journal(path, apply):
+    """Applying the journal entries left by an interrupted run to a loaded dataset."""
+    entries = journal.read_entries(path)
+    for entry in entries:
+        apply(entry)
+    if entries:
+        print("... replayed " + str(len(entries)) + " change(s) from " + os.path.basename(path))
+
+def set_value(park, keys, value):
+    """Setting a value of a park entry by the keys leading to it."""
+    for key in keys[:-1]:
+        park = park[key]
+    park[keys[-1]] = value
+
+def load_parks(path=None):
+    """Loading parks.json file, or parks.db when using the sqlite dataset, with the journaled changes applied."""
+    if path is not None:
+        return load_json(path)
+    if use_store():
+        if not os.path.isfile(paths.PARKS_DB):
+            raise DatasetError("File parks.db doesn't exist. Run [python -m stateparks.store import] to create it")
+        connection = store.open_store(paths.PARKS_DB)
+        try:
+            parks_json = store.load_parks_json(connection)
+        finally:
+            connection.close()
+    else:
+        parks_json = load_json(paths.PARKS_JSON)
+    parks = {park["code"]: park for park in parks_json["parks"]}
+
+    def apply(entry):
+        """Applying a parks journal entry. Entries of parks no longer in the dataset are skipped."""
+        if entry["code"] in parks:
+            set_value(parks[entry["code"]], entry["keys"], entry["value"])
+
+    replay_journal(paths.PARKS_JOURNAL, apply)
+    return parks_json
+
+def save_parks(parks_json, path=None):
+    """Outputting parks.json file, or the changed parks to parks.db when using the sqlite dataset.
+
+    The parks journal is removed once its changes are saved.
+    """
+    if path is not None:
+        save_json(parks_json, path)
+        return
+    if use_store():
+        connection = store.open_store(paths.PARKS_DB)
+        try:
+            store.save_parks_json(connection, parks_json)
+        finally:
+            connection.close()
+    else:
+        save_json(parks_json, paths.PARKS_JSON)
+    journal.remove(paths.PARKS_JOURNAL)
+
+def update_stored_park(code, keys, value):
+    """Updating a single park field or photo link in parks.db by the parks.json keys leading to it."""
+    connection = store.open_store(paths.PARKS_DB)
+    try:
+        if keys[0] == "photos":
+            _, photo_type, variant, link = keys
+            store.update_photo(connection, code, photo_type, variant, **{link: value})
+        else:
+            store.update_park(connection, code, {keys[0]: value})
+    finally:
+        connection.close()
+
+def set_park_value(parks_json, park, keys, value):
+    """Setting a value of a park in parks.json by the keys leading to it, journaling the change.
+
+    The parks are saved every journal.COMPACT_ENTRIES changes. With the sqlite dataset the change is written to parks.db
+    right away instead.
+    """
+    set_value(park, keys, value)
+    if use_store():
+        update_stored_park(park["code"], keys, value)
+        return
+    if journal.append_entry(paths.PARKS_JOURNAL, {"code": park["code"], "keys": keys, "value": value}):
+        save_parks(parks_json)
+
+def has_coords():
+    """Checking if coords.json or coordinates journaled by an interrupted run exist."""
+    return os.path.isfile(paths.COORDS_JSON) or os.path.isfile(paths.COORDS_JOURNAL)
+
+def load_coords():
+    """Loading coords.json file with the journaled coordinates applied."""
+    if not os.path.isfile(paths.COORDS_JSON) and os.path.isfile(paths.COORDS_JOURNAL):
+        coords_json = {}  # Coordinates entered before coords.json was first saved.
+    else:
+        coords_json = load_json(paths.COORDS_JSON)
+
+    def apply(entry):
+        """Applying a coords journal entry."""
+        coords_json[entry["code"]] = entry["value"]
+
+    replay_journal(paths.COORDS_JOURNAL, apply)
+    return coords_json
+
+def save_coords(coords_json):
+    """Outputting coords.json file and removing the coordinates journal."""
+    save_json(coords_json, paths.COORDS_JSON)
+    journal.remove(paths.COORDS_JOURNAL)
+
+def add_coords(coords_json, code, coords):
+    """Adding park coordinates, journaling the change. coords.json is saved every journal.COMPACT_ENTRIES changes."""
+    coords_json[code] = coords
+    if journal.append_entry(paths.COORDS_JOURNAL, {"code": code, "value": coords}):
+        save_coords(coords_json)
+
+def compact_coords(coords_json):
+    """Saving coords.json if coordinates have been journaled since it was last saved."""
+    if os.path.isfile(paths.COORDS_JOURNAL):
+        save_coords(coords_json)
+
+def load_overrides(path=paths.OVERRIDES_JSON):
+    """Loading overrides.json file."""
+    return load_json(path)
+
+def load_route(path=paths.ROUTE_JSON):
+    """Loading route.json file."""
+    return load_json(path)
+
+def save_route(route_json, path=paths.ROUTE_JSON):
+    """Outputting route.json file."""
+    save_json(route_json, path)
+
+def has_mirror():
+    """Checking if mirror.json exists."""
+    return os.path.isfile(paths.MIRROR_JSON)
+
+def load_mirror(path=paths.MIRROR_JSON):
+    """Loading mirror.json file."""
+    return load_json(path)
+
+def save_mirror(mirror_json, path=paths.MIRROR_JSON):
+    """Outputting mirror.json file."""
+    save_json(mirror_json, path)
+
+def load_passphrase(path=paths.PASSPHRASE_TXT):
+    """Loading the passphrase in the first line of passphrase.txt file."""
+    if not os.path.isfile(path):
+        raise DatasetError("File " + os.path.basename(path) + " doesn't exist")
+    with open(path, encoding="utf-8") as passphrase_txt_file:
+        return passphrase_txt_file.readline().rstrip()
+
+def new_park_entry(park_code, park_name, park_type, coordinates=""):
+    """Creating a new park entry."""
+    return {
+        "code": park_code,
+        "name": park_name,
+        "type": park_type,
+        "coordinates": coordinates,
+        "visited": False,
+        "overlay": False,
+        "photos": {
+            photo_type: {
+                "encrypt": {
+                    "share": "",
+                    "photo": "",
+                },
+                "guest": {
+                    "share": "",
+                    "photo": "",
+                },
+            }
+            for photo_type in PHOTO_TYPES
+        },
+    }
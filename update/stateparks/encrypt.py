@@ -0,0 +1,122 @@
+"""encrypt.py encrypts main.html for the index.html login page."""
+
+# Adapted from PageCrypt (https://github.com/MaxLaumeister/pagecrypt). The html is gzip compressed and split into
+# CHUNK_SIZE chunks that are each encrypted with AES-GCM using a key derived from the passphrase with PBKDF2-SHA256.
+# Every chunk has its own nonce and is authenticated with its index and whether it is the last chunk as additional data,
+# so chunks can't be reordered or dropped. The payload is a javascript object with the base64 encoded salt and chunks
+# (nonce, ciphertext, and tag). The login page decrypts the chunks in order and streams them through the browser's
+# DecompressionStream so main.html starts rendering before the whole payload has been decrypted.
+#
+# Deriving the key takes ITERATIONS rounds of PBKDF2, so derived keys are cached by passphrase, salt, and iterations in
+# a keystore outside the repository (see paths.KEYSTORE_DIR). The last encrypted payload is cached there as well along
+# with a digest of the html it was made from. When main.html and the key haven't changed the cached payload is reused,
+# so index.html stays byte-for-byte the same between builds. The keystore directory holds key material and is only
+# readable by the current user.
+
+import hashlib  # Used to identify keys and digest html files.
+import json  # Used for loading and saving the keystore and cached payload.
+import os  # Used to process keystore files.
+import zlib  # Used to compress the html file in parts.
+from base64 import b64encode  # Used to encode the encrypted html file.
+from Crypto import Random  # Used to encrypt html file.
+from Crypto.Cipher import AES  # Used to encrypt html file.
+from Crypto.Hash import SHA256  # Used to encrypt html file.
+from Crypto.Protocol.KDF import PBKDF2  # Used to encrypt html file.
+from stateparks import paths  # Used to locate the keystore.
+
+ITERATIONS = 100000  # PBKDF2 iterations. Passed to index.html so the login page derives the same key.
+CHUNK_SIZE = 16 * 1024  # Compressed bytes per encrypted chunk.
+PAYLOAD_VERSION = 2  # Version of the payload format. Cached payloads in another format are encrypted again.
+
+def get_key_id(passphrase, salt, iterations):
+    """Getting the keystore id of a derived key."""
+    return hashlib.sha256(salt + str(iterations).encode("utf-8") + b":" + passphrase.encode("utf-8")).hexdigest()
+
+def load_keystore_file(name):
+    """Loading a json file from the keystore directory. Returns None if missing or invalid."""
+    try:
+        with open(os.path.join(paths.KEYSTORE_DIR, name), encoding="utf-8") as keystore_file:
+            return json.load(keystore_file)
+    except (OSError, ValueError):
+        return None
+
+def save_keystore_file(name, data):
+    """Outputting a json file to the keystore directory, only readable by the current user.
+
+    The file is written to a temporary file that then replaces the previous file, so an interrupted save never leaves a
+    half written keystore behind.
+    """
+    os.makedirs(paths.KEYSTORE_DIR, mode=0o700, exist_ok=True)
+    path = os.path.join(paths.KEYSTORE_DIR, name)
+    temp_path = path + ".tmp"
+    with open(os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w", encoding="utf-8") as keystore_file:
+        keystore_file.write(json.dumps(data))
+        keystore_file.flush()
+        os.fsync(keystore_file.fileno())
+    os.replace(temp_path, path)
+
+def derive_key(passphrase, salt, iterations):
+    """Deriving the AES key from the passphrase. Derived keys are cached in the keystore."""
+    keystore = load_keystore_file("keys.json") or {}
+    key_id = get_key_id(passphrase, salt, iterations)
+    if key_id in keystore:
+        return bytes.fromhex(keystore[key_id])
+    key = PBKDF2(passphrase.encode("utf-8"), salt, count=iterations, dkLen=32, hmac_hash_module=SHA256)
+    keystore[key_id] = key.hex()
+    save_keystore_file("keys.json", keystore)
+    return key
+
+def get_payload_name():
+    """Getting the cached payload file name. Each project directory has its own cached payload."""
+    return "payload-" + hashlib.sha256(paths.PROJECT_DIR.encode("utf-8")).hexdigest()[:16] + ".json"
+
+def get_chunk_data(index, last):
+    """Getting the additional data authenticated with a chunk."""
+    return index.to_bytes(4, "big") + (b"\x01" if last else b"\x00")
+
+def encrypt_payload(parts, key, salt):
+    """Compressing and encrypting html byte parts in chunks. Returns the encrypted payload as a javascript object."""
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 31)  # Gzip format, which the login page decompresses.
+    compressed = b"".join([compressor.compress(part) for part in parts] + [compressor.flush()])
+    chunks = []
+    count = max(1, -(-len(compressed) // CHUNK_SIZE))
+    for index in range(count):
+        nonce = Random.new().read(12)
+        cipher = AES.new(key, AES.MODE_GCM, nonce=nonce)
+        cipher.update(get_chunk_data(index, index == count - 1))
+        encrypted, tag = cipher.encrypt_and_digest(compressed[index * CHUNK_SIZE : (index + 1) * CHUNK_SIZE])
+        chunks.append(b64encode(nonce + encrypted + tag).decode("utf-8"))
+    return json.dumps({"salt": b64encode(salt).decode("utf-8"), "chunks": chunks})
+
+def encrypt_html(data, passphrase, iterations=ITERATIONS):
+    """Encrypting html bytes, whole or as a list of parts. Returns the encrypted payload as a javascript object literal.
+
+    The cached payload is returned when the html and key are unchanged since the last build.
+    """
+    parts = [data] if isinstance(data, bytes) else data
+    html_hash = hashlib.sha256()
+    for part in parts:
+        html_hash.update(part)
+    digest = html_hash.hexdigest()
+    cached = load_keystore_file(get_payload_name())
+    salt = None
+    if cached and cached.get("version") == PAYLOAD_VERSION and cached.get("iterations") == iterations:
+        salt = bytes.fromhex(cached["salt"])
+        if cached["key"] == get_key_id(passphrase, salt, iterations) and cached["digest"] == digest:
+            print("... main.html unchanged, reusing encrypted payload")
+            return cached["payload"]
+    if salt is None:
+        salt = Random.new().read(32)
+    payload = encrypt_payload(parts, derive_key(passphrase, salt, iterations), salt)
+    save_keystore_file(
+        get_payload_name(),
+        {
+            "version": PAYLOAD_VERSION,
+            "iterations": iterations,
+            "salt": salt.hex(),
+            "key": get_key_id(passphrase, salt, iterations),
+            "digest": digest,
+            "payload": payload,
+        },
+    )
+    return payload
@@ -0,0 +1,217 @@
+"""extract.py pulls the park links and image links out of html files."""
+
+# Only two things are ever read from an html file: the park links in the "results-area" lists of the California State
+# Parks html file and the "og:image" meta tag of a Google Photos html file. Building a full BeautifulSoup tree for that
+# is slow, so each extractor below has the same two functions and only looks at the elements it needs:
+#
+# stream  Python's html.parser fed the html file, only tracking the results-area lists and stopping at the first
+#         og:image meta tag. Has no dependencies.
+# lxml    lxml's pull parser fed the html file, stopping once the last results-area list is closed or at the first
+#         og:image meta tag, then xpath queries on the tree parsed so far. Fastest, but needs the lxml package.
+# bs4     The original BeautifulSoup parsing, kept as the reference the other extractors are checked against.
+#
+# The extractor is picked with the STATEPARKS_EXTRACTOR environment variable and defaults to lxml when it is installed
+# and stream otherwise. Running this module checks an extractor against bs4 and times it on an html file.
+#
+# Example: [python -m stateparks.extract -e stream ./assets/CaliforniaStateParksListing_9_25_2023.html]
+
+import argparse  # Used to process command line arguments.
+from html.parser import HTMLParser  # Used to stream html files.
+import os  # Used to read the extractor override.
+import time  # Used to time extractors.
+from bs4 import BeautifulSoup  # Used to parse html files with the reference extractor.
+
+try:
+    from lxml import etree as lxml_etree  # Used to stream html files with the lxml extractor.
+except ImportError:
+    lxml_etree = None
+
+RESULTS_CLASS = "results-area"  # Class of the lists containing park links.
+IMAGE_PROPERTY = "og:image"  # Property of the meta tag containing the image link.
+CHUNK_SIZE = 16 * 1024  # Characters fed to the stream extractor at a time.
+
+def decode_html(content):
+    """Decoding an html file. Falls back to windows-1252 like BeautifulSoup when it isn't utf-8."""
+    if isinstance(content, str):
+        return content
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
+        return content.decode("windows-1252", errors="replace")
+
+class ListingParser(HTMLParser):
+    """Streams the park links and their text out of the results-area lists."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.results_depth = 0  # Depth of nested lists inside a results-area list.
+        self.open_items = []  # List items inside a results-area list that haven't been closed.
+        self.items = []  # Park links found in document order.
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "ul":
+            if self.results_depth:
+                self.results_depth += 1
+            elif RESULTS_CLASS in (dict(attrs).get("class") or "").split():
+                self.results_depth = 1
+        elif self.results_depth and tag == "li":
+            item = {"link": False, "href": None, "text": []}
+            self.items.append(item)
+            self.open_items.append(item)
+        elif self.open_items and tag == "a":
+            attributes = dict(attrs)
+            for item in self.open_items:
+                if not item["link"]:
+                    item["link"] = True
+                    item["href"] = (attributes["href"] or "") if "href" in attributes else None
+
+    def handle_endtag(self, tag):
+        if not self.results_depth:
+            return
+        if tag == "ul":
+            self.results_depth -= 1
+            if not self.results_depth:
+                self.open_items = []
+        elif tag == "li" and self.open_items:
+            self.open_items.pop()
+
+    def handle_data(self, data):
+        for item in self.open_items:
+            item["text"].append(data)
+
+class ImageParser(HTMLParser):
+    """Streams the html file until the og:image meta tag is found."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.image = None  # Content of the og:image meta tag.
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "meta" and self.image is None:
+            attributes = dict(attrs)
+            if attributes.get("property") == IMAGE_PROPERTY:
+                self.image = attributes.get("content") or ""
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+def stream_listing(content):
+    """Getting the park links and text in the results-area lists with the stream extractor."""
+    parser = ListingParser()
+    parser.feed(decode_html(content))
+    parser.close()
+    return [(item["href"], "".join(item["text"])) for item in parser.items]
+
+def stream_image(content):
+    """Getting the og:image meta tag content with the stream extractor. Returns None if missing."""
+    parser = ImageParser()
+    text = decode_html(content)
+    for start in range(0, len(text), CHUNK_SIZE):
+        parser.feed(text[start : start + CHUNK_SIZE])
+        if parser.image is not None:
+            return parser.image
+    parser.close()
+    return parser.image
+
+def is_results_list(element):
+    """Checking if an element is a results-area list."""
+    return RESULTS_CLASS in (element.get("class") or "").split()
+
+def lxml_listing(content):
+    """Getting the park links and text in the results-area lists with the lxml extractor.
+
+    The html file is only parsed until the list holding the last mention of the results-area class is closed, since no
+    results-area list can start after it.
+    """
+    text = decode_html(content)
+    last = text.rfind(RESULTS_CLASS)
+    if last == -1:
+        return []
+    end = text.find(">", last)  # End of the start tag holding the last mention.
+    end = len(text) if end == -1 else end
+    parser = lxml_etree.HTMLPullParser(events=("start", "end"), tag="ul")
+    results_depth = 0
+    for start in range(0, len(text), CHUNK_SIZE):
+        parser.feed(text[start : start + CHUNK_SIZE])
+        for event, element in parser.read_events():
+            if results_depth or is_results_list(element):
+                results_depth += 1 if event == "start" else -1
+        if start + CHUNK_SIZE > end and not results_depth:
+            break
+    items = []
+    for results_list in parser.close().iter("ul"):
+        if is_results_list(results_list):
+            for list_item in results_list.iter("li"):
+                link = next(list_item.iter("a"), None)
+                items.append((link.get("href") if link is not None else None, "".join(list_item.itertext())))
+    return items
+
+def lxml_image(content):
+    """Getting the og:image meta tag content with the lxml extractor. Returns None if missing."""
+    parser = lxml_etree.HTMLPullParser(events=("start",), tag="meta")
+    text = decode_html(content)
+    for start in range(0, len(text) + 1, CHUNK_SIZE):
+        if start < len(text):
+            parser.feed(text[start : start + CHUNK_SIZE])
+        else:
+            parser.close()  # Flushing a meta tag left at the end of the html file.
+        for _, meta in parser.read_events():
+            if meta.get("property") == IMAGE_PROPERTY:
+                return meta.get("content") or ""
+    return None
+
+def bs4_listing(content):
+    """Getting the park links and text in the results-area lists with BeautifulSoup."""
+    soup = BeautifulSoup(content, "html.parser")
+    items = []
+    for results_list in soup.find_all("ul", {"class": RESULTS_CLASS}):
+        for list_item in results_list.find_all("li"):
+            link = list_item.find("a")
+            items.append((link.get("href") if link is not None else None, list_item.text))
+    return items
+
+def bs4_image(content):
+    """Getting the og:image meta tag content with BeautifulSoup. Returns None if missing."""
+    meta = BeautifulSoup(content, "html.parser").find("meta", property=IMAGE_PROPERTY)
+    return (meta.get("content") or "") if meta is not None else None
+
+EXTRACTORS = {  # Extractor functions by name.
+    "stream": {"listing": stream_listing, "image": stream_image},
+    "lxml": {"listing": lxml_listing, "image": lxml_image},
+    "bs4": {"listing": bs4_listing, "image": bs4_image},
+}
+
+def get_extractor(name=None):
+    """Getting the extractor functions by name. Defaults to STATEPARKS_EXTRACTOR, then lxml, then stream."""
+    name = name or os.environ.get("STATEPARKS_EXTRACTOR") or ("lxml" if lxml_etree is not None else "stream")
+    if name not in EXTRACTORS:
+        raise ValueError('Unknown extractor "' + name + '". Valid extractors: ' + ", ".join(EXTRACTORS))
+    if name == "lxml" and lxml_etree is None:
+        raise ValueError("The lxml extractor needs the lxml package")
+    return EXTRACTORS[name]
+
+def extract_listing(content, name=None):
+    """Getting the (href, text) of every list item in the results-area lists of the California State Parks html file."""
+    return get_extractor(name)["listing"](content)
+
+def extract_image(content, name=None):
+    """Getting the og:image meta tag content of a Google Photos html file. Returns None if missing."""
+    return get_extractor(name)["image"](content)
+
+# Running file from command line.
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Checks an extractor against bs4 and times it on an html file")
+    parser.add_argument("file", help="html file to extract from")
+    parser.add_argument("-e", "--extractor", help="extractor to check, defaults to the default extractor")
+    parser.add_argument("-n", "--repeat", help="number of times to extract, defaults to 20", type=int, default=20)
+    args = vars(parser.parse_args())
+    with open(args["file"], "rb") as html_file:
+        html_content = html_file.read()
+    extractor = get_extractor(args["extractor"])
+    for kind in ["listing", "image"]:
+        start_time = time.perf_counter()
+        for _ in range(args["repeat"]):
+            result = extractor[kind](html_content)
+        seconds = (time.perf_counter() - start_time) / args["repeat"]
+        parity = "ok" if result == EXTRACTORS["bs4"][kind](html_content) else "mismatch"
+        print(f"Extracted {kind} in {seconds * 1000:.2f}ms, parity with bs4 {parity}")
@@ -0,0 +1,155 @@
+"""fetch.py provides the cached http requests shared by the scraper and the photo link resolver."""
+
+# Responses are cached on disk in an http-cache directory outside the repository (~/.cache/stateparks by default, see
+# paths.CACHE_DIR), since the Google Photos pages hold the private photo links. Every cached url has a json file with
+# the url, the validator headers, and the time it was stored and a body file with the response content. A cached
+# response younger than the ttl passed in is used without making a request. Older cached responses are revalidated with
+# a conditional request using the ETag and Last-Modified headers, so an unchanged page costs a 304 response instead of
+# a full download. Only 200 responses are cached. Once the cache grows past MAX_CACHE_SIZE bytes the least recently
+# used entries are removed.
+#
+# Setting the STATEPARKS_OFFLINE environment variable to 1 replays every request from the cache without touching the
+# network, which is useful when developing against saved pages.
+
+import hashlib  # Used to name cache files after the url.
+import json  # Used for loading and saving cache metadata.
+import os  # Used to process cache files.
+import threading  # Used to guard the cache size between worker threads.
+import time  # Used to check cache ttls.
+import requests  # Used to make http requests.
+from requests.adapters import HTTPAdapter  # Used to size the connection pool.
+from requests.structures import CaseInsensitiveDict  # Used to look up cached headers.
+from stateparks import paths  # Used to locate the cache directory.
+
+# pylint: disable=C0103
+# pylint: disable=W0603
+
+POOL_SIZE = 16  # Connections kept open per host.
+MAX_CACHE_SIZE = 64 * 1024 * 1024  # Cache size in bytes before least recently used entries are removed.
+CACHED_HEADERS = ["Content-Type", "ETag", "Last-Modified"]  # Response headers stored in the cache.
+OFFLINE = os.environ.get("STATEPARKS_OFFLINE", "") == "1"  # Replays requests from the cache only.
+
+session = None  # Shared http session. Keeps connections open between requests.
+cache_directory = paths.HTTP_CACHE_DIR  # Directory containing cached responses.
+cache_size = None  # Size of the cache in bytes, counted on the first write.
+cache_lock = threading.Lock()  # Guards the cache size and eviction.
+
+class FetchError(Exception):
+    """Raised when a url isn't cached while offline."""
+
+def get_session():
+    """Getting the shared http session."""
+    global session
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+    return session
+
+def get_cache_paths(url):
+    """Getting the metadata and body file paths of a cached url."""
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return os.path.join(cache_directory, key + ".json"), os.path.join(cache_directory, key + ".body")
+
+def new_response(status, headers, content, cached):
+    """Creating a response dict."""
+    return {"status": status, "headers": CaseInsensitiveDict(headers), "content": content, "cached": cached}
+
+def load_cache_entry(url):
+    """Loading a cached url. Returns None if the url isn't cached."""
+    meta_path, body_path = get_cache_paths(url)
+    try:
+        with open(meta_path, encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+        with open(body_path, "rb") as body_file:
+            content = body_file.read()
+        os.utime(body_path)  # Marking the entry as recently used.
+    except (OSError, ValueError):
+        return None
+    if meta.get("url") != url:
+        return None
+    return {"meta": meta, "content": content}
+
+def get_directory_size():
+    """Getting the size of the cache directory in bytes."""
+    return sum(entry.stat().st_size for entry in os.scandir(cache_directory) if entry.is_file())
+
+def evict_cache_entries():
+    """Removing least recently used cache entries until the cache fits within MAX_CACHE_SIZE."""
+    global cache_size
+    entries = []
+    for entry in os.scandir(cache_directory):
+        if entry.name.endswith(".body"):
+            meta_path = entry.path[: -len(".body")] + ".json"
+            size = entry.stat().st_size + (os.path.getsize(meta_path) if os.path.isfile(meta_path) else 0)
+            entries.append((entry.stat().st_mtime, size, entry.path, meta_path))
+    for _, size, body_path, meta_path in sorted(entries):
+        if cache_size <= MAX_CACHE_SIZE:
+            break
+        for path in [body_path, meta_path]:
+            if os.path.isfile(path):
+                os.remove(path)
+        cache_size -= size
+
+def write_cache_file(path, data):
+    """Writing a cache file through a temporary file, so an interrupted write never leaves a partial file behind."""
+    with open(path + ".tmp", "wb") as cache_file:
+        cache_file.write(data)
+    os.replace(path + ".tmp", path)
+
+def save_cache_entry(url, headers, content):
+    """Storing a response in the cache."""
+    global cache_size
+    os.makedirs(cache_directory, mode=0o700, exist_ok=True)
+    meta_path, body_path = get_cache_paths(url)
+    meta = {
+        "url": url,
+        "headers": {name: headers[name] for name in CACHED_HEADERS if name in headers},
+        "stored": time.time(),
+    }
+    meta_json = json.dumps(meta)
+    with cache_lock:
+        if cache_size is None:
+            cache_size = get_directory_size()
+        for path in [meta_path, body_path]:
+            if os.path.isfile(path):
+                cache_size -= os.path.getsize(path)
+        # Writing the metadata last, since an entry is only loaded once its metadata matches the url.
+        write_cache_file(body_path, content)
+        write_cache_file(meta_path, meta_json.encode("utf-8"))
+        cache_size += len(content) + len(meta_json.encode("utf-8"))
+        if cache_size > MAX_CACHE_SIZE:
+            evict_cache_entries()
+
+def refresh_cache_entry(url, meta):
+    """Resetting the stored time of a cached url after it was revalidated."""
+    meta_path, _ = get_cache_paths(url)
+    meta["stored"] = time.time()
+    with cache_lock:
+        write_cache_file(meta_path, json.dumps(meta).encode("utf-8"))
+
+def get(url, ttl=0, timeout=15):
+    """Getting a url through the cache. Cached responses younger than ttl seconds are used without a request.
+
+    Returns a dict with the response "status", "headers", "content", and whether it was "cached".
+    """
+    entry = load_cache_entry(url)
+    if entry is not None and (OFFLINE or time.time() - entry["meta"]["stored"] < ttl):
+        return new_response(200, entry["meta"]["headers"], entry["content"], True)
+    if OFFLINE:
+        raise FetchError("Url " + url + " isn't cached. Unset STATEPARKS_OFFLINE to download it")
+    request_headers = {}
+    if entry is not None:
+        cached_headers = CaseInsensitiveDict(entry["meta"]["headers"])
+        if "ETag" in cached_headers:
+            request_headers["If-None-Match"] = cached_headers["ETag"]
+        if "Last-Modified" in cached_headers:
+            request_headers["If-Modified-Since"] = cached_headers["Last-Modified"]
+    req = get_session().get(url, headers=request_headers, timeout=timeout)
+    if req.status_code == 304 and entry is not None:
+        refresh_cache_entry(url, entry["meta"])
+        return new_response(200, entry["meta"]["headers"], entry["content"], True)
+    if req.status_code == 200:
+        save_cache_entry(url, req.headers, req.content)
+    return new_response(req.status_code, req.headers, req.content, False)
@@ -0,0 +1,186 @@
+"""geo.py indexes park coordinates for radius, nearest park, and bounding box queries."""
+
+# Park coordinates are stored as "lat,lng" strings in parks.json and coords.json. They are parsed once into packed
+# arrays of latitudes and longitudes in radians and indexed with a k-d tree. The tree isn't stored as nodes. The point
+# order is sorted so the median of every range splits it in two, alternating between latitude and longitude at every
+# level, which keeps the index to three flat arrays.
+#
+# Distances are great circle distances in kilometers computed with the haversine formula. While searching, a side of a
+# split is skipped when even the closest point it could hold is further than the search radius. For a latitude split
+# that's the latitude difference. For a longitude split it's the distance to the meridian of the split. Longitudes
+# aren't wrapped around the antimeridian, which no California park is near.
+#
+# Parks are indexed by park code. Parks without valid coordinates are left out of the index.
+
+import array  # Used to pack coordinates.
+import heapq  # Used to keep the nearest parks found.
+import math  # Used to compute distances.
+import re  # Used to validate coordinates.
+from stateparks import prompts  # Used to get the coordinates regex.
+
+EARTH_RADIUS = 6371.0088  # Mean earth radius in kilometers.
+
+def parse_coordinates(coordinates):
+    """Parsing a "lat,lng" coordinates string into degrees. Returns None if the coordinates are missing or invalid."""
+    if not re.match(prompts.COORDS_RE, coordinates.replace(" ", "")):
+        return None
+    lat, lng = coordinates.split(",")
+    return float(lat), float(lng)
+
+def get_park_points(parks):
+    """Getting the code, latitude, and longitude of parks.json parks with valid coordinates."""
+    return get_coords_points({park["code"]: park["coordinates"] for park in parks})
+
+def get_coords_points(coords_json):
+    """Getting the code, latitude, and longitude of coords.json parks with valid coordinates."""
+    points = []
+    for code, coordinates in coords_json.items():
+        parsed = parse_coordinates(coordinates)
+        if parsed is not None:
+            points.append((code, parsed[0], parsed[1]))
+    return points
+
+def get_angle(lat1, lng1, lat2, lng2):
+    """Getting the central angle between two points in radians using the haversine formula."""
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * math.asin(math.sqrt(min(1.0, h)))
+
+def get_distance(lat1, lng1, lat2, lng2):
+    """Getting the great circle distance between two points in degrees in kilometers."""
+    return get_angle(math.radians(lat1), math.radians(lng1), math.radians(lat2), math.radians(lng2)) * EARTH_RADIUS
+
+def create_index(points):
+    """Creating a k-d tree from code, latitude, and longitude points. Returns the index."""
+    index = {
+        "codes": [point[0] for point in points],
+        "lats": array.array("d", (math.radians(point[1]) for point in points)),
+        "lngs": array.array("d", (math.radians(point[2]) for point in points)),
+    }
+    index["cos_lats"] = array.array("d", (math.cos(lat) for lat in index["lats"]))
+    order = list(range(len(points)))
+
+    def sort_range(start, end, depth):
+        """Sorting a range of points by its split axis, then the ranges on each side of the median."""
+        if end - start < 2:
+            return
+        values = index["lats"] if depth % 2 == 0 else index["lngs"]
+        order[start:end] = sorted(order[start:end], key=values.__getitem__)
+        middle = (start + end) // 2
+        sort_range(start, middle, depth + 1)
+        sort_range(middle + 1, end, depth + 1)
+
+    sort_range(0, len(order), 0)
+    index["order"] = array.array("l", order)
+    return index
+
+def search(index, lat, lng, get_limit, found):
+    """Visiting the indexed points that may be closer than get_limit() radians to a point in radians, nearest first.
+
+    found(point, angle) is called with the position and central angle of every visited point.
+    """
+    lats = index["lats"]
+    lngs = index["lngs"]
+    cos_lats = index["cos_lats"]
+    order = index["order"]
+    cos_lat = math.cos(lat)
+    sin = math.sin
+
+    def visit(start, end, depth):
+        """Visiting the median of a range, then the ranges on each side of it."""
+        if start >= end:
+            return
+        middle = (start + end) // 2
+        point = order[middle]
+        # Haversine formula with the cosine of the point latitude looked up.
+        h = sin((lats[point] - lat) / 2) ** 2 + cos_lat * cos_lats[point] * sin((lngs[point] - lng) / 2) ** 2
+        found(point, 2 * math.asin(math.sqrt(min(1.0, h))))
+        if depth % 2 == 0:
+            delta = lat - lats[point]
+            bound = abs(delta)
+        else:
+            delta = lng - lngs[point]
+            bound = math.asin(min(1.0, cos_lat * math.sin(abs(delta)))) if abs(delta) < math.pi / 2 else 0.0
+        if delta < 0:
+            visit(start, middle, depth + 1)
+            if bound < get_limit():
+                visit(middle + 1, end, depth + 1)
+        else:
+            visit(middle + 1, end, depth + 1)
+            if bound < get_limit():
+                visit(start, middle, depth + 1)
+
+    visit(0, len(order), 0)
+
+def query_radius(index, lat, lng, radius):
+    """Getting the parks within radius kilometers of a point. Returns (code, kilometers) tuples nearest first."""
+    limit = radius / EARTH_RADIUS
+    search_limit = math.nextafter(limit, math.inf)  # Searching past the radius so parks right on it are found.
+    results = []
+
+    def found(point, angle):
+        """Keeping points within the radius."""
+        if angle <= limit:
+            results.append((angle, point))
+
+    search(index, math.radians(lat), math.radians(lng), lambda: search_limit, found)
+    return [(index["codes"][point], angle * EARTH_RADIUS) for angle, point in sorted(results)]
+
+def query_nearest(index, lat, lng, count, radius=None, exclude=None):
+    """Getting the count parks nearest to a point, optionally within radius kilometers and skipping a park code.
+
+    Returns (code, kilometers) tuples nearest first.
+    """
+    limit = math.nextafter(math.pi if radius is None else radius / EARTH_RADIUS, math.inf)
+    nearest = []  # Heap of the nearest points found with the furthest on top.
+
+    def get_limit():
+        """Getting the angle of the furthest point kept once count points are found. Only closer points are kept."""
+        return -nearest[0][0] if len(nearest) == count else limit
+
+    def found(point, angle):
+        """Keeping the count nearest points."""
+        if angle >= get_limit() or index["codes"][point] == exclude:
+            return
+        if len(nearest) == count:
+            heapq.heapreplace(nearest, (-angle, point))
+        else:
+            heapq.heappush(nearest, (-angle, point))
+
+    if count > 0:
+        search(index, math.radians(lat), math.radians(lng), get_limit, found)
+    return [(index["codes"][point], -angle * EARTH_RADIUS) for angle, point in sorted(nearest, reverse=True)]
+
+def query_bbox(index, south, west, north, east):
+    """Getting the codes of the parks within a bounding box in degrees."""
+    bounds = [(math.radians(south), math.radians(north)), (math.radians(west), math.radians(east))]
+    axes = [index["lats"], index["lngs"]]
+    order = index["order"]
+    codes = []
+
+    def visit(start, end, depth):
+        """Visiting the median of a range, then the ranges on each side of it overlapping the bounding box."""
+        if start >= end:
+            return
+        middle = (start + end) // 2
+        point = order[middle]
+        if all(low <= values[point] <= high for values, (low, high) in zip(axes, bounds)):
+            codes.append(index["codes"][point])
+        low, high = bounds[depth % 2]
+        value = axes[depth % 2][point]
+        if low <= value:
+            visit(start, middle, depth + 1)
+        if value <= high:
+            visit(middle + 1, end, depth + 1)
+
+    visit(0, len(order), 0)
+    return codes
+
+def get_nearby_unvisited(parks, count, radius):
+    """Getting the count nearest unvisited parks within radius kilometers of every park with coordinates.
+
+    Returns lists of (code, kilometers) tuples by park code.
+    """
+    points = get_park_points(parks)
+    visited = {park["code"] for park in parks if park["visited"]}
+    index = create_index([point for point in points if point[0] not in visited])
+    return {code: query_nearest(index, lat, lng, count, radius, code) for code, lat, lng in points}
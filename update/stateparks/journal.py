@@ -0,0 +1,53 @@
+"""journal.py appends dataset changes to a journal file so they survive an interrupted run."""
+
+# Rewriting parks.json or coords.json after every gathered photo link or entered coordinate gets slow as the files grow,
+# and a run interrupted between rewrites loses every change since the last one. Instead each change is appended to a
+# journal file next to the dataset file as a single line of json and synced to disk before moving on:
+#
+#     {"code": "1234", "keys": ["photos", "sign", "encrypt", "photo"], "value": "https://lh3.googleusercontent.com/..."}
+#
+# Loading the dataset replays the journal on top of the dataset file. Every COMPACT_ENTRIES changes, and when the
+# script is done, the dataset file is saved with the changes applied and the journal is removed (see dataset.py). A
+# line cut off by a crash while it was being written is removed along with anything after it.
+
+import json  # Used to write and read journal entries.
+import os  # Used to sync and remove journal files.
+
+COMPACT_ENTRIES = 100  # Journal entries written before the journal is compacted into its dataset file.
+
+counts = {}  # Journal entries written since the last compaction by journal path.
+
+def append_entry(path, entry):
+    """Appending an entry to a journal. Returns whether the journal is due to be compacted."""
+    with open(path, "a", encoding="utf-8") as journal_file:
+        journal_file.write(json.dumps(entry) + "\n")
+        journal_file.flush()
+        os.fsync(journal_file.fileno())
+    counts[path] = counts.get(path, 0) + 1
+    return counts[path] >= COMPACT_ENTRIES
+
+def read_entries(path):
+    """Reading the entries of a journal. Returns an empty list if there is no journal."""
+    entries = []
+    if not os.path.isfile(path):
+        return entries
+    with open(path, "rb+") as journal_file:
+        offset = 0  # End of the last complete entry.
+        for line in journal_file:
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("Missing line end")
+                entries.append(json.loads(line))
+            except ValueError:
+                # Cutting off the incomplete entry so new entries start on their own line.
+                print("... ignoring an incomplete entry at the end of " + os.path.basename(path))
+                journal_file.truncate(offset)
+                break
+            offset += len(line)
+    return entries
+
+def remove(path):
+    """Removing a journal once its entries have been saved to the dataset file."""
+    counts[path] = 0
+    if os.path.isfile(path):
+        os.remove(path)
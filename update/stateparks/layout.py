@@ -0,0 +1,93 @@
+"""layout.py measures park sign text using a memoized text extents cache."""
+
+# This module is used by sign.py to measure park sign and overlay text. Measuring text with Cairo requires shaping every
+# glyph in the string, and the word wrapping in sign.py measures the same lines and prefixes many times per park and
+# across parks. Text extents are cached by text, font size, and font face so each distinct measurement is only shaped
+# once. The cache can be saved to and loaded from a json file so measurements carry over between runs. Cache hits and
+# misses are counted to show how effective the cache is.
+
+import json  # Used for loading the text extents cache file.
+import os  # Used to process the text extents cache file.
+import cairo  # Used to measure text.
+from stateparks import dataset  # Used to save the text extents cache file.
+
+# pylint: disable=E1101
+# pylint: disable=C0103
+# pylint: disable=W0603
+
+extents_cache = {}  # Text extents by cache key.
+new_extents = {}  # Text extents measured since the last call to pop_new_extents.
+cache_hits = 0  # Number of measurements served from the cache.
+cache_misses = 0  # Number of measurements made with Cairo.
+measure_context = None  # Cairo context used only for measuring text.
+
+def get_measure_context():
+    """Getting the Cairo context used for measuring text. Uses an svg surface so metrics match the svg output."""
+    global measure_context
+    if measure_context is None:
+        measure_context = cairo.Context(cairo.SVGSurface(None, 1, 1))
+    return measure_context
+
+def get_cache_key(text, font_size, font_settings):
+    """Getting the cache key for a text measurement."""
+    return json.dumps(
+        [font_settings["font"], int(font_settings["slant"]), int(font_settings["weight"]), font_size, text],
+        ensure_ascii=False,
+    )
+
+def get_text_extents(text, preset, font_settings):
+    """Getting the text extents of a line of text at a font size preset."""
+    global cache_hits
+    global cache_misses
+    font_size = font_settings["sizes"][preset]["size"]
+    key = get_cache_key(text, font_size, font_settings)
+    extents = extents_cache.get(key)
+    if extents is not None:
+        cache_hits += 1
+        return extents
+    cache_misses += 1
+    context = get_measure_context()
+    context.select_font_face(font_settings["font"], font_settings["slant"], font_settings["weight"])
+    context.set_font_size(font_size)
+    extents = list(context.text_extents(text))
+    extents_cache[key] = extents
+    new_extents[key] = extents
+    return extents
+
+def pop_new_extents():
+    """Returns the text extents measured since the last call and clears them."""
+    measured = dict(new_extents)
+    new_extents.clear()
+    return measured
+
+def merge_extents(extents, hits=0, misses=0):
+    """Merging text extents and counters gathered in another process into the cache."""
+    global cache_hits
+    global cache_misses
+    extents_cache.update(extents)
+    cache_hits += hits
+    cache_misses += misses
+
+def get_cache_stats():
+    """Getting text extents cache counters."""
+    return {"entries": len(extents_cache), "hits": cache_hits, "misses": cache_misses}
+
+def reset_cache_stats():
+    """Resetting text extents cache counters."""
+    global cache_hits
+    global cache_misses
+    cache_hits = 0
+    cache_misses = 0
+
+def load_cache(path):
+    """Loading the text extents cache from a json file. Ignores a missing or invalid file."""
+    if os.path.isfile(path):
+        with open(path, encoding="utf-8") as cache_json_file:
+            try:
+                extents_cache.update(json.load(cache_json_file))
+            except ValueError as e:
+                print("Invalid text extents cache file " + path + ": " + str(e) + ". Ignoring")
+
+def save_cache(path):
+    """Saving the text extents cache to a json file."""
+    dataset.save_json(extents_cache, path)
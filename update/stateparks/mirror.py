@@ -0,0 +1,194 @@
+"""mirror.py downloads park photos into a local store and renders thumbnails and placeholders from them."""
+
+# Park photos are Google Photos links fetched by every visitor when the page is viewed. Mirroring downloads each photo
+# link once into a content addressed store, where the file name is the sha256 hash of the photo, so a photo used by
+# more than one link or downloaded again is only stored once. Photos are downloaded at the largest width in the
+# PHOTO_WIDTHS ladder of pages.py rather than at their original size. The store is kept outside the repository in the
+# cache directory (see paths.CACHE_DIR), since it holds full size copies of private main.html photos when those are
+# mirrored.
+#
+# Each stored photo is rendered into a pyramid of thumbnails in the images/mirror directory, one per PHOTO_WIDTHS width
+# up to the width of the photo, in every format of FORMATS. Thumbnails are named by the start of the photo hash and
+# their width, such as images/mirror/0123456789abcdef-640.avif. A tiny blurred WebP placeholder of the photo is kept as
+# a data URI along with the photo width and height, so the page can reserve the photo's space and show a preview right
+# away.
+#
+# The results are recorded in mirror.json by photo link. Photos already recorded with every thumbnail in place aren't
+# downloaded again, and thumbnails no longer recorded are removed. Downloading and rendering run as one task per photo
+# in a process pool.
+#
+# The thumbnails are served from the website like the svg images, so they are public even when the photo is only used
+# by main.html. Only the photos shown on guest.html are mirrored unless main.html photos are asked for.
+
+import base64  # Used to encode placeholders as data URIs.
+import hashlib  # Used to address photos by content.
+import io  # Used to encode placeholders in memory.
+import os  # Used to process directories and files.
+from concurrent.futures import ProcessPoolExecutor  # Used to mirror photos in parallel.
+import requests  # Used to handle request errors.
+from stateparks import fetch  # Used to download photos through the shared http session.
+from stateparks import pages  # Used to get the photo links and widths of the html files.
+from stateparks import paths  # Used to locate the photo store and thumbnail directories.
+
+try:
+    from PIL import Image  # Used to render thumbnails and placeholders.
+    from PIL import ImageFilter  # Used to blur placeholders.
+    from PIL import ImageOps  # Used to rotate photos by their orientation.
+except ImportError:
+    Image = None
+
+FORMATS = {  # Thumbnail formats and their encoder settings.
+    "avif": {"format": "AVIF", "quality": 50, "speed": 8},
+    "webp": {"format": "WEBP", "quality": 75, "method": 4},
+}
+PLACEHOLDER_WIDTH = 16  # Width of placeholders in pixels.
+PLACEHOLDER_BLUR = 1  # Radius of the placeholder blur in pixels.
+PLACEHOLDER_QUALITY = 30  # WebP quality of placeholders.
+HASH_LENGTH = 16  # Characters of the photo hash used in thumbnail names.
+TIMEOUT = 30  # Seconds to wait for a photo download.
+
+class MirrorError(Exception):
+    """Raised when a photo can't be mirrored."""
+
+def get_mirror_links(parks_json, variants):
+    """Getting the photo links of visited parks shown by the html file variants, in park order without duplicates."""
+    links = {}
+    for park in parks_json["parks"]:
+        if park["visited"]:
+            for variant in variants:
+                links.update((link, None) for link in pages.get_photo_links(park, variant) if link)
+    return list(links)
+
+def get_store_path(digest):
+    """Getting the path of a photo in the store by its hash."""
+    return os.path.join(paths.PHOTO_STORE_DIR, digest[:2], digest)
+
+def get_thumbnail_base(digest):
+    """Getting the path of the thumbnails of a photo by its hash, without their width and format."""
+    return os.path.join(paths.MIRROR_IMAGES_DIR, digest[:HASH_LENGTH])
+
+def get_thumbnail_path(digest, width, image_format):
+    """Getting the path of a thumbnail by its photo hash, width, and format."""
+    return get_thumbnail_base(digest) + "-" + str(width) + "." + image_format
+
+def get_thumbnail_paths(entry):
+    """Getting the paths of every thumbnail of a mirror.json entry."""
+    return [
+        get_thumbnail_path(entry["hash"], width, image_format) for width in entry["widths"] for image_format in FORMATS
+    ]
+
+def write_file(path, data):
+    """Writing a file through a temporary file so an interrupted write never leaves a partial file behind."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "wb") as outfile:
+        outfile.write(data)
+    os.replace(path + ".tmp", path)
+
+def download_photo(link):
+    """Downloading a photo into the store. Returns the photo hash."""
+    try:
+        response = fetch.get_session().get(link + "=w" + str(max(pages.PHOTO_WIDTHS)), timeout=TIMEOUT)
+    except requests.exceptions.RequestException as e:
+        raise MirrorError("Download failed: " + str(e)) from e
+    if response.status_code != 200:
+        raise MirrorError("Download failed with status " + str(response.status_code))
+    digest = hashlib.sha256(response.content).hexdigest()
+    if not os.path.isfile(get_store_path(digest)):
+        write_file(get_store_path(digest), response.content)
+    return digest
+
+def encode_image(image, image_format):
+    """Encoding an image in a format of FORMATS. Returns the image bytes."""
+    settings = dict(FORMATS[image_format])
+    buffer = io.BytesIO()
+    image.save(buffer, settings.pop("format"), **settings)
+    return buffer.getvalue()
+
+def create_placeholder(image):
+    """Creating a tiny blurred WebP placeholder of an image. Returns it as a data URI."""
+    height = max(1, round(image.height * PLACEHOLDER_WIDTH / image.width))
+    placeholder = image.resize((PLACEHOLDER_WIDTH, height), Image.Resampling.BILINEAR)
+    placeholder = placeholder.filter(ImageFilter.GaussianBlur(PLACEHOLDER_BLUR))
+    buffer = io.BytesIO()
+    placeholder.save(buffer, "WEBP", quality=PLACEHOLDER_QUALITY)
+    return "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+def create_thumbnails(digest):
+    """Rendering the thumbnail pyramid and placeholder of a stored photo. Returns its mirror.json entry."""
+    try:
+        with Image.open(get_store_path(digest)) as stored_image:
+            image = ImageOps.exif_transpose(stored_image).convert("RGB")
+    except OSError as e:
+        raise MirrorError("Photo can't be read: " + str(e)) from e
+    widths = sorted({min(width, image.width) for width in pages.PHOTO_WIDTHS})
+    for width in widths:
+        thumbnail = None
+        for image_format in FORMATS:
+            path = get_thumbnail_path(digest, width, image_format)
+            if os.path.isfile(path):
+                continue
+            if thumbnail is None:
+                height = max(1, round(image.height * width / image.width))
+                thumbnail = image.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+            write_file(path, encode_image(thumbnail, image_format))
+    return {
+        "hash": digest,
+        "src": paths.site_url(get_thumbnail_base(digest)),
+        "width": image.width,
+        "height": image.height,
+        "widths": widths,
+        "placeholder": create_placeholder(image),
+    }
+
+def mirror_photo_task(link):
+    """Process pool task downloading a photo and rendering its thumbnails. Returns the link and its entry or error."""
+    try:
+        return {"link": link, "entry": create_thumbnails(download_photo(link))}
+    except MirrorError as e:
+        return {"link": link, "error": str(e)}
+
+def remove_stale_thumbnails(mirror_json):
+    """Removing thumbnails not used by any mirror.json entry. Returns the number of thumbnails removed."""
+    if not os.path.isdir(paths.MIRROR_IMAGES_DIR):
+        return 0
+    used = {os.path.basename(path) for entry in mirror_json.values() for path in get_thumbnail_paths(entry)}
+    removed = 0
+    for entry in os.scandir(paths.MIRROR_IMAGES_DIR):
+        if entry.is_file() and entry.name not in used:
+            os.remove(entry.path)
+            removed += 1
+    return removed
+
+def mirror_photos(parks_json, mirror_json, variants=("guest",), jobs=1):
+    """Mirroring the photos shown by the html file variants. Updates mirror_json in place.
+
+    Returns the number of photos mirrored and the links that failed.
+    """
+    if Image is None:
+        raise MirrorError("Mirroring photos needs the Pillow package")
+    links = get_mirror_links(parks_json, variants)
+    for link in set(mirror_json) - set(links):
+        del mirror_json[link]
+    pending = [
+        link
+        for link in links
+        if link not in mirror_json or not all(os.path.isfile(path) for path in get_thumbnail_paths(mirror_json[link]))
+    ]
+    print("Mirroring " + str(len(pending)) + " of " + str(len(links)) + " photo(s)")
+    results = {"mirrored": 0, "failed": []}
+    if jobs > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            tasks = list(executor.map(mirror_photo_task, pending))
+    else:
+        tasks = [mirror_photo_task(link) for link in pending]
+    for task in tasks:
+        if "error" in task:
+            print("Failed to mirror " + task["link"] + ": " + task["error"])
+            results["failed"].append(task["link"])
+        else:
+            mirror_json[task["link"]] = task["entry"]
+            results["mirrored"] += 1
+    removed = remove_stale_thumbnails(mirror_json)
+    if removed:
+        print("... removed " + str(removed) + " unused thumbnail(s)")
+    return results
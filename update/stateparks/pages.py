@@ -0,0 +1,370 @@
+"""pages.py compiles html files from data in parks.json utilizing jinja html templates."""
+
+# main.html
+# This file is the main content in your application and this file can be used for local testing without having to enter
+# a passphrase. This file should not be exposed in your GitHub repo, to keep image links hidden. It is included in the
+# .gitignore file. This html file will be encrypted with PageCrypt and added to the index.html file to be used with
+# GitHub pages.
+#
+# index.html
+# This file is the login page that contains the encrypted main.html code. This file was adapted from PageCrypt
+# (https://github.com/MaxLaumeister/pagecrypt).
+#
+# guest.html
+# This file serves as the guest page that should only contain image links that you don't mind being publicly accessible.
+# This file also acts as a demo page for this website.
+#
+# The html files don't unroll a sign container per park. Each page gets a compact park dataset inlined as json, which
+# js/main.js renders into sign containers a page at a time as the grid is scrolled. The dataset is inlined rather than
+# written to a separate json file so the main.html image links stay inside the encrypted index.html payload.
+#
+# main.html and guest.html only differ in the photo links of visited parks. The template is rendered once with a marker
+# where the dataset goes, and each page is written as that shared html with its own dataset substituted in. The datasets
+# are built in a single pass over parks.json where the fields shared by both pages are serialized once per park.
+#
+# Park fragments
+# Builds keep the dataset entries of every park along with the park they were built from, keyed by park code. A rebuild
+# only serializes the parks that changed since the last build and assembles the datasets from the kept entries of the
+# rest, so marking a park visited only rebuilds that park's entry and the navbar stats. Long running builds, such as
+# watch.py, keep the entries in memory and compare each park with the park of the last build, so parks.json has to be
+# loaded again rather than modified in place between these builds.
+#
+# One-shot builds, such as build.py, save the entries to a snapshot in the keystore directory (see paths.KEYSTORE_DIR)
+# after building and load it before the next build. The snapshot holds the private main.html photo links, so it is kept
+# outside the repository like the encrypted payload cache. It stores a digest of each park instead of the park itself,
+# which keeps it small enough to load faster than serializing every park again. The nearby parks are saved along with a
+# digest of the park locations they were found from, since finding them is the slowest part of building the datasets.
+#
+# Nearby parks
+# Every park with coordinates lists the NEARBY_COUNT nearest unvisited parks within NEARBY_RADIUS kilometers, found
+# with the k-d tree in geo.py. js/main.js shows them on the park's Google Maps link. They depend on the coordinates and
+# visited flags of every park, so long running builds keep them until one of those changes.
+#
+# Responsive photos
+# Google Photos serves any width of a photo by appending a size option such as =w640 to its link, and WebP with -rw
+# such as =w640-rw. Rather than requesting one fixed width, every sign and landscape photo lists the PHOTO_WIDTHS
+# ladder of widths in its srcset along with the sizes it is shown at, so browsers pick the smallest photo that is sharp
+# on their screen. The ladder, format, and sizes are rendered once onto the signs container instead of per photo, which
+# would repeat every link once per width in the datasets, and js/main.js expands each photo link into its srcset.
+#
+# Mirrored photos
+# Photos mirrored by mirror.py are served from the images/mirror directory instead of Google Photos. Their dataset
+# entries list the thumbnail widths and photo size along with a tiny placeholder data URI, which js/main.js shows at the
+# photo's size until the thumbnail loads.
+#
+# overlay-sprite.svg
+# When the overlay sprite is enabled, the overlay svg images of parks using the overlay option are combined into a
+# single svg sprite in the images directory. The html files then reference each overlay from the sprite instead of
+# requesting one svg file per park.
+
+import collections  # Used to count parks per type.
+import hashlib  # Used to digest parks for the fragments snapshot.
+import json  # Used to inline the park datasets in the html files.
+import jinja2  # Used to build html files based on jinja html templates.
+from stateparks import dataset  # Used to get the park and photo types.
+from stateparks import encrypt  # Used to encrypt main.html.
+from stateparks import geo  # Used to find nearby unvisited parks.
+from stateparks import paths  # Used to locate the templates and html files.
+from stateparks import sprite  # Used to combine overlay svg images into a single svg sprite.
+
+# pylint: disable=C0103
+# pylint: disable=W0603
+
+PARKS_DATA_MARKER = "<!-- parks-data -->"  # Rendered in place of the park dataset, then replaced for each page.
+VARIANTS = ["encrypt", "guest"]  # Photo link variants in parks.json. Used by main.html and guest.html.
+NEARBY_COUNT = 5  # Nearby unvisited parks listed per park.
+NEARBY_RADIUS = 100  # Kilometers nearby unvisited parks are listed within.
+SNAPSHOT_VERSION = 1  # Version of the fragments snapshot format. Snapshots in another format are ignored.
+PHOTO_WIDTHS = [320, 480, 640, 960, 1280, 1600]  # Google Photos widths listed in photo srcsets.
+WEBP_OPTION = "-rw"  # Google Photos size option suffix serving WebP photos.
+# Shown widths of sign photos for srcset sizes. Mirrors the sign widths set by js/main.js, a fifth of the screen width
+# from 120px to 250px, at the 1.5 times signs expand to.
+SIGN_SIZES = "(max-width: 599px) 180px, (max-width: 1249px) 30vw, 375px"
+# Shown widths of landscape photos for srcset sizes. Mirrors the landscape layouts in css/landscape.css, which stack the
+# photos on tall screens, show two under one on square screens, and show three side by side on wide screens.
+LANDSCAPE_SIZES = "(max-aspect-ratio: 0.8) 100vw, (max-aspect-ratio: 1.5) 50vw, 34vw"
+
+environment = None  # Jinja environment shared by every html file.
+fragments = None  # Dataset entries and the park they were built from by park code, kept from the last build.
+nearby = None  # Nearby unvisited parks and a digest of the park locations they came from, kept from the last build.
+snapshot_nearby = None  # Nearby unvisited parks loaded from the fragments snapshot. Used to skip saving it unchanged.
+
+def get_environment():
+    """Getting the shared jinja environment. Compiled templates are cached in the system temp directory."""
+    global environment
+    if environment is None:
+        environment = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(paths.UPDATE_DIR),
+            bytecode_cache=jinja2.FileSystemBytecodeCache(),
+        )
+    return environment
+
+def build_html(template_path, result_path, context):
+    """Builds html file using jinja templates. Streams output to the file."""
+    get_environment().get_template(template_path).stream(context).dump(result_path, encoding="utf-8")
+    print(f"... wrote {paths.display(result_path)}")
+
+def render_page_shell(template_path, context):
+    """Rendering the html shared by every page once. Returns the html bytes before and after the park dataset."""
+    html = get_environment().get_template(template_path).render(dict(context, parks_data=PARKS_DATA_MARKER))
+    before, _, after = html.partition(PARKS_DATA_MARKER)
+    return before.encode("utf-8"), after.encode("utf-8")
+
+def write_page(result_path, page_shell, parks_data):
+    """Writing an html file from the rendered page shell and a park dataset. Streams each part to the file.
+
+    Returns the html as a list of byte parts, which are never joined into one copy of the page.
+    """
+    parts = [page_shell[0], parks_data.encode("utf-8"), page_shell[1]]
+    with open(result_path, mode="wb") as results:
+        for part in parts:
+            results.write(part)
+    print(f"... wrote {paths.display(result_path)}")
+    return parts
+
+def get_type_slug(park_type):
+    """Getting the type of a park as used by the html class names and filters."""
+    return park_type.replace(" ", "-").lower()
+
+def get_park_stats(parks_json):
+    """Counting parks and visited parks per type for the navbar filters."""
+    type_slugs = [get_type_slug(park["type"]) for park in parks_json["parks"]]
+    counts = collections.Counter(type_slugs)
+    visited = collections.Counter(
+        type_slug for type_slug, park in zip(type_slugs, parks_json["parks"]) if park["visited"]
+    )
+    stats = {"all": {"count": len(type_slugs), "visited": sum(visited.values())}}
+    for park_type in dataset.PARKS_TYPES + [dataset.OTHER_PARK_TYPE]:
+        type_slug = get_type_slug(park_type)
+        stats[type_slug] = {"count": counts[type_slug], "visited": visited[type_slug]}
+    return stats
+
+def get_photo_links(park, variant):
+    """Getting the sign and landscape photo links of a visited park. Guest landscapes fall back to encrypt links."""
+    links = []
+    for photo_type in dataset.PHOTO_TYPES:
+        link = park["photos"][photo_type][variant]["photo"]
+        if link == "" and photo_type != "sign":
+            link = park["photos"][photo_type]["encrypt"]["photo"]
+        links.append(link)
+    return links
+
+def dump_page_json(data):
+    """Outputting compact json that is safe to inline in a script tag."""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).replace("<", "\\u003c")
+
+def get_digest(data):
+    """Getting a digest of json data. Used to compare parks and park locations with those of the last build."""
+    return hashlib.blake2b(json.dumps(data, separators=(",", ":")).encode("utf-8"), digest_size=16).hexdigest()
+
+def get_nearby_parks(parks_json, incremental=False):
+    """Getting the nearby unvisited parks of every park. Returns lists of [code, kilometers] by park code.
+
+    When incremental, the nearby parks of the last incremental build are kept if no park moved or changed visited.
+    """
+    global nearby
+    locations = get_digest([[park["code"], park["coordinates"], park["visited"]] for park in parks_json["parks"]])
+    if incremental and nearby is not None and nearby["locations"] == locations:
+        return nearby["parks"]
+    nearby_parks = {}
+    for code, parks in geo.get_nearby_unvisited(parks_json["parks"], NEARBY_COUNT, NEARBY_RADIUS).items():
+        if parks:
+            nearby_parks[code] = [[nearby_code, round(distance, 1)] for nearby_code, distance in parks]
+    nearby = {"locations": locations, "parks": nearby_parks} if incremental else None
+    return nearby_parks
+
+def get_photo_mirrors(park, mirror_json):
+    """Getting the mirror.json entries of the photos of a visited park by photo link."""
+    if not mirror_json or not park["visited"]:
+        return {}
+    links = {link for variant in VARIANTS for link in get_photo_links(park, variant)}
+    return {link: mirror_json[link] for link in links if link in mirror_json}
+
+def get_page_mirror(entry):
+    """Getting the dataset entry of a mirrored photo."""
+    return {key: entry[key] for key in ["src", "widths", "width", "height", "placeholder"]}
+
+def get_park_fragments(park, nearby_parks=None, photo_mirrors=None):
+    """Building the dataset entries of a park for every variant."""
+    page_park = {key: park[key] for key in ["code", "name", "coordinates"]}
+    page_park["type"] = get_type_slug(park["type"])
+    if park["overlay"]:
+        page_park["overlay"] = True
+    if nearby_parks:
+        page_park["nearby"] = nearby_parks
+    shared_json = dump_page_json(page_park)
+    if not park["visited"]:
+        return {variant: shared_json for variant in VARIANTS}
+    park_fragments = {}
+    for variant in VARIANTS:
+        links = get_photo_links(park, variant)
+        page_photos = {"visited": True, "sign": links[0], "landscapes": links[1:]}
+        if photo_mirrors and any(link in photo_mirrors for link in links):
+            page_photos["mirrors"] = [
+                get_page_mirror(photo_mirrors[link]) if link in photo_mirrors else None for link in links
+            ]
+        photos_json = dump_page_json(page_photos)
+        park_fragments[variant] = shared_json[:-1] + "," + photos_json[1:]
+    return park_fragments
+
+def is_park_unchanged(park_fragments, park, park_nearby, photo_mirrors):
+    """Checking if kept dataset entries were built from the same park, nearby parks, and mirrored photos.
+
+    Entries loaded from the fragments snapshot only have the digest of the park they were built from.
+    """
+    if park_fragments is None or park_fragments["nearby"] != park_nearby or park_fragments["mirrors"] != photo_mirrors:
+        return False
+    if "park" in park_fragments:
+        return park_fragments["park"] == park
+    return park_fragments["digest"] == get_digest(park)
+
+def get_page_datasets(parks_json, incremental=False, mirror_json=None):
+    """Building the compact park dataset rendered by js/main.js for every variant. Returns json by variant.
+
+    When incremental, only parks that changed since the last incremental build are serialized. Photos in mirror_json are
+    served from their mirrored thumbnails.
+    """
+    global fragments
+    previous_fragments = (fragments or {}) if incremental else {}
+    nearby_parks = get_nearby_parks(parks_json, incremental)
+    new_fragments = {}
+    entries = {variant: [] for variant in VARIANTS}
+    changed = 0
+    for park in parks_json["parks"]:
+        park_fragments = previous_fragments.get(park["code"])
+        park_nearby = nearby_parks.get(park["code"])
+        photo_mirrors = get_photo_mirrors(park, mirror_json)
+        if not is_park_unchanged(park_fragments, park, park_nearby, photo_mirrors):
+            park_fragments = dict(
+                get_park_fragments(park, park_nearby, photo_mirrors),
+                park=park,
+                nearby=park_nearby,
+                mirrors=photo_mirrors,
+            )
+            changed += 1
+        new_fragments[park["code"]] = park_fragments
+        for variant in VARIANTS:
+            entries[variant].append(park_fragments[variant])
+    if incremental and fragments is not None:
+        print("... " + str(changed) + " of " + str(len(new_fragments)) + " park(s) changed since the last build")
+    fragments = new_fragments if incremental else None
+    return {variant: "[" + ",".join(entries[variant]) + "]" for variant in VARIANTS}
+
+def get_snapshot_name():
+    """Getting the fragments snapshot file name. Each project directory has its own snapshot."""
+    return "fragments-" + hashlib.sha256(paths.PROJECT_DIR.encode("utf-8")).hexdigest()[:16] + ".json"
+
+def load_snapshot():
+    """Loading the dataset entries and nearby parks of the last build from the fragments snapshot, if there is one."""
+    global fragments
+    global nearby
+    global snapshot_nearby
+    snapshot = encrypt.load_keystore_file(get_snapshot_name())
+    if snapshot and snapshot.get("version") == SNAPSHOT_VERSION:
+        fragments = snapshot["fragments"]
+        nearby = snapshot_nearby = snapshot["nearby"]
+
+def save_snapshot():
+    """Outputting the dataset entries and nearby parks of the last incremental build to the fragments snapshot.
+
+    The snapshot isn't saved again when no park changed since it was loaded.
+    """
+    if fragments is None or nearby is None:
+        return
+    if nearby is snapshot_nearby and not any("park" in park_fragments for park_fragments in fragments.values()):
+        return
+    snapshot_fragments = {}
+    for code, park_fragments in fragments.items():
+        snapshot_fragments[code] = {key: value for key, value in park_fragments.items() if key != "park"}
+        if "park" in park_fragments:
+            snapshot_fragments[code]["digest"] = get_digest(park_fragments["park"])
+    encrypt.save_keystore_file(
+        get_snapshot_name(), {"version": SNAPSHOT_VERSION, "nearby": nearby, "fragments": snapshot_fragments}
+    )
+
+def build_overlay_sprite(parks_json):
+    """Building overlay svg sprite. Returns the sprite url used in the html files."""
+    sprite.build_overlay_sprite(
+        [park["code"] for park in parks_json["parks"] if park["overlay"]],
+        paths.OVERLAY_IMAGES_DIR,
+        paths.OVERLAY_SPRITE_SVG,
+    )
+    return paths.site_url(paths.OVERLAY_SPRITE_SVG)
+
+def get_photo_sizes(widths=None, webp=True):
+    """Getting the srcset widths, size option suffix, and sizes of photos as rendered onto the signs container."""
+    return {
+        "widths": ",".join(str(width) for width in sorted(set(widths or PHOTO_WIDTHS))),
+        "option": WEBP_OPTION if webp else "",
+        "sign": SIGN_SIZES,
+        "landscape": LANDSCAPE_SIZES,
+    }
+
+def build_preview_pages(
+    parks_json, overlay_sprite=False, incremental=False, route_json=None, widths=None, webp=True, mirror_json=None
+):
+    """Building main.html and guest.html. Returns main.html as a list of byte parts for encrypting.
+
+    When incremental, only the dataset entries of parks that changed since the last incremental build in this process
+    are rebuilt. A planned route from route.json is shown above the park signs when set. Photos are offered at the
+    widths given, or PHOTO_WIDTHS, as WebP unless webp is False. Photos in mirror_json are served from their mirrored
+    thumbnails.
+    """
+    print("Initializing jinja template variables")
+    parks_datasets = get_page_datasets(parks_json, incremental, mirror_json)
+    sprite_url = None
+    if overlay_sprite:
+        print("Building overlay-sprite.svg")
+        sprite_url = build_overlay_sprite(parks_json)
+    context = {
+        "firstname": parks_json["firstname"],
+        "lastname": parks_json["lastname"],
+        "stats": get_park_stats(parks_json),
+        "overlay_sprite": sprite_url,
+        "route": route_json,
+        "photo_sizes": get_photo_sizes(widths, webp),
+    }
+    page_shell = render_page_shell(paths.MAIN_TEMPLATE, context)
+    # Building main.html.
+    print("Building main.html")
+    data = write_page(paths.MAIN_HTML, page_shell, parks_datasets["encrypt"])
+    # Building guest.html.
+    print("Building guest.html")
+    write_page(paths.GUEST_HTML, page_shell, parks_datasets["guest"])
+    return data
+
+def build_index_page(data, passphrase, iterations=encrypt.ITERATIONS):
+    """Building index.html adding the encrypted main.html byte parts."""
+    print("Building index.html")
+    print("Encrypting main.html for index.html")
+    build_html(
+        paths.INDEX_TEMPLATE,
+        paths.INDEX_HTML,
+        {"encryptedHTML": encrypt.encrypt_html(data, passphrase, iterations), "iterations": iterations},
+    )
+
+def build_pages(
+    parks_json,
+    passphrase,
+    overlay_sprite=False,
+    iterations=encrypt.ITERATIONS,
+    route_json=None,
+    widths=None,
+    webp=True,
+    mirror_json=None,
+    snapshot=False,
+):
+    """Building main.html, guest.html, and index.html. Iterations sets the PBKDF2 iterations for main.html.
+
+    When snapshot is set, only the parks that changed since the build saved in the fragments snapshot are serialized,
+    and the snapshot is saved again for the next build.
+    """
+    if snapshot:
+        load_snapshot()
+    build_index_page(
+        build_preview_pages(parks_json, overlay_sprite, snapshot, route_json, widths, webp, mirror_json),
+        passphrase,
+        iterations,
+    )
+    if snapshot:
+        save_snapshot()
@@ -0,0 +1,57 @@
+"""paths.py defines the file and directory paths used by the update scripts."""
+
+# Paths are resolved relative to this package instead of the current working directory so the update scripts and the
+# library functions can be run from any directory.
+
+import os  # Used to build file and directory paths.
+
+UPDATE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Directory containing the update scripts.
+PROJECT_DIR = os.path.dirname(UPDATE_DIR)  # Project directory containing the html files.
+ASSETS_DIR = os.path.join(UPDATE_DIR, "assets")  # Directory containing parks.json and the jinja templates.
+
+PARKS_JSON = os.path.join(ASSETS_DIR, "parks.json")  # California State Parks data.
+PARKS_DB = os.path.join(ASSETS_DIR, "parks.db")  # California State Parks data when using the sqlite dataset.
+COORDS_JSON = os.path.join(ASSETS_DIR, "coords.json")  # California State Parks coordinates.
+PARKS_JOURNAL = os.path.join(ASSETS_DIR, "parks.journal.jsonl")  # Park changes not yet saved to the parks dataset.
+COORDS_JOURNAL = os.path.join(ASSETS_DIR, "coords.journal.jsonl")  # Coordinates not yet saved to coords.json.
+OVERRIDES_JSON = os.path.join(ASSETS_DIR, "overrides.json")  # Park name and park type overrides.
+PASSPHRASE_TXT = os.path.join(ASSETS_DIR, "passphrase.txt")  # Passphrase used to encrypt main.html.
+MANIFEST_JSON = os.path.join(ASSETS_DIR, "manifest.json")  # Svg hashes by park code.
+EXTENTS_JSON = os.path.join(ASSETS_DIR, "extents.json")  # Text extents cache.
+DECISIONS_JSON = os.path.join(ASSETS_DIR, "decisions.json")  # Reviewed scrape decisions used in batch mode.
+REPORT_JSON = os.path.join(ASSETS_DIR, "report.json")  # Scrape changes waiting for a decision in batch mode.
+ROUTE_JSON = os.path.join(ASSETS_DIR, "route.json")  # Planned route through unvisited parks.
+MIRROR_JSON = os.path.join(ASSETS_DIR, "mirror.json")  # Mirrored photo sizes and placeholders by photo link.
+
+# Cache directory outside the repository for files holding key material or private photo links. Can be overridden with
+# the STATEPARKS_CACHE environment variable.
+CACHE_DIR = os.environ.get("STATEPARKS_CACHE") or os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "stateparks"
+)
+# Keystore caching derived encryption keys and the encrypted main.html. Can be overridden with the STATEPARKS_KEYSTORE
+# environment variable.
+KEYSTORE_DIR = os.environ.get("STATEPARKS_KEYSTORE") or CACHE_DIR
+# Cached http responses. Kept outside the repository since the Google Photos pages hold the private photo links.
+HTTP_CACHE_DIR = os.path.join(CACHE_DIR, "http-cache")
+# Downloaded photos by content hash. Kept outside the repository since main.html photos can be mirrored.
+PHOTO_STORE_DIR = os.path.join(CACHE_DIR, "photo-store")
+
+MAIN_TEMPLATE = "assets/main.html.jinja2"  # Main page jinja template, relative to UPDATE_DIR.
+INDEX_TEMPLATE = "assets/index.html.jinja2"  # Login page jinja template, relative to UPDATE_DIR.
+
+MAIN_HTML = os.path.join(PROJECT_DIR, "main.html")  # Unencrypted main page.
+GUEST_HTML = os.path.join(PROJECT_DIR, "guest.html")  # Guest page.
+INDEX_HTML = os.path.join(PROJECT_DIR, "index.html")  # Login page containing the encrypted main page.
+
+PARKS_IMAGES_DIR = os.path.join(PROJECT_DIR, "images", "parks")  # Park sign svg images.
+OVERLAY_IMAGES_DIR = os.path.join(PROJECT_DIR, "images", "overlay")  # Park overlay svg images.
+OVERLAY_SPRITE_SVG = os.path.join(PROJECT_DIR, "images", "overlay-sprite.svg")  # Combined park overlay svg images.
+MIRROR_IMAGES_DIR = os.path.join(PROJECT_DIR, "images", "mirror")  # Mirrored photo thumbnails.
+
+def display(path):
+    """Getting a path relative to the update directory for printing."""
+    return os.path.relpath(path, UPDATE_DIR)
+
+def site_url(path):
+    """Getting the url of a file relative to the project directory for use in html files."""
+    return os.path.relpath(path, PROJECT_DIR).replace(os.sep, "/")
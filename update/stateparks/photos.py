@@ -0,0 +1,154 @@
+"""photos.py gathers direct image links from Google Photos shared album links in parks.json."""
+
+# The Google Photos shared album links can be created by going to Google Photos (https://photos.google.com/), finding
+# your image and clicking Share > Create Link > Copy. The direct image link is pulled from the shared album page's html.
+# Note that this relies on Google Photos url and html structure staying consistent. This may have changed since this was
+# last run.
+#
+# Links are resolved concurrently with asyncio. Requests run in worker threads through the shared http cache, with at
+# most CONCURRENCY requests in flight. Requests are paced by a token bucket allowing RATE requests per minute so Google
+# Photos doesn't flag the requests as a robot. Requests that time out or get a 429 or 5xx response are retried with
+# exponential backoff, honoring the Retry-After header. When saving, every resolved link is journaled as it comes in
+# (see journal.py) so an interrupted run can resume where it stopped without rewriting parks.json for every link.
+
+import asyncio  # Used to resolve links concurrently.
+import time  # Used to pace requests.
+import requests  # Used to handle request errors.
+from stateparks import dataset  # Used to get the park photo types.
+from stateparks import extract  # Used to extract image links from Google Photos html files.
+from stateparks import fetch  # Used to get the Google Photos html files.
+
+CONCURRENCY = 4  # Maximum number of requests in flight.
+RATE = 20  # Maximum number of requests per minute.
+MAX_RETRIES = 5  # Number of times a request is retried.
+BACKOFF_TIME = 2  # Seconds to wait before the first retry, doubled for every retry after.
+RETRY_STATUS_CODES = [429, 500, 502, 503, 504]  # Response status codes that are retried.
+PAGE_TTL = 7 * 24 * 60 * 60  # Seconds a cached Google Photos html file is used without revalidating.
+
+class PhotoError(Exception):
+    """Raised when a direct image link can't be gathered from a Google Photos shared album link."""
+
+class RetryPhotoError(PhotoError):
+    """Raised when a Google Photos request failed in a way that may succeed if retried."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after  # Seconds to wait requested by the Retry-After header.
+
+def get_retry_after(response):
+    """Getting the Retry-After header seconds if set."""
+    retry_after = response["headers"].get("Retry-After", "")
+    return int(retry_after) if retry_after.isdigit() else None
+
+def get_direct_link(url):
+    """Gets the direct image link from a Google Photos shared album link."""
+    try:
+        response = fetch.get(url, PAGE_TTL)
+    except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+        raise RetryPhotoError("Request failed: " + str(e)) from e
+    except fetch.FetchError as e:
+        raise PhotoError(str(e)) from e
+    if response["status"] in RETRY_STATUS_CODES:
+        raise RetryPhotoError("Request failed with status " + str(response["status"]), get_retry_after(response))
+    if response["status"] != 200:
+        raise PhotoError("Request failed with status " + str(response["status"]))
+    image = extract.extract_image(response["content"])
+    if not image:
+        raise PhotoError("No image found")
+    return image.split("=")[0]
+
+def get_pending_photos(parks_json):
+    """Getting the park photos with a shared album link but no direct image link."""
+    pending = []
+    for park in parks_json["parks"]:
+        for photo_type in dataset.PHOTO_TYPES:
+            for variant in ["encrypt", "guest"]:
+                photo = park["photos"][photo_type][variant]
+                if photo["share"] != "" and photo["photo"] == "":
+                    pending.append({"park": park, "type": photo_type, "variant": variant, "photo": photo})
+    return pending
+
+def create_token_bucket(rate, burst=1):
+    """Creating a token bucket allowing rate requests per minute. Returns an async function waiting for a token."""
+    bucket = {"tokens": burst, "time": time.monotonic()}
+
+    async def take():
+        """Waits until a token is available and takes it."""
+        while True:
+            now = time.monotonic()
+            bucket["tokens"] = min(burst, bucket["tokens"] + (now - bucket["time"]) * rate / 60)
+            bucket["time"] = now
+            if bucket["tokens"] >= 1:
+                bucket["tokens"] -= 1
+                return
+            await asyncio.sleep((1 - bucket["tokens"]) * 60 / rate)
+
+    return take
+
+async def fetch_direct_link(url, semaphore, take, max_retries, backoff_time):
+    """Gets the direct image link once a request slot and a token are available, retrying with exponential backoff.
+
+    The request slot is released while waiting to retry so other links can be gathered in the meantime.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            async with semaphore:
+                await take()
+                return await asyncio.to_thread(get_direct_link, url)
+        except RetryPhotoError as e:
+            if attempt == max_retries:
+                raise
+            delay = backoff_time * 2**attempt
+            if e.retry_after is not None:
+                delay = max(delay, e.retry_after)
+            print("... " + str(e) + ". Retrying in " + str(delay) + " seconds")
+            await asyncio.sleep(delay)
+    return None
+
+async def resolve_photo_links(
+    parks_json, concurrency=CONCURRENCY, rate=RATE, save=False, max_retries=MAX_RETRIES, backoff_time=BACKOFF_TIME
+):
+    """Resolving direct image links concurrently. Returns the number of links gathered and the failed photos.
+
+    When save is set, every link is journaled as it is gathered and the parks are saved once done or interrupted.
+    """
+    take = create_token_bucket(rate, concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    results = {"gathered": 0, "failed": []}
+
+    async def resolve(pending_photo):
+        """Resolves a single photo and journals its link."""
+        park = pending_photo["park"]
+        description = park["name"] + " " + pending_photo["type"] + " " + pending_photo["variant"]
+        try:
+            link = await fetch_direct_link(pending_photo["photo"]["share"], semaphore, take, max_retries, backoff_time)
+        except PhotoError as e:
+            print("Failed to gather " + description + " direct link: " + str(e))
+            results["failed"].append(pending_photo)
+            return
+        if save:
+            keys = ["photos", pending_photo["type"], pending_photo["variant"], "photo"]
+            dataset.set_park_value(parks_json, park, keys, link)
+        else:
+            pending_photo["photo"]["photo"] = link
+        results["gathered"] += 1
+        print("Gathered " + description + " direct link")
+
+    try:
+        await asyncio.gather(*(resolve(pending_photo) for pending_photo in get_pending_photos(parks_json)))
+    finally:
+        # Saving the journaled links, also when interrupted.
+        if save and results["gathered"]:
+            dataset.save_parks(parks_json)
+    return results
+
+def create_photo_links(parks_json, concurrency=CONCURRENCY, rate=RATE, save=False):
+    """Updating parks.json photo links from Google Photos shared album links in parks.json.
+
+    When save is set, links are saved to the parks dataset as they are gathered. Returns the photos that failed.
+    """
+    print("Creating direct image links from Google Photos shared album links")
+    print("Requests limited to " + str(concurrency) + " at a time and " + str(rate) + " per minute")
+    results = asyncio.run(resolve_photo_links(parks_json, concurrency, rate, save))
+    print("Gathered " + str(results["gathered"]) + " direct link(s), " + str(len(results["failed"])) + " failed")
+    return results["failed"]
@@ -0,0 +1,69 @@
+"""prompts.py handles the interactive prompts used by the update scripts."""
+
+import re  # Used to match regex patterns.
+from stateparks import dataset  # Used to journal entered coordinates.
+
+# Regex used to test if a coordinate is valid.
+COORDS_RE = r"^[-+]?([1-8]?\d(\.\d+)?|90(\.0+)?),[-+]?(180(\.0+)?|((1[0-7]\d)|([1-9]?\d))(\.\d+)?)$"
+
+def ask_yes_no(prompt):
+    """Prompts the user with a yes or no question."""
+    user_input = input(prompt)
+    return user_input.lower() == "y" or user_input.lower() == "yes"
+
+def ask_enter_coords():
+    """Prompts the user whether to enter coordinates for parks when coords.json doesn't exist."""
+    return not ask_yes_no("Would you like to skip coordinates during setup (Y/N): ")
+
+def confirm_change(kind, message, change=None):  # pylint: disable=W0613
+    """Prompts the user to accept a park change. Kind is "rename", "recode", or "remove"."""
+    if kind == "remove":
+        return ask_yes_no(message + " (Y/N): ")
+    print(message)
+    return ask_yes_no("Accept changes (Y/N): ")
+
+def create_coords_prompt(coords_json, enabled=True):
+    """Creating a function that gets park coordinates from coords.json or by prompting the user."""
+    state = {"enabled": enabled, "message": True}
+
+    def get_coords(code, name):
+        """Handles adding new coordinate to a park."""
+        # Skips park coordinates if flag is set.
+        if not state["enabled"]:
+            return ""
+        # Return park coordinates found in coords.json if they exist.
+        if code in coords_json.keys():
+            return coords_json[code]
+        # Message user once that "skip-all" is an available command.
+        if state["message"]:
+            print(
+                'Adding missing coordinates. Typing "skip-all" during any enter coordinate prompt '
+                + "will skip all further coordinate prompts"
+            )
+            state["message"] = False
+        # New park without coordinate information.
+        park_name_code = name + " (" + code + ")"
+        first_prompt = True
+        while True:
+            if first_prompt:
+                user_input_coords = input(
+                    park_name_code + ' is missing coordinates. Enter new coordinates or type "skip" to skip: '
+                )
+            else:
+                user_input_coords = input(
+                    "Invalid coordinates."
+                    + ' Valid example: "36.30952528162378,-121.88637073076984".'
+                    + ' Enter new coordinates or type "skip" to skip: '
+                )
+            if re.match(COORDS_RE, user_input_coords):
+                print("Updating coords.json with new coordinates for the park " + park_name_code)
+                dataset.add_coords(coords_json, code, user_input_coords)
+                return user_input_coords
+            if user_input_coords.lower() == "s" or user_input_coords.lower() == "skip":
+                return ""
+            if user_input_coords.lower() == "skip-all":
+                state["enabled"] = False
+                return ""
+            first_prompt = False
+
+    return get_coords
@@ -0,0 +1,157 @@
+"""route.py plans a trip through unvisited parks from a starting point."""
+
+# The route is planned over the unvisited parks with coordinates within a budget of a number of parks, a number of
+# kilometers, or both. Distances are great circle distances, so the route is a guide to the order the parks are visited
+# in rather than a driving distance. Routes end at the last park unless they are round trips back to the start.
+#
+# The haversine distances between the start and every candidate park are computed at once into a numpy distance matrix.
+# Only the MAX_PARKS parks nearest to the start are candidates, found with the k-d tree in geo.py, which keeps the
+# matrix small for any dataset. Parks further than the kilometer budget from the start can't be reached and aren't
+# candidates either.
+#
+# The route is built by repeatedly going to the nearest candidate park while the budget allows. It is then shortened
+# with 2-opt, reversing the part of the route between two legs whenever that makes the route shorter. The gains of every
+# reversal starting at a leg are computed as one numpy operation. With a kilometer budget, the kilometers saved are used
+# to insert more parks where they add the least distance, and the route is shortened again, until no more parks fit.
+#
+# An open route ends at a dummy stop with no distance to any park, so open routes and round trips are both shortened as
+# a route between two fixed ends.
+
+import math  # Used for budgets without a kilometer limit.
+from stateparks import geo  # Used to find candidate parks near the start.
+
+try:
+    import numpy  # Used to compute distances and route changes for every park at once.
+except ImportError:
+    numpy = None
+
+MAX_PARKS = 2000  # Maximum candidate parks nearest to the start.
+MIN_GAIN = 1e-9  # Kilometers a route change needs to save to be made.
+
+class RouteError(Exception):
+    """Raised when a route can't be planned."""
+
+def get_distance_matrix(points):
+    """Getting the distances between every pair of points in degrees as a matrix in kilometers."""
+    lats = numpy.radians(numpy.array([point[0] for point in points], dtype=float))
+    lngs = numpy.radians(numpy.array([point[1] for point in points], dtype=float))
+    h = (
+        numpy.sin((lats[:, None] - lats[None, :]) / 2) ** 2
+        + numpy.cos(lats[:, None]) * numpy.cos(lats[None, :]) * numpy.sin((lngs[:, None] - lngs[None, :]) / 2) ** 2
+    )
+    return 2 * geo.EARTH_RADIUS * numpy.arcsin(numpy.sqrt(numpy.minimum(1.0, h)))
+
+def get_route_distance(matrix, route):
+    """Getting the total distance of a route of matrix indexes."""
+    return float(matrix[route[:-1], route[1:]].sum())
+
+def create_nearest_route(matrix, end, max_parks, max_distance):
+    """Creating a route from the start by going to the nearest park while the budget allows.
+
+    Index 0 of the matrix is the start and end is the index the route returns to. Returns the route as an index array.
+    """
+    remaining = numpy.ones(len(matrix), dtype=bool)
+    remaining[0] = False
+    remaining[end] = False
+    route = [0]
+    distance = 0.0
+    while len(route) - 1 < max_parks and remaining.any():
+        last = route[-1]
+        candidates = numpy.where(remaining, matrix[last], numpy.inf)
+        nearest = int(candidates.argmin())
+        if distance + matrix[last, nearest] + matrix[nearest, end] > max_distance:
+            break
+        route.append(nearest)
+        remaining[nearest] = False
+        distance += matrix[last, nearest]
+    route.append(end)
+    return numpy.array(route)
+
+def shorten_route(matrix, route):
+    """Shortening a route with 2-opt until no reversal makes it shorter. The first and last stops stay in place."""
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, len(route) - 2):
+            # Gains of reversing route[i : j + 1] for every j, replacing legs (a, b) and (c, d) with (a, c) and (b, d).
+            a, b = route[i - 1], route[i]
+            c, d = route[i + 1 : -1], route[i + 2 :]
+            gains = matrix[a, b] + matrix[c, d] - matrix[a, c] - matrix[b, d]
+            best = int(gains.argmax())
+            if gains[best] > MIN_GAIN:
+                j = i + 1 + best
+                route[i : j + 1] = route[i : j + 1][::-1].copy()
+                improved = True
+    return route
+
+def insert_parks(matrix, route, max_parks, max_distance):
+    """Inserting parks into a route where they add the least distance while the budget allows. Returns the route."""
+    distance = get_route_distance(matrix, route)
+    remaining = numpy.ones(len(matrix), dtype=bool)
+    remaining[route] = False
+    while len(route) - 2 < max_parks and remaining.any():
+        candidates = numpy.flatnonzero(remaining)
+        rows = matrix[candidates]
+        # Distance added by inserting every candidate park between every pair of consecutive stops.
+        added = rows[:, route[:-1]] + rows[:, route[1:]] - matrix[route[:-1], route[1:]]
+        park, leg = numpy.unravel_index(int(added.argmin()), added.shape)
+        if distance + added[park, leg] > max_distance:
+            break
+        route = numpy.insert(route, leg + 1, candidates[park])
+        remaining[candidates[park]] = False
+        distance += added[park, leg]
+    return route
+
+def get_candidates(parks, start, reach, exclude=None):
+    """Getting the codes of the unvisited parks with coordinates within reach kilometers of the start, nearest first."""
+    index = geo.create_index(geo.get_park_points([park for park in parks if not park["visited"]]))
+    return [code for code, _ in geo.query_nearest(index, start[0], start[1], MAX_PARKS, reach, exclude)]
+
+def plan_route(parks, start, max_parks=None, max_distance=None, round_trip=False, exclude=None):
+    """Planning a route through unvisited parks from a start point in degrees.
+
+    The route visits at most max_parks parks and travels at most max_distance kilometers. A park code can be excluded,
+    such as the park the route starts at. Returns the route with its stops and distances.
+    """
+    if numpy is None:
+        raise RouteError("Planning routes needs the numpy package")
+    max_distance = math.inf if max_distance is None else max_distance
+    parks_by_code = {park["code"]: park for park in parks}
+    reach = None
+    if math.isfinite(max_distance):
+        reach = max_distance / 2 if round_trip else max_distance
+    candidates = get_candidates(parks, start, reach, exclude)
+    points = [start] + [geo.parse_coordinates(parks_by_code[code]["coordinates"]) for code in candidates]
+    matrix = get_distance_matrix(points)
+    end = 0
+    if not round_trip:
+        # Adding the dummy stop open routes end at.
+        end = len(matrix)
+        matrix = numpy.pad(matrix, ((0, 1), (0, 1)))
+    max_parks = len(candidates) if max_parks is None else max_parks
+    route = shorten_route(matrix, create_nearest_route(matrix, end, max_parks, max_distance))
+    if math.isfinite(max_distance):
+        inserted = insert_parks(matrix, route, max_parks, max_distance)
+        if len(inserted) > len(route):
+            route = shorten_route(matrix, inserted)
+    stops = []
+    total = 0.0
+    for last, stop in zip(route[:-2], route[1:-1]):
+        total += float(matrix[last, stop])
+        park = parks_by_code[candidates[stop - 1]]
+        stops.append(
+            {
+                "code": park["code"],
+                "name": park["name"],
+                "coordinates": park["coordinates"],
+                "distance": round(float(matrix[last, stop]), 1),
+                "total": round(total, 1),
+            }
+        )
+    distance = get_route_distance(matrix, route)
+    return {
+        "start": ",".join(str(value) for value in start),
+        "round_trip": round_trip,
+        "distance": round(distance, 1),
+        "stops": stops,
+    }
@@ -0,0 +1,177 @@
+"""scrape.py gathers the latest California State Parks data from the official website."""
+
+# Note that scraping relies on the California State Parks url and html structure staying consistent. This may have
+# changed since this was last run. There is a copy of the California State Parks html file as it was on 9/25/2023 in the
+# assets directory for reference.
+
+import os  # Used to read the California State Parks url override.
+import re  # Used to match regex patterns.
+import requests  # Used to handle request timeouts.
+from stateparks import dataset  # Used to create new park entries.
+from stateparks import extract  # Used to extract park links from the state parks html file.
+from stateparks import fetch  # Used to get the state parks html file.
+
+# California State Parks Url to scrape. Can be overridden with the STATEPARKS_PARKS_URL environment variable.
+PARKS_URL = os.environ.get("STATEPARKS_PARKS_URL", "https://www.parks.ca.gov/?page_id=21805")
+LISTING_TTL = 0  # Seconds the cached California State Parks html file is used without revalidating.
+
+class ScrapeError(Exception):
+    """Raised when the California State Parks website can't be scraped."""
+
+def fetch_listing(url=PARKS_URL):
+    """Getting the California State Parks html file. Revalidates the cached html file on every run."""
+    try:
+        response = fetch.get(url, LISTING_TTL)
+    except requests.exceptions.Timeout as e:
+        raise ScrapeError("Request Timeout") from e
+    except fetch.FetchError as e:
+        raise ScrapeError(str(e)) from e
+    if response["status"] != 200:
+        raise ScrapeError("Request failed with status " + str(response["status"]))
+    if response["cached"]:
+        print("... using cached California State Parks html file")
+    return response["content"]
+
+def get_park_type(park_name):
+    """Getting the park type from the park name."""
+    for valid_type in dataset.PARKS_TYPES:
+        if valid_type in park_name:
+            return valid_type
+    return dataset.OTHER_PARK_TYPE
+
+def parse_listing(content):
+    """Parsing parks from the California State Parks html file."""
+    parks = []
+    for href, text in extract.extract_listing(content):
+        park_code = href.split("page_id=", 1)[1]
+        park_name = re.sub(r"[^a-zA-ZÀ-ÿ0-9 -.]+", "", text).strip()
+        parks.append({"code": park_code, "name": park_name, "type": get_park_type(park_name)})
+    return parks
+
+def get_overrides_index(overrides_json):
+    """Indexing park overrides by code and by name. Keeps the first override for each code and name."""
+    overrides_index = {"code": {}, "name": {}}
+    if overrides_json:
+        for override in overrides_json["overrides"]:
+            overrides_index["code"].setdefault(override["code"], override)
+            overrides_index["name"].setdefault(override["name"], override)
+    return overrides_index
+
+def add_overrides(park, overrides_index):
+    """Adds park overrides if available."""
+    alc = overrides_index["code"].get(park["code"])
+    aln = overrides_index["name"].get(park["name"])
+    if alc is not None and alc is aln:
+        return {"code": park["code"], "name": alc["alias"], "type": alc.get("type", park["type"])}
+    return {"code": park["code"], "name": park["name"], "type": park["type"]}
+
+def verify_unique(parks):
+    """Verifying parks name's and id's are unique."""
+    codes = set()
+    names = set()
+    for park in parks:
+        if park["code"] in codes:
+            raise ScrapeError("Duplicate parks with code (" + park["code"] + ") in park website")
+        if park["name"] in names:
+            raise ScrapeError("Duplicate parks with name (" + park["name"] + ") in park website")
+        codes.add(park["code"])
+        names.add(park["name"])
+
+def scrape_parks(overrides_json=None, url=PARKS_URL):
+    """Scraping California State Parks website. Returns parks with overrides applied."""
+    overrides_index = get_overrides_index(overrides_json)
+    new_parks_data = [add_overrides(park, overrides_index) for park in parse_listing(fetch_listing(url))]
+    # Verify new parks data name and id are unique.
+    print("Verifying California State Parks website parks name's and id's are unique")
+    verify_unique(new_parks_data)
+    return new_parks_data
+
+def diff_parks(parks, new_parks_data):
+    """Comparing parks.json parks with new parks data in a single pass over each list.
+
+    Returns a dict of lists. "added" holds new parks data, "renamed" and "recoded" hold {"park", "name"} and
+    {"park", "code"} entries pointing at the existing park, and "removed" and "unchanged" hold existing parks.
+    """
+    parks_by_code = {}
+    parks_by_name = {}
+    for park in parks:
+        parks_by_code.setdefault(park["code"], park)
+        parks_by_name.setdefault(park["name"], park)
+    diff = {"added": [], "renamed": [], "recoded": [], "removed": [], "unchanged": []}
+    matched = set()
+    for park in new_parks_data:
+        opc = parks_by_code.get(park["code"])
+        opn = parks_by_name.get(park["name"])
+        if opc is not None and opc is opn:  # Same code same name.
+            diff["unchanged"].append(opc)
+            matched.add(id(opc))
+        elif opc is not None:  # Same code new name.
+            diff["renamed"].append({"park": opc, "name": park["name"]})
+            matched.add(id(opc))
+        elif opn is not None:  # Same name new code.
+            diff["recoded"].append({"park": opn, "code": park["code"]})
+            matched.add(id(opn))
+        else:  # New name new code.
+            diff["added"].append(park)
+    diff["removed"] = [park for park in parks if id(park) not in matched]
+    return diff
+
+def print_parks_diff(diff):
+    """Prints the number of parks per change."""
+    print(", ".join(str(len(diff[kind])) + " " + kind for kind in diff) + " park(s)")
+
+def update_parks(parks_json, new_parks_data, confirm, get_coords):
+    """Modifying parks.json with new parks data. Returns the parks diff.
+
+    confirm(kind, message, change) is called to accept a rename, recode, or removal and get_coords(code, name) is called
+    to get the coordinates of new parks. The change dict holds the park "code" and "name" and the new "value" for a
+    rename or recode.
+    """
+    if not parks_json["parks"]:
+        # Creating fresh parks.json build.
+        print("Adding park data to parks.json")
+    else:
+        # Modifying existing parks.json with new data.
+        print("Modifying parks.json with new data")
+    diff = diff_parks(parks_json["parks"], new_parks_data)
+    print_parks_diff(diff)
+    for rename in diff["renamed"]:
+        opc = rename["park"]
+        message = (
+            'Park "' + opc["name"] + " (" + opc["code"] + ')" has name "' + rename["name"]
+            + '" on California State Parks site'
+        )
+        if confirm("rename", message, {"code": opc["code"], "name": opc["name"], "value": rename["name"]}):
+            print("Accepting changes")
+            opc["name"] = rename["name"]
+        else:
+            print("Keeping current name")
+    for recode in diff["recoded"]:
+        opn = recode["park"]
+        message = (
+            'Park "' + opn["name"] + " (" + opn["code"] + ')" has code (' + recode["code"]
+            + ") on California State Parks site"
+        )
+        if confirm("recode", message, {"code": opn["code"], "name": opn["name"], "value": recode["code"]}):
+            print("Accepting changes")
+            opn["code"] = recode["code"]
+        else:
+            print("Keeping current code")
+    for park in diff["added"]:
+        coordinates = get_coords(park["code"], park["name"])
+        parks_json["parks"].append(dataset.new_park_entry(park["code"], park["name"], park["type"], coordinates))
+    # Prompting user to delete parks that are not included in website.
+    removed = set()
+    for park in diff["removed"]:
+        message = (
+            park["name"]
+            + " no longer exists on California State Parks site."
+            + " Remove park from parks.json and svg images from image directories"
+        )
+        if confirm("remove", message, {"code": park["code"], "name": park["name"]}):
+            removed.add(id(park))
+    if removed:
+        parks_json["parks"] = [park for park in parks_json["parks"] if id(park) not in removed]
+    # Alphabetically sorting parks_json by name.
+    parks_json["parks"].sort(key=lambda x: x["name"])
+    return diff
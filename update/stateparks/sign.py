@@ -0,0 +1,448 @@
+"""sign.py generates California State Park sign and overlay svg images."""
+
+# Svg images are only rendered again for parks whose name or sign settings changed since the last run. This is tracked
+# in manifest.json, which stores a hash of each park's name and the font, dimension, and color settings keyed by park
+# code. Each park's sign and overlay are rendered as a separate task in a process pool, and parks whose names don't fit
+# are reported together once every other park has been rendered.
+#
+# In compact mode text is drawn as glyphs so each distinct glyph outline is written once and reused, then the svg is
+# compacted by svgmin.py with coordinates rounded to compact_precision decimal places.
+
+import hashlib  # Used to hash svg settings for manifest.json.
+import json  # Used for loading manifest.json file.
+import os  # Used to process directories and files.
+import shutil  # Used to recursively remove contents of a directory.
+from concurrent.futures import ProcessPoolExecutor  # Used to render svg images in parallel.
+import cairo  # Used to create svg images.
+from stateparks import dataset  # Used to save manifest.json file.
+from stateparks import layout  # Used to measure text with a memoized text extents cache.
+from stateparks import paths  # Used to locate the image directories and cache files.
+from stateparks import svgmin  # Used to compact svg images.
+
+# pylint: disable=E1101
+# pylint: disable=C0103
+# pylint: disable=W0603
+
+class SignError(Exception):
+    """Raised when a park name can't be laid out on a sign or overlay svg."""
+
+def hex_to_rgb(hex_color):
+    """Converts hex color string to rgb decimal format."""
+    return {
+        "r": (int(hex_color[1:3], 16) / 255),
+        "g": (int(hex_color[3:5], 16) / 255),
+        "b": (int(hex_color[5:7], 16) / 255),
+    }
+
+def set_font(context, preset, color):
+    """Setting font context."""
+    context.set_source_rgb(color["r"], color["g"], color["b"])
+    context.set_font_size(font_settings["sizes"][preset]["size"])
+    context.select_font_face(font_settings["font"], font_settings["slant"], font_settings["weight"])
+
+def draw_text(context, text):
+    """Drawing text. Compact mode draws glyphs so Cairo writes each glyph outline once and reuses it."""
+    if compact:
+        context.show_text(text)
+    else:
+        context.text_path(text)
+        context.fill()
+
+def finish_svg(surface, path):
+    """Finishing svg surface and compacting the svg file in compact mode."""
+    surface.finish()
+    if compact:
+        svgmin.compact_svg_file(path, compact_precision)
+
+def get_text_box_data(line, size, dimension):
+    """Getting text box data from the text extents cache."""
+    return_types = ["x", "y", "width", "height", "dx", "dy"]
+    text_box_data = layout.get_text_extents(line, size, font_settings)
+    return text_box_data[return_types.index(dimension)]
+
+def get_line_data_max(line):
+    """Getting line data using the largest font size that will fit."""
+    line_width = get_text_box_data(line, "large", "width")
+    line_size = "large"
+    if line_width > m_w:
+        line_width = get_text_box_data(line, "medium", "width")
+        line_size = "medium"
+        if line_width > m_w:
+            line_width = get_text_box_data(line, "small", "width")
+            line_size = "small"
+            if line_width > m_w:
+                raise SignError(line + " is too long for one line. Adjustments needed")
+    return {"line": line, "width": line_width, "size": line_size}
+
+def get_line_data(line, size):
+    """Getting line data at a specific size."""
+    if size == "large":
+        line_width = get_text_box_data(line, "large", "width")
+    elif size == "medium":
+        line_width = get_text_box_data(line, "medium", "width")
+    elif size == "small":
+        line_width = get_text_box_data(line, "small", "width")
+    else:
+        raise SignError('The size provided: "' + size + '" is not "large", "medium", or "small"')
+    if line_width > m_w:
+        raise SignError(line + " is too long for one line. Adjustments needed")
+    return {"line": line, "width": line_width, "size": size}
+
+def get_max_height(size):
+    """Getting the max height of a font."""
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZÁÉÍÓÚÑabcdefghijklmnopqrstuváéíóúñ"
+    return get_text_box_data(alphabet, size, "height")
+
+def create_overlay_svg(code, name, directory):
+    """Creating state park svg overlay."""
+    svg_path = os.path.join(directory, code + ".svg")
+    surface = cairo.SVGSurface(svg_path, w, h)
+    context = cairo.Context(surface)
+    # Adding debugging features.
+    if debug:
+        # Creating background.
+        context.set_source_rgb(parks_yellow["r"], parks_yellow["g"], parks_yellow["b"])
+        context.rectangle(0, 0, w, h)
+        context.fill()
+        # Creating test background to show margin.
+        debug_pink = hex_to_rgb("#FC0FC0")
+        context.set_source_rgb(debug_pink["r"], debug_pink["g"], debug_pink["b"])
+        context.rectangle(m, m, m_w, m_h)
+        context.fill()
+        # Drawing test rectangles. To show text height.
+        dg_1_color = hex_to_rgb("#0a7491")
+        dg_2_color = hex_to_rgb("#0d91b6")
+        dg_3_color = hex_to_rgb("#55b2cb")
+        dg_4_color = hex_to_rgb("#86c8da")
+        for i in range(m, h - m, line_h_sm):
+            if (i - m) % (line_h_sm * 2) == 0:
+                context.set_source_rgb(dg_1_color["r"], dg_1_color["g"], dg_1_color["b"])
+            else:
+                context.set_source_rgb(dg_2_color["r"], dg_2_color["g"], dg_2_color["b"])
+            context.rectangle(m, i, m_w / 2, line_h_sm)
+            context.fill()
+        for i in range(int(m + (line_h_sm / 2)), int(h - m - (line_h_sm / 2)), line_h_sm):
+            if (i - int(m + (line_h_sm / 2))) % (line_h_sm * 2) == 0:
+                context.set_source_rgb(dg_3_color["r"], dg_3_color["g"], dg_3_color["b"])
+            else:
+                context.set_source_rgb(dg_4_color["r"], dg_4_color["g"], dg_4_color["b"])
+            context.rectangle(m + m_w / 2, i, m_w / 2, line_h_sm)
+            context.fill()
+        context.set_source_rgb(dg_4_color["r"], dg_4_color["g"], dg_4_color["b"])
+        context.rectangle(m + m_w / 2, m, m_w / 2, line_h_sm / 2)
+        context.rectangle(m + m_w / 2, h - m - (line_h_sm / 2), m_w / 2, line_h_sm / 2)
+        context.fill()
+    # Handling splitting text into lines and wrapping text.
+    words = name.split()
+    lines = []
+    if len(words) == 1:
+        lines.append(get_line_data(words[0], "small"))
+    else:
+        cur_line = words[0]
+        for i in range(len(words) - 1):
+            if get_text_box_data(cur_line + " " + words[i + 1], "small", "width") > m_w:
+                line_data = get_line_data(cur_line, "small")
+                lines.append(line_data)
+                cur_line = words[i + 1]
+            else:
+                cur_line = cur_line + " " + words[i + 1]
+            if i == len(words) - 2:
+                line_data = get_line_data(cur_line, "small")
+                lines.append(line_data)
+    # Checking to see if park name is able to fit within height of sign.
+    total_height = len(lines) * line_h_sm
+    park_name_code = name + " (" + code + ")"
+    if total_height > m_h:
+        raise SignError(park_name_code + " name too big for overlay svg. Adjustments needed")
+    # Issuing warning if park overlay text is more than 4 lines.
+    if len(lines) > 4:
+        print("Warning. Reduce " + park_name_code + " name to fit within 4 lines in overlay svg")
+    # Drawing overlay background.
+    context.set_source_rgb(parks_yellow["r"], parks_yellow["g"], parks_yellow["b"])
+    context.rectangle(m, m, m_w, len(lines) * line_h_sm)
+    context.fill()
+    # Drawing overlay text.
+    start_height = m
+    font_size = "small"
+    font_offset = font_settings["sizes"][font_size]["overlay-offset"]
+    set_font(context, font_size, parks_brown)
+    for i, line in enumerate(lines):
+        context.move_to(w / 2 - line["width"] / 2, start_height + line_h_sm * (i + 1) - font_offset)
+        draw_text(context, line["line"])
+    finish_svg(surface, svg_path)
+
+def create_sign_svg(code, name, directory):
+    """Creating state park svg sign."""
+    svg_path = os.path.join(directory, code + ".svg")
+    surface = cairo.SVGSurface(svg_path, w, h)
+    context = cairo.Context(surface)
+    # Adding debugging features.
+    if debug:
+        # Creating background.
+        context.set_source_rgb(parks_yellow["r"], parks_yellow["g"], parks_yellow["b"])
+        context.rectangle(0, 0, w, h)
+        context.fill()
+        # Creating test background to show margin.
+        debug_pink = hex_to_rgb("#FC0FC0")
+        context.set_source_rgb(debug_pink["r"], debug_pink["g"], debug_pink["b"])
+        context.rectangle(m, m, m_w, m_h)
+        context.fill()
+        # Drawing test rectangles. To show text height.
+        dg_1_color = hex_to_rgb("#0a7491")
+        dg_2_color = hex_to_rgb("#0d91b6")
+        dg_3_color = hex_to_rgb("#55b2cb")
+        dg_4_color = hex_to_rgb("#86c8da")
+        for i in range(m, h - m, line_h):
+            if (i - m) % (line_h * 2) == 0:
+                context.set_source_rgb(dg_1_color["r"], dg_1_color["g"], dg_1_color["b"])
+            else:
+                context.set_source_rgb(dg_2_color["r"], dg_2_color["g"], dg_2_color["b"])
+            context.rectangle(m, i, m_w / 2, line_h)
+            context.fill()
+        for i in range(int(m + (line_h / 2)), int(h - m - (line_h / 2)), line_h):
+            if (i - int(m + (line_h / 2))) % (line_h * 2) == 0:
+                context.set_source_rgb(dg_3_color["r"], dg_3_color["g"], dg_3_color["b"])
+            else:
+                context.set_source_rgb(dg_4_color["r"], dg_4_color["g"], dg_4_color["b"])
+            context.rectangle(m + m_w / 2, i, m_w / 2, line_h)
+            context.fill()
+        context.set_source_rgb(dg_4_color["r"], dg_4_color["g"], dg_4_color["b"])
+        context.rectangle(m + m_w / 2, m, m_w / 2, line_h / 2)
+        context.rectangle(m + m_w / 2, h - m - (line_h / 2), m_w / 2, line_h / 2)
+        context.fill()
+    # Handling splitting text into lines and wrapping text.
+    words = name.split()
+    lines = []
+    if len(words) == 1:
+        lines.append(get_line_data_max(words[0]))
+    else:
+        cur_line = words[0]
+        for i in range(len(words) - 1):
+            if get_text_box_data(cur_line + " " + words[i + 1], "large", "width") > m_w:
+                line_data = get_line_data_max(cur_line)
+                lines.append(line_data)
+                cur_line = words[i + 1]
+            else:
+                cur_line = cur_line + " " + words[i + 1]
+            if i == len(words) - 2:
+                line_data = get_line_data_max(cur_line)
+                lines.append(line_data)
+    # Checking to see if park name is able to fit within height of sign.
+    total_height = len(lines) * line_h
+    park_name_code = name + " (" + code + ")"
+    if total_height > m_h:
+        raise SignError(park_name_code + " name too big for sign svg. Adjustments needed")
+    # Issuing warning if park sign text is more than 4 lines.
+    if len(lines) > 4:
+        print("Warning. Reduce " + park_name_code + " name to fit within 4 lines in sign svg")
+    # Printing lines on sign.
+    start_height = ((m_h - total_height) / 2) + m
+    for i, line in enumerate(lines):
+        font_size = line["size"]
+        font_offset = font_settings["sizes"][font_size]["sign-offset"]
+        set_font(context, font_size, parks_brown)
+        context.move_to(w / 2 - line["width"] / 2, start_height + line_h * (i + 1) - font_offset)
+        draw_text(context, line["line"])
+    finish_svg(surface, svg_path)
+
+def render_park_svgs(code, name):
+    """Creating state park svg sign and overlay. Returns a list of error messages."""
+    errors = []
+    try:
+        create_sign_svg(code, name, parks_directory)
+    except SignError as s_e:
+        errors.append(str(s_e))
+    try:
+        create_overlay_svg(code, name, overlay_directory)
+    except SignError as s_e:
+        errors.append(str(s_e))
+    return errors
+
+def set_output_settings(compact_setting, compact_precision_setting):
+    """Setting svg output settings. Used to pass settings to process pool workers."""
+    global compact
+    global compact_precision
+    compact = compact_setting
+    compact_precision = compact_precision_setting
+
+def init_render_worker(compact_setting, compact_precision_setting, extents):
+    """Process pool worker setup. Passes svg output settings and the text extents cache to each worker."""
+    set_output_settings(compact_setting, compact_precision_setting)
+    layout.merge_extents(extents)
+
+def render_park_task(code, name):
+    """Process pool task creating state park svg sign and overlay. Returns errors and text extents measured."""
+    layout.reset_cache_stats()
+    errors = render_park_svgs(code, name)
+    return {"errors": errors, "extents": layout.pop_new_extents(), "stats": layout.get_cache_stats()}
+
+def render_parks_svgs(parks, jobs=1):
+    """Creating state park svg signs and overlays for a list of parks. Returns a dict of error messages by park code."""
+    codes = [park["code"] for park in parks]
+    names = [park["name"] for park in parks]
+    if jobs > 1 and len(parks) > 1:
+        results = []
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=init_render_worker,
+            initargs=(compact, compact_precision, layout.extents_cache),
+        ) as executor:
+            for task in executor.map(render_park_task, codes, names, chunksize=4):
+                layout.merge_extents(task["extents"], task["stats"]["hits"], task["stats"]["misses"])
+                results.append(task["errors"])
+    else:
+        results = [render_park_svgs(code, name) for code, name in zip(codes, names)]
+    return {code: errors for code, errors in zip(codes, results) if errors}
+
+def print_cache_stats():
+    """Prints text extents cache counters."""
+    stats = layout.get_cache_stats()
+    print(
+        "Text extents cache: "
+        + str(stats["hits"])
+        + " hit(s), "
+        + str(stats["misses"])
+        + " miss(es), "
+        + str(stats["entries"])
+        + " entries"
+    )
+
+def print_svg_errors(svg_errors):
+    """Prints the errors gathered while creating svg images."""
+    if svg_errors:
+        print("Failed to create svg images for " + str(len(svg_errors)) + " park(s):")
+        for code, errors in svg_errors.items():
+            for error in errors:
+                print("  (" + code + ") " + error)
+
+def get_svg_hash(name):
+    """Getting a hash of the park name and every setting that affects its svg images."""
+    svg_settings = {
+        "name": name,
+        "font": font_settings,
+        "dimensions": {"w": w, "h": h, "m": m, "line_h": line_h, "line_h_sm": line_h_sm},
+        "colors": {"yellow": parks_yellow, "brown": parks_brown},
+        "debug": debug,
+        "compact": compact,
+        "precision": compact_precision if compact else None,
+    }
+    return hashlib.sha256(json.dumps(svg_settings, sort_keys=True).encode("utf-8")).hexdigest()
+
+def load_manifest():
+    """Loading manifest.json file. Returns an empty manifest if missing or invalid."""
+    if os.path.isfile(manifest_path):
+        with open(manifest_path, encoding="utf-8") as manifest_json_file:
+            try:
+                return json.load(manifest_json_file)
+            except ValueError as e:
+                print("Invalid manifest.json file: " + str(e) + ". Rebuilding all svg images")
+    return {}
+
+def save_manifest(manifest):
+    """Outputting manifest.json file."""
+    dataset.save_json(dict(sorted(manifest.items())), manifest_path)
+
+def sync_parks_svgs(parks, jobs=1):
+    """Creating svg images for parks that changed since the last build and removing orphaned svg images."""
+    manifest = load_manifest()
+    new_manifest = {}
+    changed_parks = []
+    for park in parks:
+        svg_hash = get_svg_hash(park["name"])
+        if (
+            manifest.get(park["code"]) == svg_hash
+            and os.path.isfile(os.path.join(parks_directory, park["code"] + ".svg"))
+            and os.path.isfile(os.path.join(overlay_directory, park["code"] + ".svg"))
+        ):
+            new_manifest[park["code"]] = svg_hash
+        else:
+            changed_parks.append(park)
+    print("Creating svg images for " + str(len(changed_parks)) + " changed park(s)")
+    layout.load_cache(extents_cache_path)
+    svg_errors = render_parks_svgs(changed_parks, jobs)
+    layout.save_cache(extents_cache_path)
+    print_cache_stats()
+    for park in changed_parks:
+        if park["code"] not in svg_errors:
+            new_manifest[park["code"]] = get_svg_hash(park["name"])
+    # Removing svg images for parks that no longer exist.
+    codes = {park["code"] for park in parks}
+    for directory in [parks_directory, overlay_directory]:
+        for filename in os.listdir(directory):
+            if filename.endswith(".svg") and filename[: -len(".svg")] not in codes:
+                print("Removing orphaned svg image " + paths.display(os.path.join(directory, filename)))
+                os.remove(os.path.join(directory, filename))
+    save_manifest(new_manifest)
+    return svg_errors
+
+def create_park_svgs(code, name):
+    """Creating svg sign and overlay for a single park and recording it in manifest.json. Returns error messages."""
+    layout.load_cache(extents_cache_path)
+    svg_errors = render_park_svgs(code, name)
+    layout.save_cache(extents_cache_path)
+    if not svg_errors:
+        park_manifest = load_manifest()
+        park_manifest[code] = get_svg_hash(name)
+        save_manifest(park_manifest)
+    return svg_errors
+
+def clear_directory(path):
+    """Clears contents in a directory."""
+    for filename in os.listdir(path):
+        file_path = os.path.join(path, filename)
+        if os.path.isfile(file_path) or os.path.islink(file_path):
+            os.unlink(file_path)
+        elif os.path.isdir(file_path):
+            shutil.rmtree(file_path)
+
+def clear_parks_svgs():
+    """Removing all svg images from the parks and overlay image directories and clearing manifest.json."""
+    clear_directory(parks_directory)
+    clear_directory(overlay_directory)
+    save_manifest({})
+
+# Set to True to include debugging features.
+debug = False
+
+# Set to True to write compact svg images with deduplicated glyphs and rounded coordinates.
+compact = False
+compact_precision = 2  # Decimal places kept in compact svg coordinates.
+
+# Output directories for svg images.
+parks_directory = paths.PARKS_IMAGES_DIR
+overlay_directory = paths.OVERLAY_IMAGES_DIR
+
+# Build manifest of svg hashes by park code, stored next to parks.json.
+manifest_path = paths.MANIFEST_JSON
+
+# Text extents cache shared across parks and runs (layout.py).
+extents_cache_path = paths.EXTENTS_JSON
+
+# Dimensions settings (values were chosen based on the 3:4 photo aspect ratio).
+w = 975  # svg width.
+h = 1300  # svg height.
+m = 50  # svg margin.
+m_w = w - (2 * m)  # svg width accounting for margins.
+m_h = h - (2 * m)  # svg height accounting for margins.
+line_h = 150  # svg line height normal.
+line_h_sm = 120  # svg line height small.
+
+# Color settings.
+parks_yellow = hex_to_rgb("#FCC917")
+parks_brown = hex_to_rgb("#592626")
+
+# Font settings.
+font_settings = {
+    "font": "Formata",
+    "slant": cairo.FONT_SLANT_NORMAL,
+    "weight": cairo.FONT_WEIGHT_NORMAL,
+    "sizes": {
+        "large": {"size": 125, "sign-offset": 30},
+        "medium": {"size": 100, "sign-offset": 40},
+        "small": {
+            "size": 90,
+            "sign-offset": 46,
+            "overlay-offset": 29,
+        },
+    },
+}
@@ -0,0 +1,46 @@
+"""sprite.py combines park overlay svg images into a single svg sprite."""
+
+# This module is used by pages.py to combine the overlay svg images of parks that use the overlay option into a single
+# svg sprite. Each overlay is added as a <symbol id="o-<code>"> element so the html can reference every overlay from one
+# cacheable file using <use href="<sprite>#o-<code>">. Ids inside each overlay (such as Cairo glyph ids) are prefixed
+# with the symbol id so they are unique within the sprite.
+
+import os  # Used to build svg file paths and replace the sprite once written.
+import re  # Used to match svg elements and ids.
+from stateparks import paths  # Used to print file paths.
+
+SVG_ROOT_RE = re.compile(r"<svg\b([^>]*)>(.*)</svg>", re.DOTALL)  # Root svg element and its contents.
+VIEWBOX_RE = re.compile(r'viewBox="([^"]*)"')  # Root svg viewBox attribute.
+
+def get_symbol_id(code):
+    """Getting the sprite symbol id for a park code."""
+    return "o-" + code
+
+def svg_to_symbol(svg, symbol_id):
+    """Converts an svg image to a symbol element with ids prefixed by the symbol id."""
+    root = SVG_ROOT_RE.search(svg)
+    if root is None:
+        raise ValueError("No svg element found for " + symbol_id)
+    view_box = VIEWBOX_RE.search(root.group(1))
+    content = root.group(2)
+    content = re.sub(r'\bid="([^"]+)"', lambda m: 'id="' + symbol_id + "-" + m.group(1) + '"', content)
+    content = re.sub(r'href="#([^"]+)"', lambda m: 'href="#' + symbol_id + "-" + m.group(1) + '"', content)
+    content = re.sub(r"url\(#([^)]+)\)", lambda m: "url(#" + symbol_id + "-" + m.group(1) + ")", content)
+    view_box_attr = ' viewBox="' + view_box.group(1) + '"' if view_box else ""
+    return '<symbol id="' + symbol_id + '"' + view_box_attr + ">" + content.strip() + "</symbol>"
+
+def build_overlay_sprite(codes, overlay_directory, sprite_path):
+    """Building an svg sprite from the overlay svg images of a list of park codes."""
+    symbols = []
+    for code in codes:
+        with open(os.path.join(overlay_directory, code + ".svg"), encoding="utf-8") as svg_file:
+            symbols.append(svg_to_symbol(svg_file.read(), get_symbol_id(code)))
+    # Writing the sprite to a temporary file first, so pages never reference a half written sprite.
+    with open(sprite_path + ".tmp", "w", encoding="utf-8") as outfile:
+        outfile.write(
+            '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">\n'
+            + "\n".join(symbols)
+            + "\n</svg>\n"
+        )
+    os.replace(sprite_path + ".tmp", sprite_path)
+    print(f"... wrote {paths.display(sprite_path)}")
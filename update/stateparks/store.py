@@ -0,0 +1,190 @@
+"""store.py keeps the park dataset in a SQLite database as an alternative to parks.json."""
+
+# parks.json stores every park as a nested object with eight {share, photo} pairs, most of them empty, and the update
+# scripts parse and rewrite the whole file every time. The SQLite store keeps the same data in two tables:
+#
+# parks   One row per park with its code, name, type, coordinates, visited and overlay flags, and its position in the
+#         park list. Parks are looked up by code and by name through indexes.
+# photos  One row per park photo with a share or photo link, keyed by park code, photo type, and variant. Photos without
+#         links aren't stored.
+#
+# The first and last name are stored in a meta table. Saving a parks.json dict compares it with the stored rows and only
+# writes the parks and photos that changed, all in a single transaction, so an interrupted save leaves the previous data
+# in place. Single parks can also be read and updated by code without loading the whole dataset.
+#
+# The store is used in place of parks.json when the STATEPARKS_DATASET environment variable is set to sqlite (see
+# dataset.py). parks.json stays the format for editing by hand and for sharing. Running this module imports parks.json
+# into parks.db or exports parks.db back to parks.json.
+#
+# Example: [python -m stateparks.store export]
+
+import argparse  # Used to process command line arguments.
+import os  # Used to check for parks.db.
+import sqlite3  # Used to store the park dataset.
+from stateparks import dataset  # Used to create park entries and convert parks.json files.
+from stateparks import paths  # Used to locate parks.db.
+
+PARK_FIELDS = ["name", "type", "coordinates", "visited", "overlay"]  # Park fields stored in the parks table.
+VARIANTS = ["encrypt", "guest"]  # Photo link variants in parks.json.
+# Updating a park in place, since replacing its row would delete its photos.
+PARK_UPSERT = """
+INSERT INTO parks VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (code) DO UPDATE SET
+position = excluded.position, name = excluded.name, type = excluded.type, coordinates = excluded.coordinates,
+visited = excluded.visited, overlay = excluded.overlay
+"""
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS parks (
+    code TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    coordinates TEXT NOT NULL,
+    visited INTEGER NOT NULL,
+    overlay INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS parks_name ON parks (name);
+CREATE INDEX IF NOT EXISTS parks_position ON parks (position);
+CREATE TABLE IF NOT EXISTS photos (
+    code TEXT NOT NULL REFERENCES parks (code) ON DELETE CASCADE,
+    photo_type TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    share TEXT NOT NULL,
+    photo TEXT NOT NULL,
+    PRIMARY KEY (code, photo_type, variant)
+);
+"""
+
+def open_store(path=paths.PARKS_DB):
+    """Opening the park database, creating its tables if needed."""
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.executescript(SCHEMA)
+    return connection
+
+def get_park_row(park, position):
+    """Getting the parks table row of a park."""
+    visited = int(park["visited"])
+    overlay = int(park["overlay"])
+    return (park["code"], position, park["name"], park["type"], park["coordinates"], visited, overlay)
+
+def get_photo_rows(park):
+    """Getting the photos table rows of a park's photos with a link."""
+    rows = []
+    for photo_type in dataset.PHOTO_TYPES:
+        for variant in VARIANTS:
+            photo = park["photos"][photo_type][variant]
+            if photo["share"] != "" or photo["photo"] != "":
+                rows.append((park["code"], photo_type, variant, photo["share"], photo["photo"]))
+    return rows
+
+def new_park(row):
+    """Creating a park entry from a parks table row without photos."""
+    code, _, name, park_type, coordinates, visited, overlay = row
+    park = dataset.new_park_entry(code, name, park_type, coordinates)
+    park["visited"] = bool(visited)
+    park["overlay"] = bool(overlay)
+    return park
+
+def add_photo(parks, row):
+    """Adding a photos table row to its park."""
+    code, photo_type, variant, share, photo = row
+    parks[code]["photos"][photo_type][variant] = {"share": share, "photo": photo}
+
+def load_parks_json(connection):
+    """Loading the whole dataset as a parks.json dict."""
+    meta = dict(connection.execute("SELECT key, value FROM meta"))
+    parks = {}
+    for row in connection.execute("SELECT * FROM parks ORDER BY position"):
+        parks[row[0]] = new_park(row)
+    for row in connection.execute("SELECT code, photo_type, variant, share, photo FROM photos"):
+        add_photo(parks, row)
+    return {"firstname": meta.get("firstname", ""), "lastname": meta.get("lastname", ""), "parks": list(parks.values())}
+
+def save_parks_json(connection, parks_json):
+    """Saving a parks.json dict, only writing the parks and photos that changed. Returns the number of rows written."""
+    park_rows = {}
+    photo_rows = {}
+    for position, park in enumerate(parks_json["parks"]):
+        park_rows[park["code"]] = get_park_row(park, position)
+        for row in get_photo_rows(park):
+            photo_rows[row[:3]] = row
+    with connection:
+        stored_parks = {row[0]: row for row in connection.execute("SELECT * FROM parks")}
+        stored_photos = {row[:3]: row for row in connection.execute("SELECT * FROM photos")}
+        removed_parks = [(code,) for code in stored_parks.keys() - park_rows.keys()]
+        changed_parks = [row for code, row in park_rows.items() if stored_parks.get(code) != row]
+        removed_photos = [key for key in stored_photos.keys() - photo_rows.keys() if key[0] in park_rows]
+        changed_photos = [row for key, row in photo_rows.items() if stored_photos.get(key) != row]
+        connection.executemany("DELETE FROM parks WHERE code = ?", removed_parks)
+        connection.executemany(PARK_UPSERT, changed_parks)
+        connection.executemany("DELETE FROM photos WHERE code = ? AND photo_type = ? AND variant = ?", removed_photos)
+        connection.executemany("INSERT OR REPLACE INTO photos VALUES (?, ?, ?, ?, ?)", changed_photos)
+        connection.executemany(
+            "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+            [("firstname", parks_json["firstname"]), ("lastname", parks_json["lastname"])],
+        )
+    return len(removed_parks) + len(changed_parks) + len(removed_photos) + len(changed_photos)
+
+def get_park(connection, code=None, name=None):
+    """Getting a single park by code or by name. Returns None if there is no such park."""
+    column, value = ("code", code) if code is not None else ("name", name)
+    row = connection.execute("SELECT * FROM parks WHERE " + column + " = ?", (value,)).fetchone()
+    if row is None:
+        return None
+    park = new_park(row)
+    for photo_row in connection.execute("SELECT * FROM photos WHERE code = ?", (row[0],)):
+        add_photo({row[0]: park}, photo_row)
+    return park
+
+def update_park(connection, code, fields):
+    """Updating the name, type, coordinates, visited, or overlay fields of a single park."""
+    unknown = set(fields) - set(PARK_FIELDS)
+    if unknown:
+        raise ValueError("Unknown park fields: " + ", ".join(sorted(unknown)))
+    values = [int(value) if isinstance(value, bool) else value for value in fields.values()]
+    with connection:
+        connection.execute(
+            "UPDATE parks SET " + ", ".join(field + " = ?" for field in fields) + " WHERE code = ?", values + [code]
+        )
+
+def update_photo(connection, code, photo_type, variant, share=None, photo=None):
+    """Updating the share link or photo link of a single park photo. Links left as None are kept."""
+    with connection:
+        key = (code, photo_type, variant)
+        row = connection.execute(
+            "SELECT share, photo FROM photos WHERE code = ? AND photo_type = ? AND variant = ?", key
+        ).fetchone() or ("", "")
+        share = row[0] if share is None else share
+        photo = row[1] if photo is None else photo
+        if share == "" and photo == "":
+            connection.execute("DELETE FROM photos WHERE code = ? AND photo_type = ? AND variant = ?", key)
+        else:
+            connection.execute("INSERT OR REPLACE INTO photos VALUES (?, ?, ?, ?, ?)", key + (share, photo))
+
+# Running file from command line.
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Imports parks.json into parks.db or exports parks.db to parks.json")
+    parser.add_argument("command", help="import or export", choices=["import", "export"])
+    args = vars(parser.parse_args())
+    if args["command"] == "import":
+        print("Importing parks.json into parks.db")
+        try:
+            parks_json = dataset.load_json(paths.PARKS_JSON)
+        except dataset.DatasetError as e:
+            print(e)
+        else:
+            store = open_store()
+            try:
+                print("... wrote " + str(save_parks_json(store, parks_json)) + " changed row(s)")
+            finally:
+                store.close()
+    elif not os.path.isfile(paths.PARKS_DB):
+        print("File parks.db doesn't exist")
+    else:
+        print("Exporting parks.db to parks.json")
+        store = open_store()
+        try:
+            dataset.save_json(load_parks_json(store), paths.PARKS_JSON)
+        finally:
+            store.close()
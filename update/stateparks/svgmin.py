@@ -0,0 +1,70 @@
+"""svgmin.py compacts svg images created by Cairo."""
+
+# This module is used by sign.py to shrink the svg images Cairo creates. When text is drawn with show_text Cairo writes
+# each distinct glyph outline once in the svg defs and places it with <use> elements. This module rounds coordinates to
+# a configurable precision, replaces Cairo's percentage rgb colors with hex colors, removes attributes that are already
+# the svg default, shortens glyph ids, and removes whitespace between elements. Transform matrices aren't rounded since
+# they scale everything they are applied to, so rounding a scale of 0.123456 to 0.12 would move the far edge of a placed
+# image by several pixels.
+
+import os  # Used to replace svg files once compacted.
+import re  # Used to match svg attributes.
+
+# Cairo color values. Example: rgb(34.901961%, 14.901961%, 14.901961%).
+RGB_RE = re.compile(r"rgb\(\s*([\d.]+)%\s*,\s*([\d.]+)%\s*,\s*([\d.]+)%\s*\)")
+# Attributes holding coordinates that can be rounded. Transforms are left out since rounding scales them.
+COORD_ATTR_RE = re.compile(r'\b(d|x|y|width|height)="([^"]*)"')
+# Decimal numbers.
+NUMBER_RE = re.compile(r"-?\d+\.\d+")
+# Glyph ids created by Cairo. Example: glyph0-1 or glyph-0-1.
+GLYPH_ID_RE = re.compile(r'id="(glyph[-\d]+)"')
+# Attributes and styles that are already the svg default.
+DEFAULT_ATTRS = [' fill-rule="nonzero"', ' fill-opacity="1"', ' style="stroke:none;"', "fill-opacity:1;"]
+
+def rgb_to_hex(match):
+    """Converts a Cairo percentage rgb color to a hex color."""
+    return "#" + "".join(f"{round(float(value) * 255 / 100):02x}" for value in match.groups())
+
+def format_number(value, precision):
+    """Rounds a number and removes trailing zeros."""
+    rounded = f"{round(float(value), precision):.{precision}f}"
+    if "." in rounded:
+        rounded = rounded.rstrip("0").rstrip(".")
+    return "0" if rounded == "-0" else rounded
+
+def compact_path(path_data):
+    """Removes whitespace that isn't needed in svg path data."""
+    path_data = re.sub(r"\s*([MLCZHVQSTAmlczhvqsta])\s*", r"\1", path_data)
+    return re.sub(r"\s+(-)", r"\1", path_data).strip()
+
+def compact_svg(svg, precision=2):
+    """Compacts an svg string created by Cairo."""
+    svg = RGB_RE.sub(rgb_to_hex, svg)
+    for default_attr in DEFAULT_ATTRS:
+        svg = svg.replace(default_attr, "")
+    svg = svg.replace(' style=""', "")
+
+    def round_attr(match):
+        value = NUMBER_RE.sub(lambda number: format_number(number.group(0), precision), match.group(2))
+        if match.group(1) == "d":
+            value = compact_path(value)
+        return match.group(1) + '="' + value + '"'
+
+    svg = COORD_ATTR_RE.sub(round_attr, svg)
+    # Shortening glyph ids and their references.
+    glyph_ids = {glyph_id: "g" + str(i) for i, glyph_id in enumerate(dict.fromkeys(GLYPH_ID_RE.findall(svg)))}
+    if glyph_ids:
+        svg = re.sub(
+            r'(id="|href="#)(glyph[-\d]+)"',
+            lambda match: match.group(1) + glyph_ids.get(match.group(2), match.group(2)) + '"',
+            svg,
+        )
+    return re.sub(r">\s+<", "><", svg).strip() + "\n"
+
+def compact_svg_file(path, precision=2):
+    """Compacts an svg file created by Cairo in place. The file is only replaced once the compacted svg is written."""
+    with open(path, encoding="utf-8") as svg_file:
+        svg = svg_file.read()
+    with open(path + ".tmp", "w", encoding="utf-8") as outfile:
+        outfile.write(compact_svg(svg, precision))
+    os.replace(path + ".tmp", path)
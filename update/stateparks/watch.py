@@ -0,0 +1,269 @@
+"""watch.py rebuilds the html files as parks.json, overrides.json, passphrase.txt, and the jinja templates change."""
+
+# The assets directory is watched with inotify on Linux, falling back to checking file modification times every
+# POLL_TIME seconds on other platforms. Editors tend to save a file in several writes, so changes are gathered for
+# SETTLE_TIME seconds before rebuilding. Only the html files depending on the changed files are rebuilt:
+#
+# parks.json, overrides.json, main.html.jinja2  main.html and guest.html right away, then index.html after a delay.
+# passphrase.txt, index.html.jinja2             index.html after a delay.
+# route.json, mirror.json                       Like parks.json when route or mirror is set.
+#
+# Encrypting main.html for index.html is the slow part of a build, so index.html is rebuilt ENCRYPT_DELAY seconds after
+# the last change instead of on every save. Park name aliases and type overrides in overrides.json are normally applied
+# when scraping. While watching they are applied to the parks in parks.json by park code so they can be previewed before
+# the next scrape. Files that fail to load, such as a half edited parks.json, are reported and the last good version is
+# kept.
+#
+# The project directory is served over http while watching so the html files can be previewed in a browser. Responses
+# aren't cached by the browser so a refresh always shows the latest build.
+
+import ctypes  # Used to call inotify.
+import ctypes.util  # Used to find the c library.
+import functools  # Used to set the directory served.
+import http.server  # Used to serve the project directory.
+import os  # Used to process watched files.
+import select  # Used to wait for inotify events.
+import struct  # Used to read inotify events.
+import threading  # Used to serve the project directory in the background.
+import time  # Used to debounce and time rebuilds.
+import jinja2  # Used to catch template errors.
+from stateparks import dataset  # Used for loading parks.json, overrides.json, and passphrase.txt files.
+from stateparks import encrypt  # Used to get the default PBKDF2 iterations.
+from stateparks import pages  # Used to build html files.
+from stateparks import paths  # Used to locate the watched files.
+
+POLL_TIME = 0.5  # Seconds between checking file modification times when inotify isn't available.
+SETTLE_TIME = 0.05  # Seconds to gather changes for after the first change before rebuilding.
+ENCRYPT_DELAY = 2  # Seconds after the last change before rebuilding index.html.
+IN_CLOSE_WRITE = 0x00000008  # Inotify event for a file opened for writing being closed.
+IN_MOVED_TO = 0x00000080  # Inotify event for a file being moved into a watched directory.
+INOTIFY_EVENT = struct.Struct("iIII")  # Inotify event header: watch descriptor, mask, cookie, and name length.
+MAIN_TEMPLATE = os.path.join(paths.UPDATE_DIR, paths.MAIN_TEMPLATE)  # Main page jinja template.
+INDEX_TEMPLATE = os.path.join(paths.UPDATE_DIR, paths.INDEX_TEMPLATE)  # Login page jinja template.
+PREVIEW_FILES = [dataset.get_parks_path(), paths.OVERRIDES_JSON, MAIN_TEMPLATE]  # Files main.html and guest.html use.
+INDEX_FILES = [paths.PASSPHRASE_TXT, INDEX_TEMPLATE]  # Files only index.html depends on.
+
+def create_inotify_watcher(watched_files):
+    """Creating a watcher using inotify. Returns None when inotify isn't available.
+
+    The watcher is a function waiting up to timeout seconds for changes and returning the changed files.
+    """
+    library = ctypes.util.find_library("c")
+    if library is None:
+        return None
+    libc = ctypes.CDLL(library, use_errno=True)
+    if not hasattr(libc, "inotify_init1"):
+        return None
+    descriptor = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    if descriptor < 0:
+        return None
+    directories = {}  # Watched directories by watch descriptor.
+    for directory in sorted({os.path.dirname(path) for path in watched_files}):
+        watch_descriptor = libc.inotify_add_watch(descriptor, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO)
+        if watch_descriptor < 0:
+            os.close(descriptor)
+            return None
+        directories[watch_descriptor] = directory
+
+    def wait(timeout):
+        """Waits for inotify events on the watched files."""
+        changed = set()
+        if not select.select([descriptor], [], [], timeout)[0]:
+            return changed
+        events = os.read(descriptor, 64 * 1024)
+        offset = 0
+        while offset < len(events):
+            watch_descriptor, _, _, name_length = INOTIFY_EVENT.unpack_from(events, offset)
+            offset += INOTIFY_EVENT.size
+            name = os.fsdecode(events[offset : offset + name_length].rstrip(b"\0"))
+            offset += name_length
+            path = os.path.join(directories.get(watch_descriptor, ""), name)
+            if path in watched_files:
+                changed.add(path)
+        return changed
+
+    return wait
+
+def create_poll_watcher(watched_files):
+    """Creating a watcher checking file modification times. Returns a function like create_inotify_watcher."""
+
+    def get_mtimes():
+        """Getting the modification times of the watched files."""
+        mtimes = {}
+        for path in watched_files:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    last_mtimes = get_mtimes()
+
+    def wait(timeout):
+        """Waits for the watched files modification times to change."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            mtimes = get_mtimes()
+            changed = {path for path in watched_files if mtimes[path] != last_mtimes[path]}
+            last_mtimes.update(mtimes)
+            if changed:
+                return changed
+            remaining = POLL_TIME if deadline is None else min(POLL_TIME, deadline - time.monotonic())
+            if remaining <= 0:
+                return changed
+            time.sleep(remaining)
+
+    return wait
+
+def create_watcher(watched_files, poll=False):
+    """Creating a watcher for the watched files. Uses inotify when available unless poll is set."""
+    watcher = None if poll else create_inotify_watcher(watched_files)
+    if watcher is None:
+        print("Watching for changes every " + str(POLL_TIME) + " seconds")
+        return create_poll_watcher(watched_files)
+    print("Watching for changes with inotify")
+    return watcher
+
+class PreviewHandler(http.server.SimpleHTTPRequestHandler):
+    """Serves the project directory without letting the browser cache responses or logging every request."""
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The browser stopped loading the page.
+
+    def end_headers(self):
+        self.send_header("Cache-Control", "no-store")
+        super().end_headers()
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        pass
+
+def serve(port):
+    """Serving the project directory on localhost in a background thread. Returns the server."""
+    handler = functools.partial(PreviewHandler, directory=paths.PROJECT_DIR)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print("Serving http://localhost:" + str(server.server_address[1]) + "/main.html")
+    return server
+
+def apply_overrides(parks_json, overrides_json):
+    """Applying park name aliases and type overrides by park code. Returns a copy of parks.json."""
+    overrides = {}
+    for override in (overrides_json or {"overrides": []})["overrides"]:
+        overrides.setdefault(override["code"], override)
+    parks = []
+    for park in parks_json["parks"]:
+        override = overrides.get(park["code"])
+        if override is not None:
+            park = dict(park, name=override["alias"], type=override.get("type", park["type"]))
+        parks.append(park)
+    return dict(parks_json, parks=parks)
+
+def load_overrides():
+    """Loading overrides.json file if it exists."""
+    return dataset.load_overrides() if os.path.isfile(paths.OVERRIDES_JSON) else None
+
+def build_preview(inputs, overlay_sprite, widths=None, webp=True):
+    """Building main.html and guest.html with overrides applied. Returns main.html as a list of byte parts.
+
+    Returns None if the build failed. Template errors are reported so watching can continue until the template is fixed.
+    """
+    parks_json = apply_overrides(inputs["parks_json"], inputs["overrides_json"])
+    try:
+        return pages.build_preview_pages(
+            parks_json, overlay_sprite, True, inputs["route_json"], widths, webp, inputs["mirror_json"]
+        )
+    except (jinja2.TemplateError, KeyError) as e:
+        print("Failed to build main.html: " + repr(e))
+        return None
+
+def build_index(main_data, passphrase, iterations):
+    """Building index.html. Template errors are reported so watching can continue until the template is fixed."""
+    try:
+        pages.build_index_page(main_data, passphrase, iterations)
+    except jinja2.TemplateError as e:
+        print("Failed to build index.html: " + repr(e))
+        return False
+    return True
+
+def load_inputs(inputs, changed):
+    """Reloading the changed input files. Keeps the last good version of files that fail to load.
+
+    Returns whether every changed file loaded.
+    """
+    loaders = {
+        dataset.get_parks_path(): ("parks_json", dataset.load_parks),
+        paths.OVERRIDES_JSON: ("overrides_json", load_overrides),
+        paths.PASSPHRASE_TXT: ("passphrase", dataset.load_passphrase),
+        paths.ROUTE_JSON: ("route_json", dataset.load_route),
+        paths.MIRROR_JSON: ("mirror_json", dataset.load_mirror),
+    }
+    loaded = True
+    for path, (name, loader) in loaders.items():
+        if path in changed:
+            try:
+                inputs[name] = loader()
+            except (dataset.DatasetError, KeyError) as e:
+                print(e)
+                print("... keeping the last good " + os.path.basename(path))
+                loaded = False
+    return loaded
+
+def watch(
+    overlay_sprite=False,
+    iterations=encrypt.ITERATIONS,
+    port=8000,
+    poll=False,
+    route=False,
+    widths=None,
+    webp=True,
+    mirror=False,
+):
+    """Building the html files, then rebuilding them as the watched files change until interrupted.
+
+    The project directory is served on port unless port is None. The route in route.json is added when route is set.
+    Photos are offered at widths, or pages.PHOTO_WIDTHS when None, as WebP unless webp is False. Photos in mirror.json
+    are served from their mirrored thumbnails when mirror is set.
+    """
+    preview_files = PREVIEW_FILES + ([paths.ROUTE_JSON] if route else []) + ([paths.MIRROR_JSON] if mirror else [])
+    inputs = {"parks_json": None, "overrides_json": None, "passphrase": None, "route_json": None, "mirror_json": None}
+    if not load_inputs(inputs, preview_files + INDEX_FILES) or inputs["parks_json"] is None:
+        raise dataset.DatasetError("Fix the files above to start watching")
+    # Last main.html built, None until a build succeeds.
+    main_data = build_preview(inputs, overlay_sprite, widths, webp)
+    if main_data is not None:
+        build_index(main_data, inputs["passphrase"], iterations)
+    server = serve(port) if port is not None else None
+    wait = create_watcher(preview_files + INDEX_FILES, poll)
+    encrypt_time = None  # Time index.html is due to be rebuilt.
+    try:
+        while True:
+            timeout = None if encrypt_time is None else max(0, encrypt_time - time.monotonic())
+            changed = wait(timeout)
+            if changed:
+                # Gathering the rest of the changes from the same save.
+                time.sleep(SETTLE_TIME)
+                changed |= wait(0)
+                print("Changed " + ", ".join(sorted(os.path.basename(path) for path in changed)))
+                if not load_inputs(inputs, changed):
+                    continue
+                if changed & set(preview_files):
+                    start_time = time.perf_counter()
+                    preview_data = build_preview(inputs, overlay_sprite, widths, webp)
+                    if preview_data is None:
+                        continue
+                    main_data = preview_data
+                    print(f"Rebuilt preview in {(time.perf_counter() - start_time) * 1000:.0f}ms")
+                if main_data is not None:
+                    encrypt_time = time.monotonic() + ENCRYPT_DELAY
+            elif encrypt_time is not None and time.monotonic() >= encrypt_time:
+                encrypt_time = None
+                start_time = time.perf_counter()
+                if not build_index(main_data, inputs["passphrase"], iterations):
+                    continue
+                print(f"Rebuilt index.html in {(time.perf_counter() - start_time) * 1000:.0f}ms")
+    finally:
+        if server is not None:
+            server.shutdown()
@@ -0,0 +1,13 @@
+"""conftest.py lets the tests import the stateparks package like the update scripts do."""
+
+# The update scripts are run from the update directory and import the stateparks package from there, so the tests add
+# that directory to the import path instead of installing the package. Run the tests from the update directory with
+# [python -m pytest -q].
+
+import os  # Used to locate the update directory.
+import sys  # Used to add the update directory to the import path.
+
+UPDATE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Directory holding the stateparks package.
+
+if UPDATE_DIR not in sys.path:
+    sys.path.insert(0, UPDATE_DIR)
@@ -0,0 +1,88 @@
+"""test_encrypt.py checks that encrypted payloads decrypt back to main.html the way the index.html login page does."""
+
+import base64  # Used to decode payloads.
+import gzip  # Used to decompress decrypted payloads.
+import json  # Used to parse payloads.
+import os  # Used to create html that doesn't compress.
+import pytest  # Used to set up the keystore.
+from Crypto.Cipher import AES  # Used to decrypt payload chunks.
+from Crypto.Hash import SHA256  # Used to derive keys like the login page.
+from Crypto.Protocol.KDF import PBKDF2  # Used to derive keys like the login page.
+from stateparks import encrypt  # Used to encrypt html.
+from stateparks import paths  # Used to point the keystore at a temporary directory.
+
+ITERATIONS = 1000  # PBKDF2 iterations, lowered so tests derive keys quickly.
+PASSPHRASE = "correct horse battery staple"  # Passphrase html is encrypted with.
+
+@pytest.fixture(name="keystore")
+def fixture_keystore(tmp_path, monkeypatch):
+    """Pointing the keystore at a temporary directory."""
+    monkeypatch.setattr(paths, "KEYSTORE_DIR", str(tmp_path / "keystore"))
+    return tmp_path / "keystore"
+
+def decrypt_chunks(payload, passphrase, iterations):
+    """Decrypting the chunks of a payload in order, authenticating each with its index and whether it is last.
+
+    Returns the decrypted chunks still compressed.
+    """
+    payload = json.loads(payload)
+    salt = base64.b64decode(payload["salt"])
+    key = PBKDF2(passphrase.encode("utf-8"), salt, count=iterations, dkLen=32, hmac_hash_module=SHA256)
+    chunks = []
+    for index, chunk in enumerate(payload["chunks"]):
+        chunk = base64.b64decode(chunk)
+        cipher = AES.new(key, AES.MODE_GCM, nonce=chunk[:12])
+        cipher.update(encrypt.get_chunk_data(index, index == len(payload["chunks"]) - 1))
+        chunks.append(cipher.decrypt_and_verify(chunk[12:-16], chunk[-16:]))
+    return chunks
+
+def decrypt_html(payload, passphrase, iterations):
+    """Decrypting a payload back into html bytes."""
+    return gzip.decompress(b"".join(decrypt_chunks(payload, passphrase, iterations)))
+
+@pytest.mark.usefixtures("keystore")
+@pytest.mark.parametrize("size", [0, 100, 3 * encrypt.CHUNK_SIZE + 7])
+def test_encrypt_round_trip(size):
+    """Testing that html of any size decrypts back to the same bytes, including html spanning several chunks."""
+    data = b"<html>" + os.urandom(size) + b"</html>"
+    payload = encrypt.encrypt_html(data, PASSPHRASE, ITERATIONS)
+    assert len(json.loads(payload)["chunks"]) == max(1, -(-len(gzip.compress(data)) // encrypt.CHUNK_SIZE))
+    assert decrypt_html(payload, PASSPHRASE, ITERATIONS) == data
+
+@pytest.mark.usefixtures("keystore")
+def test_encrypt_parts():
+    """Testing that html given as byte parts decrypts to the joined parts and shares the cached payload of the whole."""
+    parts = [b"<html><script>", os.urandom(2 * encrypt.CHUNK_SIZE), b"</script></html>"]
+    payload = encrypt.encrypt_html(parts, PASSPHRASE, ITERATIONS)
+    assert decrypt_html(payload, PASSPHRASE, ITERATIONS) == b"".join(parts)
+    assert encrypt.encrypt_html(b"".join(parts), PASSPHRASE, ITERATIONS) == payload
+
+@pytest.mark.usefixtures("keystore")
+def test_wrong_passphrase_fails():
+    """Testing that a payload doesn't decrypt with another passphrase."""
+    payload = encrypt.encrypt_html(b"<html>secret</html>", PASSPHRASE, ITERATIONS)
+    with pytest.raises(ValueError):
+        decrypt_chunks(payload, "wrong", ITERATIONS)
+
+@pytest.mark.usefixtures("keystore")
+def test_reordered_and_dropped_chunks_fail():
+    """Testing that chunks can't be reordered or the last chunks dropped without failing authentication."""
+    payload = json.loads(encrypt.encrypt_html(os.urandom(3 * encrypt.CHUNK_SIZE), PASSPHRASE, ITERATIONS))
+    chunks = payload["chunks"]
+    assert len(chunks) > 2
+    for tampered in [[chunks[1], chunks[0]] + chunks[2:], chunks[:-1]]:
+        with pytest.raises(ValueError):
+            decrypt_chunks(json.dumps(dict(payload, chunks=tampered)), PASSPHRASE, ITERATIONS)
+
+def test_payload_cache(keystore):
+    """Testing that unchanged html reuses the cached payload, and changes encrypt again, in a private keystore."""
+    payload = encrypt.encrypt_html(b"<html>one</html>", PASSPHRASE, ITERATIONS)
+    assert encrypt.encrypt_html(b"<html>one</html>", PASSPHRASE, ITERATIONS) == payload
+    changed = encrypt.encrypt_html(b"<html>two</html>", PASSPHRASE, ITERATIONS)
+    assert changed != payload
+    assert decrypt_html(changed, PASSPHRASE, ITERATIONS) == b"<html>two</html>"
+    other_passphrase = encrypt.encrypt_html(b"<html>two</html>", "other", ITERATIONS)
+    assert decrypt_html(other_passphrase, "other", ITERATIONS) == b"<html>two</html>"
+    assert os.stat(keystore).st_mode & 0o777 == 0o700
+    assert all(os.stat(keystore / name).st_mode & 0o777 == 0o600 for name in os.listdir(keystore))
+    assert not [name for name in os.listdir(keystore) if name.endswith(".tmp")]
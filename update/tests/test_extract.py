@@ -0,0 +1,57 @@
+"""test_extract.py checks the stream and lxml extractors against the BeautifulSoup extractor."""
+
+import os  # Used to locate the California State Parks html file.
+import pytest  # Used to parametrize tests.
+from stateparks import extract  # Used to extract park and image links.
+from stateparks import paths  # Used to locate the California State Parks html file.
+
+LISTING_HTML = os.path.join(paths.ASSETS_DIR, "CaliforniaStateParksListing_9_25_2023.html")  # Saved listing page.
+# Extractors checked against bs4. lxml is only checked when it is installed.
+EXTRACTORS = [
+    "stream",
+    pytest.param("lxml", marks=pytest.mark.skipif(extract.lxml_etree is None, reason="needs the lxml package")),
+]
+
+# Listing edge cases: nested lists, items without links, links without href, entities, lists of other classes, lists
+# past the first lxml chunk, unclosed lists, and no lists.
+LISTING_CASES = [
+    '<ul class="results-area"><li><a href="/?page_id=1">Park &amp; Beach</a></li><li>No link</li></ul>',
+    '<ul class="x results-area y"><li><a>No href</a> text</li><li><a href="">Empty</a></li></ul>',
+    '<ul class="results-area"><li><a href="/a">A</a><ul><li><a href="/b">B</a></li></ul></li></ul>',
+    '<ul class="other"><li><a href="/skip">Skip</a></li></ul><ul class="results-area"><li>Café</li></ul>',
+    "<!--" + "x" * extract.CHUNK_SIZE + '--><ul class="results-area"><li><a href="/late">Late</a></li></ul>',
+    '<ul class="results-area"><li><a href="/a">A</a></li></ul><p>' + "x" * extract.CHUNK_SIZE + "</p>"
+    + '<div><ul class="results-area"><li><a href="/b">B</a></li></ul></div><p>results-area</p>',
+    '<ul class="results-area"><li><a href="/open">Never closed</a></li>',
+    "<p>No lists</p>",
+]
+# Image edge cases: missing, empty, repeated, past the first stream chunk, and split between chunks.
+IMAGE_CASES = [
+    '<html><head><meta property="og:image" content="https://lh3.googleusercontent.com/a"></head></html>',
+    "<html><head><title>No image</title></head></html>",
+    '<html><head><meta property="og:image" content=""></head></html>',
+    '<meta property="og:image" content="https://first"/><meta property="og:image" content="https://second"/>',
+    "<!--" + "x" * (extract.CHUNK_SIZE + 100) + '--><meta property="og:image" content="https://late">',
+    "<!--" + "x" * (extract.CHUNK_SIZE - 20) + '--><meta property="og:image" content="https://split">',
+]
+
+@pytest.mark.parametrize("name", EXTRACTORS)
+def test_listing_matches_bs4(name):
+    """Testing that the park links of the California State Parks html file match bs4."""
+    with open(LISTING_HTML, "rb") as html_file:
+        content = html_file.read()
+    items = extract.extract_listing(content, name)
+    assert items
+    assert items == extract.extract_listing(content, "bs4")
+
+@pytest.mark.parametrize("name", EXTRACTORS)
+@pytest.mark.parametrize("content", LISTING_CASES)
+def test_listing_cases_match_bs4(name, content):
+    """Testing that the park links of listing edge cases match bs4."""
+    assert extract.extract_listing(content.encode("utf-8"), name) == extract.extract_listing(content, "bs4")
+
+@pytest.mark.parametrize("name", EXTRACTORS)
+@pytest.mark.parametrize("content", IMAGE_CASES)
+def test_image_cases_match_bs4(name, content):
+    """Testing that the og:image links of image edge cases match bs4."""
+    assert extract.extract_image(content.encode("utf-8"), name) == extract.extract_image(content, "bs4")
@@ -0,0 +1,39 @@
+"""test_fetch.py checks that cached responses are only loaded once they are completely written."""
+
+import os  # Used to check cache files.
+import pytest  # Used to set up the cache directory.
+from stateparks import fetch  # Used to save and load cached responses.
+
+URL = "https://photos.app.goo.gl/a"  # Cached url.
+
+@pytest.fixture(name="cache")
+def fixture_cache(tmp_path, monkeypatch):
+    """Pointing the http cache at a temporary directory."""
+    monkeypatch.setattr(fetch, "cache_directory", str(tmp_path / "http-cache"))
+    monkeypatch.setattr(fetch, "cache_size", None)
+    return tmp_path / "http-cache"
+
+def test_save_and_load(cache):
+    """Testing that a saved response loads back with its headers and leaves no temporary files."""
+    fetch.save_cache_entry(URL, {"ETag": '"1"', "Set-Cookie": "private"}, b"<html>one</html>")
+    entry = fetch.load_cache_entry(URL)
+    assert entry["content"] == b"<html>one</html>"
+    assert entry["meta"]["headers"] == {"ETag": '"1"'}
+    fetch.refresh_cache_entry(URL, entry["meta"])
+    assert fetch.load_cache_entry(URL)["content"] == b"<html>one</html>"
+    assert not [name for name in os.listdir(cache) if name.endswith(".tmp")]
+
+def test_interrupted_save(cache, monkeypatch):
+    """Testing that a save interrupted before its metadata is written doesn't load as a cached response."""
+    write_cache_file = fetch.write_cache_file
+
+    def interrupt(path, data):
+        if path.endswith(".json"):
+            raise KeyboardInterrupt
+        write_cache_file(path, data)
+
+    monkeypatch.setattr(fetch, "write_cache_file", interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        fetch.save_cache_entry(URL, {}, b"<html>one</html>")
+    assert os.path.isfile(fetch.get_cache_paths(URL)[1])
+    assert fetch.load_cache_entry(URL) is None
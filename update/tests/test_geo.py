@@ -0,0 +1,91 @@
+"""test_geo.py checks the k-d tree queries of geo.py against checking every park."""
+
+import random  # Used to scatter parks.
+import pytest  # Used to parametrize tests.
+from stateparks import geo  # Used to index and query park coordinates.
+
+TOLERANCE = 1e-9  # Kilometers distances may differ by between the index and the brute force distances.
+
+@pytest.fixture(name="points")
+def fixture_points():
+    """Scattering parks over California, with repeated coordinates and parks close together."""
+    generator = random.Random(1850)
+    points = [(str(100000 + i), generator.uniform(32.5, 42), generator.uniform(-124.4, -114.1)) for i in range(500)]
+    points += [("200000", 36.5, -119.5), ("200001", 36.5, -119.5), ("200002", 36.5001, -119.5)]
+    return points
+
+def get_brute_distances(points, lat, lng):
+    """Getting the distance to every point by checking each one. Returns (code, kilometers) tuples nearest first."""
+    return sorted(
+        ((code, geo.get_distance(lat, lng, point_lat, point_lng)) for code, point_lat, point_lng in points),
+        key=lambda result: (result[1], result[0]),
+    )
+
+def get_queries():
+    """Getting query points inside and around the parks, including a point with parks on top of it."""
+    generator = random.Random(1902)
+    queries = [(generator.uniform(31, 43), generator.uniform(-125, -113)) for _ in range(40)]
+    return queries + [(36.5, -119.5)]
+
+def assert_nearest(results, expected, count):
+    """Checking that query results are the count nearest expected parks, allowing parks at the same distance to swap."""
+    distances = dict(expected)
+    assert len(results) == min(count, len(expected))
+    assert len({code for code, _ in results}) == len(results)
+    for (code, distance), (_, expected_distance) in zip(results, expected):
+        assert abs(distance - expected_distance) <= TOLERANCE
+        assert abs(distances[code] - distance) <= TOLERANCE
+
+@pytest.mark.parametrize("radius", [0, 5, 50, 400])
+def test_query_radius(points, radius):
+    """Testing that radius queries find every park within the radius."""
+    index = geo.create_index(points)
+    for lat, lng in get_queries():
+        distances = dict(get_brute_distances(points, lat, lng))
+        results = geo.query_radius(index, lat, lng, radius)
+        assert {code for code, _ in results} >= {code for code, distance in distances.items() if distance < radius}
+        assert all(abs(distances[code] - distance) <= TOLERANCE for code, distance in results)
+        assert all(distance <= radius + TOLERANCE for _, distance in results)
+        assert [distance for _, distance in results] == sorted(distance for _, distance in results)
+
+@pytest.mark.parametrize("count, radius", [(1, None), (5, None), (5, 30), (20, 200), (0, None), (1000, None)])
+def test_query_nearest(points, count, radius):
+    """Testing that nearest queries find the count nearest parks within the radius."""
+    index = geo.create_index(points)
+    for lat, lng in get_queries():
+        expected = get_brute_distances(points, lat, lng)
+        if radius is not None:
+            expected = [result for result in expected if result[1] <= radius]
+        assert_nearest(geo.query_nearest(index, lat, lng, count, radius), expected, count)
+
+def test_query_nearest_exclude(points):
+    """Testing that nearest queries skip the excluded park."""
+    index = geo.create_index(points)
+    for code, lat, lng in points[:50]:
+        expected = [result for result in get_brute_distances(points, lat, lng) if result[0] != code]
+        assert_nearest(geo.query_nearest(index, lat, lng, 5, exclude=code), expected, 5)
+
+def test_query_bbox(points):
+    """Testing that bounding box queries find every park inside the box."""
+    index = geo.create_index(points)
+    generator = random.Random(1927)
+    for _ in range(40):
+        south, north = sorted(generator.uniform(32, 42.5) for _ in range(2))
+        west, east = sorted(generator.uniform(-125, -114) for _ in range(2))
+        expected = [code for code, lat, lng in points if south <= lat <= north and west <= lng <= east]
+        assert sorted(geo.query_bbox(index, south, west, north, east)) == sorted(expected)
+
+def test_get_nearby_unvisited():
+    """Testing that nearby parks only list other unvisited parks with coordinates."""
+    parks = [
+        {"code": "1", "coordinates": "36.5,-119.5", "visited": True},
+        {"code": "2", "coordinates": "36.6,-119.5", "visited": False},
+        {"code": "3", "coordinates": "36.7,-119.5", "visited": False},
+        {"code": "4", "coordinates": "", "visited": False},
+        {"code": "5", "coordinates": "40,-119.5", "visited": False},
+    ]
+    nearby = geo.get_nearby_unvisited(parks, 5, 50)
+    assert set(nearby) == {"1", "2", "3", "5"}
+    assert [code for code, _ in nearby["1"]] == ["2", "3"]
+    assert [code for code, _ in nearby["2"]] == ["3"]
+    assert not nearby["5"]
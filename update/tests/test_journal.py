@@ -0,0 +1,97 @@
+"""test_journal.py checks that journaled dataset changes are replayed and compacted into the dataset files."""
+
+import json  # Used to read and write dataset files.
+import os  # Used to check journal files.
+import pytest  # Used to set up the dataset files.
+from stateparks import dataset  # Used to journal dataset changes.
+from stateparks import journal  # Used to read journals.
+from stateparks import paths  # Used to point the dataset files at a temporary directory.
+
+COMPACT_ENTRIES = 3  # Journal entries written before compacting, lowered so tests compact quickly.
+
+@pytest.fixture(name="assets")
+def fixture_assets(tmp_path, monkeypatch):
+    """Pointing parks.json, coords.json, and their journals at a temporary directory."""
+    monkeypatch.setattr(dataset, "DATASET_BACKEND", "json")
+    monkeypatch.setattr(journal, "COMPACT_ENTRIES", COMPACT_ENTRIES)
+    monkeypatch.setattr(journal, "counts", {})
+    for name, file_name in [
+        ("PARKS_JSON", "parks.json"),
+        ("PARKS_JOURNAL", "parks.journal.jsonl"),
+        ("COORDS_JSON", "coords.json"),
+        ("COORDS_JOURNAL", "coords.journal.jsonl"),
+    ]:
+        monkeypatch.setattr(paths, name, str(tmp_path / file_name))
+    parks_json = dataset.new_parks_json()
+    parks_json["parks"] = [
+        {"code": "1", "name": "One", "visited": False, "photos": {"sign": {"encrypt": {"photo": ""}}}},
+        {"code": "2", "name": "Two", "visited": False, "photos": {"sign": {"encrypt": {"photo": ""}}}},
+    ]
+    dataset.save_json(parks_json, paths.PARKS_JSON)
+
+def load_saved_parks():
+    """Loading parks.json as saved, without replaying the journal."""
+    with open(paths.PARKS_JSON, encoding="utf-8") as parks_file:
+        return {park["code"]: park for park in json.load(parks_file)["parks"]}
+
+@pytest.mark.usefixtures("assets")
+def test_replay_park_changes():
+    """Testing that park changes left in the journal by an interrupted run are applied when loading."""
+    parks_json = dataset.load_parks()
+    dataset.set_park_value(parks_json, parks_json["parks"][0], ["visited"], True)
+    dataset.set_park_value(parks_json, parks_json["parks"][1], ["photos", "sign", "encrypt", "photo"], "https://a")
+    assert not load_saved_parks()["1"]["visited"]
+    parks = {park["code"]: park for park in dataset.load_parks()["parks"]}
+    assert parks["1"]["visited"]
+    assert parks["2"]["photos"]["sign"]["encrypt"]["photo"] == "https://a"
+
+@pytest.mark.usefixtures("assets")
+def test_replay_skips_removed_parks():
+    """Testing that journaled changes of parks no longer in parks.json are skipped."""
+    journal.append_entry(paths.PARKS_JOURNAL, {"code": "3", "keys": ["visited"], "value": True})
+    assert [park["code"] for park in dataset.load_parks()["parks"]] == ["1", "2"]
+
+@pytest.mark.usefixtures("assets")
+def test_compact_park_changes():
+    """Testing that parks.json is saved and the journal removed every COMPACT_ENTRIES changes."""
+    parks_json = dataset.load_parks()
+    for value in range(COMPACT_ENTRIES - 1):
+        dataset.set_park_value(parks_json, parks_json["parks"][0], ["name"], "Name " + str(value))
+    assert len(journal.read_entries(paths.PARKS_JOURNAL)) == COMPACT_ENTRIES - 1
+    dataset.set_park_value(parks_json, parks_json["parks"][0], ["name"], "Compacted")
+    assert not os.path.isfile(paths.PARKS_JOURNAL)
+    assert load_saved_parks()["1"]["name"] == "Compacted"
+    dataset.set_park_value(parks_json, parks_json["parks"][1], ["name"], "After")
+    assert len(journal.read_entries(paths.PARKS_JOURNAL)) == 1
+    dataset.save_parks(parks_json)
+    assert not os.path.isfile(paths.PARKS_JOURNAL)
+    assert load_saved_parks()["2"]["name"] == "After"
+
+@pytest.mark.usefixtures("assets")
+def test_recover_incomplete_entry():
+    """Testing that a journal line cut off by a crash is dropped and new entries start on their own line."""
+    journal.append_entry(paths.PARKS_JOURNAL, {"code": "1", "keys": ["visited"], "value": True})
+    with open(paths.PARKS_JOURNAL, "a", encoding="utf-8") as journal_file:
+        journal_file.write('{"code": "2", "keys": ["vis')
+    parks = {park["code"]: park for park in dataset.load_parks()["parks"]}
+    assert parks["1"]["visited"]
+    assert not parks["2"]["visited"]
+    journal.append_entry(paths.PARKS_JOURNAL, {"code": "2", "keys": ["visited"], "value": True})
+    assert [entry["code"] for entry in journal.read_entries(paths.PARKS_JOURNAL)] == ["1", "2"]
+
+@pytest.mark.usefixtures("assets")
+def test_replay_and_compact_coords():
+    """Testing that coordinates entered before coords.json was first saved are replayed, then compacted."""
+    assert not dataset.has_coords()
+    coords_json = {}
+    dataset.add_coords(coords_json, "1", "36.5,-119.5")
+    assert dataset.has_coords()
+    assert not os.path.isfile(paths.COORDS_JSON)
+    assert dataset.load_coords() == {"1": "36.5,-119.5"}
+    dataset.compact_coords(coords_json)
+    assert not os.path.isfile(paths.COORDS_JOURNAL)
+    assert dataset.load_json(paths.COORDS_JSON) == {"1": "36.5,-119.5"}
+    for code in ["2", "3", "4"]:
+        dataset.add_coords(coords_json, code, "37,-120")
+    assert not os.path.isfile(paths.COORDS_JOURNAL)
+    assert set(dataset.load_json(paths.COORDS_JSON)) == {"1", "2", "3", "4"}
@@ -0,0 +1,131 @@
+"""test_mirror.py checks that mirrored photos are stored once, rendered into thumbnails, and cleaned up."""
+
+import base64  # Used to decode placeholders.
+import hashlib  # Used to hash the served photos.
+import http.server  # Used to serve photos.
+import io  # Used to encode and decode images in memory.
+import os  # Used to check the photo store and thumbnails.
+import threading  # Used to run the photo server next to the mirror.
+import pytest  # Used to set up the photo server and directories.
+from stateparks import dataset  # Used to create parks and save mirror.json.
+from stateparks import mirror  # Used to mirror photos.
+from stateparks import paths  # Used to point the photo store and thumbnails at a temporary directory.
+
+Image = pytest.importorskip("PIL.Image", reason="needs the Pillow package")
+
+PHOTO_WIDTH = 500  # Width of the served photos, between widths of the PHOTO_WIDTHS ladder.
+PHOTO_HEIGHT = 300  # Height of the served photos.
+
+def create_jpeg(color):
+    """Creating a small jpeg photo of a single color."""
+    buffer = io.BytesIO()
+    Image.new("RGB", (PHOTO_WIDTH, PHOTO_HEIGHT), color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+class PhotoHandler(http.server.BaseHTTPRequestHandler):
+    """Google Photos stub serving the photo listed for each path, ignoring the size option."""
+
+    def do_GET(self):  # pylint: disable=C0103
+        """Serving the photo listed for the path."""
+        with self.server.lock:
+            self.server.requests.append(self.path)
+        content = self.server.photos.get(self.path.split("=")[0])
+        self.send_response(200 if content else 404)
+        self.send_header("Content-Length", str(len(content or b"")))
+        self.end_headers()
+        self.wfile.write(content or b"")
+
+    def log_message(self, *args):  # pylint: disable=W0221
+        """Keeping the test output quiet."""
+
+@pytest.fixture(name="server")
+def fixture_server(tmp_path, monkeypatch):
+    """Serving photos, with the photo store and thumbnails in a temporary directory."""
+    monkeypatch.setattr(paths, "PHOTO_STORE_DIR", str(tmp_path / "photo-store"))
+    monkeypatch.setattr(paths, "MIRROR_IMAGES_DIR", str(tmp_path / "images" / "mirror"))
+    monkeypatch.setattr(paths, "PROJECT_DIR", str(tmp_path))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), PhotoHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    same = create_jpeg((200, 120, 40))
+    server.photos = {"/first": same, "/same": same, "/other": create_jpeg((40, 120, 200))}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def create_parks_json(server, names):
+    """Creating a visited park per photo name with that photo as its guest sign photo."""
+    parks_json = dataset.new_parks_json()
+    for code, name in enumerate(names):
+        park = dataset.new_park_entry(str(code), name, dataset.PARKS_TYPES[0])
+        park["visited"] = True
+        park["photos"]["sign"]["guest"]["photo"] = "http://127.0.0.1:" + str(server.server_port) + "/" + name
+        parks_json["parks"].append(park)
+    return parks_json
+
+def list_files(directory):
+    """Listing the files in a directory and its subdirectories."""
+    return sorted(name for _, _, names in os.walk(directory) for name in names)
+
+def test_content_addressed_dedup(server):
+    """Testing that links serving the same photo are stored once and share their thumbnails."""
+    mirror_json = {}
+    results = mirror.mirror_photos(create_parks_json(server, ["first", "same", "other"]), mirror_json)
+    assert results == {"mirrored": 3, "failed": []}
+    first_hash = hashlib.sha256(server.photos["/first"]).hexdigest()
+    other_hash = hashlib.sha256(server.photos["/other"]).hexdigest()
+    assert list_files(paths.PHOTO_STORE_DIR) == sorted([first_hash, other_hash])
+    entries = list(mirror_json.values())
+    assert entries[0]["hash"] == entries[1]["hash"] == first_hash
+    assert entries[2]["hash"] != first_hash
+    assert len(list_files(paths.MIRROR_IMAGES_DIR)) == 2 * len(entries[0]["widths"]) * len(mirror.FORMATS)
+
+def test_width_ladder_capped(server):
+    """Testing that thumbnails follow the PHOTO_WIDTHS ladder up to the photo width without upscaling."""
+    mirror_json = {}
+    parks_json = create_parks_json(server, ["first"])
+    mirror.mirror_photos(parks_json, mirror_json)
+    entry = mirror_json[parks_json["parks"][0]["photos"]["sign"]["guest"]["photo"]]
+    assert entry["widths"] == [width for width in mirror.pages.PHOTO_WIDTHS if width < PHOTO_WIDTH] + [PHOTO_WIDTH]
+    assert server.requests == ["/first=w" + str(max(mirror.pages.PHOTO_WIDTHS))]
+    for width in entry["widths"]:
+        for image_format in mirror.FORMATS:
+            with Image.open(mirror.get_thumbnail_path(entry["hash"], width, image_format)) as thumbnail:
+                assert thumbnail.size == (width, round(PHOTO_HEIGHT * width / PHOTO_WIDTH))
+
+def test_placeholder_and_size_saved(server, tmp_path):
+    """Testing that mirror.json keeps the placeholder data URI and the photo width and height."""
+    mirror_json = {}
+    parks_json = create_parks_json(server, ["other"])
+    mirror.mirror_photos(parks_json, mirror_json)
+    dataset.save_mirror(mirror_json, str(tmp_path / "mirror.json"))
+    link = parks_json["parks"][0]["photos"]["sign"]["guest"]["photo"]
+    entry = dataset.load_mirror(str(tmp_path / "mirror.json"))[link]
+    assert (entry["width"], entry["height"]) == (PHOTO_WIDTH, PHOTO_HEIGHT)
+    assert entry["src"] == "images/mirror/" + entry["hash"][: mirror.HASH_LENGTH]
+    prefix = "data:image/webp;base64,"
+    assert entry["placeholder"].startswith(prefix)
+    with Image.open(io.BytesIO(base64.b64decode(entry["placeholder"][len(prefix) :]))) as placeholder:
+        assert placeholder.format == "WEBP"
+        placeholder_height = round(PHOTO_HEIGHT * mirror.PLACEHOLDER_WIDTH / PHOTO_WIDTH)
+        assert placeholder.size == (mirror.PLACEHOLDER_WIDTH, placeholder_height)
+
+def test_stale_thumbnails_removed(server):
+    """Testing that thumbnails of photos no longer shown are removed, and recorded photos aren't downloaded again."""
+    mirror_json = {}
+    mirror.mirror_photos(create_parks_json(server, ["first", "other"]), mirror_json)
+    first_link, other_link = list(mirror_json)
+    stray_path = os.path.join(paths.MIRROR_IMAGES_DIR, "stray-320.webp")
+    with open(stray_path, "wb") as stray_file:
+        stray_file.write(b"")
+    server.requests.clear()
+    results = mirror.mirror_photos(create_parks_json(server, ["other"]), mirror_json)
+    assert results == {"mirrored": 0, "failed": []}
+    assert not server.requests
+    assert first_link not in mirror_json
+    assert list(mirror_json) == [other_link]
+    assert list_files(paths.MIRROR_IMAGES_DIR) == sorted(
+        os.path.basename(path) for path in mirror.get_thumbnail_paths(mirror_json[other_link])
+    )
@@ -0,0 +1,69 @@
+"""test_pages.py checks that builds loading the fragments snapshot only serialize the parks that changed."""
+
+import json  # Used to copy parks between builds.
+import pytest  # Used to set up the keystore directory.
+from stateparks import dataset  # Used to create parks.
+from stateparks import encrypt  # Used to count snapshot saves.
+from stateparks import pages  # Used to build the park datasets.
+from stateparks import paths  # Used to point the keystore directory at a temporary directory.
+
+@pytest.fixture(name="parks_json")
+def fixture_parks_json(tmp_path, monkeypatch):
+    """Creating parks without coordinates, so visiting a park doesn't change the nearby parks of the others."""
+    monkeypatch.setattr(paths, "KEYSTORE_DIR", str(tmp_path / "keystore"))
+    monkeypatch.setattr(pages, "fragments", None)
+    monkeypatch.setattr(pages, "nearby", None)
+    monkeypatch.setattr(pages, "snapshot_nearby", None)
+    parks_json = dataset.new_parks_json()
+    parks_json["parks"] = [
+        dataset.new_park_entry(str(code), "Park " + str(code), dataset.PARKS_TYPES[code % 3]) for code in range(10)
+    ]
+    parks_json["parks"][3]["visited"] = True
+    parks_json["parks"][3]["photos"]["sign"]["encrypt"]["photo"] = "https://lh3.googleusercontent.com/a"
+    return parks_json
+
+def build_from_snapshot(parks_json, monkeypatch):
+    """Building the datasets of a one-shot build from the fragments snapshot. Returns the datasets and built parks."""
+    monkeypatch.setattr(pages, "fragments", None)
+    monkeypatch.setattr(pages, "nearby", None)
+    built = []
+    get_park_fragments = pages.get_park_fragments
+
+    def count_park_fragments(park, *args):
+        built.append(park["code"])
+        return get_park_fragments(park, *args)
+
+    monkeypatch.setattr(pages, "get_park_fragments", count_park_fragments)
+    pages.load_snapshot()
+    datasets = pages.get_page_datasets(parks_json, True)
+    pages.save_snapshot()
+    monkeypatch.setattr(pages, "get_park_fragments", get_park_fragments)
+    return datasets, built
+
+def test_snapshot_rebuilds_changed_park(parks_json, monkeypatch):
+    """Testing that flipping the visited flag of one park only rebuilds the fragment of that park."""
+    _, built = build_from_snapshot(parks_json, monkeypatch)
+    assert len(built) == len(parks_json["parks"])
+    parks_json = json.loads(json.dumps(parks_json))
+    parks_json["parks"][5]["visited"] = True
+    datasets, built = build_from_snapshot(parks_json, monkeypatch)
+    assert built == ["5"]
+    assert datasets == pages.get_page_datasets(parks_json)
+
+def test_snapshot_unchanged_not_saved(parks_json, monkeypatch):
+    """Testing that a build with no changed parks neither rebuilds fragments nor saves the snapshot again."""
+    build_from_snapshot(parks_json, monkeypatch)
+    saved = []
+    save_keystore_file = encrypt.save_keystore_file
+    monkeypatch.setattr(encrypt, "save_keystore_file", lambda name, data: saved.append(save_keystore_file(name, data)))
+    datasets, built = build_from_snapshot(parks_json, monkeypatch)
+    assert not built
+    assert not saved
+    assert datasets == pages.get_page_datasets(parks_json)
+
+def test_write_page_parts(tmp_path):
+    """Testing that pages are written from the shell halves and the dataset without joining them first."""
+    page_shell = (b"<html><script>", b"</script></html>")
+    parts = pages.write_page(str(tmp_path / "main.html"), page_shell, '[{"name":"Café"}]')
+    assert parts == [page_shell[0], '[{"name":"Café"}]'.encode("utf-8"), page_shell[1]]
+    assert (tmp_path / "main.html").read_bytes() == b"".join(parts)
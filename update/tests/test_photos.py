@@ -0,0 +1,155 @@
+"""test_photos.py checks the concurrent photo link resolver against a local Google Photos stub."""
+
+# The stub serves shared album pages from a list of responses per path, one response per request with the last one
+# repeated, and records when every request came in and how many were in flight at once.
+
+import asyncio  # Used to run the resolver with test backoff settings.
+import http.server  # Used to serve the Google Photos stub.
+import os  # Used to check the journal file.
+import threading  # Used to run the stub next to the resolver.
+import time  # Used to time requests.
+import pytest  # Used to set up the stub and the dataset files.
+from stateparks import dataset  # Used to create parks and load the saved parks.
+from stateparks import fetch  # Used to point the http cache at a temporary directory.
+from stateparks import journal  # Used to reset the journal counts.
+from stateparks import paths  # Used to point the dataset files at a temporary directory.
+from stateparks import photos  # Used to resolve photo links.
+
+TOKEN_TIME = 0.1  # Seconds between requests at the rate used by the pacing test.
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    """Google Photos stub serving the responses listed for each path."""
+
+    def do_GET(self):  # pylint: disable=C0103
+        """Serving the next response listed for the path."""
+        stub = self.server
+        with stub.lock:
+            stub.requests.append((self.path, time.monotonic()))
+            stub.in_flight += 1
+            stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+            responses = stub.responses.get(self.path, [(200, {})])
+            status, headers = responses.pop(0) if len(responses) > 1 else responses[0]
+        time.sleep(stub.delay)
+        content = b""
+        if status == 200:
+            link = "https://lh3.googleusercontent.com" + self.path + "=w2048-h1024"
+            content = ('<html><head><meta property="og:image" content="' + link + '"></head></html>').encode("utf-8")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+        with stub.lock:
+            stub.in_flight -= 1
+
+    def log_message(self, *args):  # pylint: disable=W0221
+        """Keeping the test output quiet."""
+
+@pytest.fixture(name="stub")
+def fixture_stub(tmp_path, monkeypatch):
+    """Serving the Google Photos stub, with the http cache and the dataset files in a temporary directory."""
+    monkeypatch.setattr(fetch, "cache_directory", str(tmp_path / "http-cache"))
+    monkeypatch.setattr(fetch, "cache_size", None)
+    monkeypatch.setattr(dataset, "DATASET_BACKEND", "json")
+    monkeypatch.setattr(journal, "counts", {})
+    monkeypatch.setattr(paths, "PARKS_JSON", str(tmp_path / "parks.json"))
+    monkeypatch.setattr(paths, "PARKS_JOURNAL", str(tmp_path / "parks.journal.jsonl"))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.in_flight = 0
+    server.max_in_flight = 0
+    server.responses = {}
+    server.delay = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def create_parks_json(stub, names):
+    """Creating a park per name with a sign photo shared album link served by the stub."""
+    parks_json = dataset.new_parks_json()
+    for code, name in enumerate(names):
+        park = dataset.new_park_entry(str(code), name, dataset.PARKS_TYPES[0])
+        park["photos"]["sign"]["encrypt"]["share"] = "http://127.0.0.1:" + str(stub.server_port) + "/" + name
+        parks_json["parks"].append(park)
+    return parks_json
+
+def get_sign_links(parks_json):
+    """Getting the sign photo links by park name."""
+    return {park["name"]: park["photos"]["sign"]["encrypt"]["photo"] for park in parks_json["parks"]}
+
+def get_request_times(stub, name):
+    """Getting the times the stub got requests for a park."""
+    return [request_time for path, request_time in stub.requests if path == "/" + name]
+
+def test_concurrency_limit(stub):
+    """Testing that at most concurrency requests are in flight and every link is gathered."""
+    stub.delay = 0.2
+    names = ["park" + str(i) for i in range(9)]
+    parks_json = create_parks_json(stub, names)
+    assert not photos.create_photo_links(parks_json, concurrency=3, rate=60000)
+    assert stub.max_in_flight == 3
+    assert get_sign_links(parks_json) == {name: "https://lh3.googleusercontent.com/" + name for name in names}
+
+def test_token_bucket_pacing(stub):
+    """Testing that requests past the first burst are spaced by the token bucket rate."""
+    concurrency = 2
+    parks_json = create_parks_json(stub, ["park" + str(i) for i in range(6)])
+    assert not photos.create_photo_links(parks_json, concurrency=concurrency, rate=60 / TOKEN_TIME)
+    request_times = sorted(request_time for _, request_time in stub.requests)
+    assert len(request_times) == 6
+    for i in range(concurrency, len(request_times)):
+        assert request_times[i] - request_times[0] >= (i - concurrency + 1) * TOKEN_TIME - 0.02
+
+def test_backoff_retry_after(stub, capsys):
+    """Testing that 429 and 5xx responses are retried with backoff, waiting at least the Retry-After seconds."""
+    stub.responses = {
+        "/limited": [(429, {"Retry-After": "1"}), (200, {})],
+        "/unavailable": [(503, {}), (200, {})],
+        "/broken": [(500, {})],
+        "/missing": [(404, {})],
+    }
+    parks_json = create_parks_json(stub, ["limited", "unavailable", "broken", "missing"])
+    results = asyncio.run(photos.resolve_photo_links(parks_json, 4, 60000, max_retries=2, backoff_time=0.05))
+    assert results["gathered"] == 2
+    assert sorted(failed["park"]["name"] for failed in results["failed"]) == ["broken", "missing"]
+    limited_times = get_request_times(stub, "limited")
+    assert len(limited_times) == 2
+    assert limited_times[1] - limited_times[0] >= 1
+    unavailable_times = get_request_times(stub, "unavailable")
+    assert len(unavailable_times) == 2
+    assert 0.05 <= unavailable_times[1] - unavailable_times[0] < 1
+    broken_times = get_request_times(stub, "broken")
+    assert len(broken_times) == 3
+    assert broken_times[2] - broken_times[1] >= 0.1
+    assert len(get_request_times(stub, "missing")) == 1
+    assert "Retrying in 1 seconds" in capsys.readouterr().out
+
+def test_resume_from_journal(stub, monkeypatch, tmp_path):
+    """Testing that links journaled by a run interrupted before saving aren't requested again by the next run."""
+    stub.responses = {"/later": [(404, {})]}
+    dataset.save_parks(create_parks_json(stub, ["first", "second", "later"]))
+    save_parks = dataset.save_parks
+
+    def interrupt(parks_json, path=None):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(dataset, "save_parks", interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        photos.create_photo_links(dataset.load_parks(), save=True)
+    monkeypatch.setattr(dataset, "save_parks", save_parks)
+    assert os.path.isfile(paths.PARKS_JOURNAL)
+    assert not any(get_sign_links(dataset.load_json(paths.PARKS_JSON)).values())
+    # Starting over with an empty http cache, so only requests reaching the stub can gather links.
+    monkeypatch.setattr(fetch, "cache_directory", str(tmp_path / "http-cache-resumed"))
+    stub.requests.clear()
+    stub.responses = {}
+    photos.create_photo_links(dataset.load_parks(), save=True)
+    assert [path for path, _ in stub.requests] == ["/later"]
+    assert not os.path.isfile(paths.PARKS_JOURNAL)
+    assert get_sign_links(dataset.load_json(paths.PARKS_JSON)) == {
+        name: "https://lh3.googleusercontent.com/" + name for name in ["first", "second", "later"]
+    }
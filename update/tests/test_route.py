@@ -0,0 +1,113 @@
+"""test_route.py checks that planned routes keep to their budgets and that 2-opt only shortens routes."""
+
+import itertools  # Used to find the shortest route by trying every order.
+import random  # Used to scatter parks.
+import pytest  # Used to parametrize tests.
+from stateparks import geo  # Used to measure the distances between stops.
+from stateparks import route  # Used to plan routes.
+
+numpy = pytest.importorskip("numpy", reason="needs the numpy package")
+
+START = (36.5, -119.5)  # Start of every planned route.
+TOLERANCE = 0.1  # Kilometers route distances may differ by, since stop distances are rounded.
+
+@pytest.fixture(name="parks")
+def fixture_parks():
+    """Scattering parks around the start, along with a park at the start and a park without coordinates."""
+    generator = random.Random(1864)
+    parks = []
+    for i in range(120):
+        lat = START[0] + generator.uniform(-2, 2)
+        lng = START[1] + generator.uniform(-2, 2)
+        parks.append({"code": str(i), "name": "Park " + str(i), "coordinates": str(lat) + "," + str(lng)})
+        parks[-1]["visited"] = i % 4 == 0
+    parks.append({"code": "start", "name": "Start Park", "coordinates": "36.5,-119.5", "visited": False})
+    parks.append({"code": "none", "name": "No Coordinates", "coordinates": "", "visited": False})
+    return parks
+
+def get_stop_distance(first, second):
+    """Getting the distance between two stops given as coordinates strings or (lat, lng) tuples."""
+    first = geo.parse_coordinates(first) if isinstance(first, str) else first
+    second = geo.parse_coordinates(second) if isinstance(second, str) else second
+    return geo.get_distance(first[0], first[1], second[0], second[1])
+
+def assert_valid_route(planned, parks, exclude=None):
+    """Checking that a route only stops once at each unvisited park with coordinates and adds up its distances."""
+    parks_by_code = {park["code"]: park for park in parks}
+    codes = [stop["code"] for stop in planned["stops"]]
+    assert len(set(codes)) == len(codes)
+    assert exclude not in codes
+    assert all(not parks_by_code[code]["visited"] and parks_by_code[code]["coordinates"] for code in codes)
+    total = 0.0
+    last = START
+    for stop in planned["stops"]:
+        total += get_stop_distance(last, stop["coordinates"])
+        assert abs(stop["total"] - total) <= TOLERANCE
+        last = stop["coordinates"]
+    if planned["round_trip"] and planned["stops"]:
+        total += get_stop_distance(last, START)
+    assert abs(planned["distance"] - total) <= TOLERANCE
+
+@pytest.mark.parametrize("round_trip", [False, True])
+@pytest.mark.parametrize("max_parks", [1, 5, 20])
+def test_park_limit(parks, max_parks, round_trip):
+    """Testing that routes without a kilometer limit stop at exactly max_parks parks."""
+    planned = route.plan_route(parks, START, max_parks=max_parks, round_trip=round_trip, exclude="start")
+    assert len(planned["stops"]) == max_parks
+    assert_valid_route(planned, parks, "start")
+
+@pytest.mark.parametrize("round_trip", [False, True])
+@pytest.mark.parametrize("max_distance", [0, 30, 150, 600])
+def test_distance_limit(parks, max_distance, round_trip):
+    """Testing that routes travel at most max_distance kilometers, back to the start for round trips."""
+    planned = route.plan_route(parks, START, max_distance=max_distance, round_trip=round_trip, exclude="start")
+    assert planned["distance"] <= max_distance + TOLERANCE
+    assert_valid_route(planned, parks, "start")
+    if max_distance >= 150:
+        assert len(planned["stops"]) > 1
+
+def test_both_limits(parks):
+    """Testing that routes with both limits stop at whichever limit is reached first."""
+    few = route.plan_route(parks, START, max_parks=3, max_distance=1000)
+    assert len(few["stops"]) == 3
+    short = route.plan_route(parks, START, max_parks=50, max_distance=60)
+    assert len(short["stops"]) < 50
+    assert short["distance"] <= 60 + TOLERANCE
+
+def test_round_trip_returns(parks):
+    """Testing that round trips add the distance back to the start, unlike open routes."""
+    round_trip = route.plan_route(parks, START, max_parks=8, round_trip=True)
+    assert round_trip["round_trip"]
+    last = round_trip["stops"][-1]
+    assert abs(round_trip["distance"] - last["total"] - get_stop_distance(last["coordinates"], START)) <= TOLERANCE
+    open_route = route.plan_route(parks, START, max_parks=8)
+    assert abs(open_route["distance"] - open_route["stops"][-1]["total"]) <= TOLERANCE
+
+def get_brute_distance(matrix, end):
+    """Getting the distance of the shortest route between the start and end by trying every order of the stops."""
+    stops = [index for index in range(len(matrix)) if index not in (0, end)]
+    return min(
+        route.get_route_distance(matrix, numpy.array([0, *order, end])) for order in itertools.permutations(stops)
+    )
+
+@pytest.mark.parametrize("round_trip", [False, True])
+def test_two_opt_never_lengthens(round_trip):
+    """Testing that 2-opt keeps the ends in place and never makes a route longer, nor shorter than the best order."""
+    generator = random.Random(1890)
+    for _ in range(20):
+        points = [(generator.uniform(32.5, 42), generator.uniform(-124.4, -114.1)) for _ in range(7)]
+        matrix = route.get_distance_matrix(points)
+        end = 0
+        if not round_trip:
+            end = len(matrix)
+            matrix = numpy.pad(matrix, ((0, 1), (0, 1)))
+        best = get_brute_distance(matrix, end)
+        stops = list(range(1, len(points)))
+        for _ in range(10):
+            generator.shuffle(stops)
+            planned = numpy.array([0, *stops, end])
+            distance = route.get_route_distance(matrix, planned)
+            shortened = route.shorten_route(matrix, planned.copy())
+            assert shortened[0] == 0 and shortened[-1] == end
+            assert sorted(shortened[1:-1]) == sorted(stops)
+            assert best - 1e-6 <= route.get_route_distance(matrix, shortened) <= distance + 1e-6
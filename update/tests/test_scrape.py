@@ -0,0 +1,128 @@
+"""test_scrape.py checks how scraped parks are compared with and applied to parks.json."""
+
+import os  # Used to locate the California State Parks html file.
+from stateparks import dataset  # Used to create parks and load overrides.json.
+from stateparks import paths  # Used to locate the California State Parks html file.
+from stateparks import scrape  # Used to compare and apply scraped parks.
+
+LISTING_HTML = os.path.join(paths.ASSETS_DIR, "CaliforniaStateParksListing_9_25_2023.html")  # Saved listing page.
+
+def create_parks():
+    """Creating parks.json parks, one for each kind of change."""
+    return [
+        dataset.new_park_entry("1", "Same Park", dataset.PARKS_TYPES[0], "36.5,-121.9"),
+        dataset.new_park_entry("2", "Old Name", dataset.PARKS_TYPES[0]),
+        dataset.new_park_entry("3", "Recoded Park", dataset.PARKS_TYPES[0]),
+        dataset.new_park_entry("4", "Removed Park", dataset.PARKS_TYPES[0]),
+    ]
+
+def create_new_parks_data():
+    """Creating scraped parks matching create_parks, one for each kind of change."""
+    return [
+        {"code": "1", "name": "Same Park", "type": dataset.PARKS_TYPES[0]},
+        {"code": "2", "name": "New Name", "type": dataset.PARKS_TYPES[0]},
+        {"code": "30", "name": "Recoded Park", "type": dataset.PARKS_TYPES[0]},
+        {"code": "5", "name": "Added Park", "type": dataset.PARKS_TYPES[1]},
+    ]
+
+def test_diff_buckets():
+    """Testing that every scraped park lands in the added, renamed, recoded, or unchanged bucket."""
+    parks = create_parks()
+    diff = scrape.diff_parks(parks, create_new_parks_data())
+    assert diff["unchanged"] == [parks[0]]
+    assert diff["renamed"] == [{"park": parks[1], "name": "New Name"}]
+    assert diff["recoded"] == [{"park": parks[2], "code": "30"}]
+    assert diff["removed"] == [parks[3]]
+    assert diff["added"] == [{"code": "5", "name": "Added Park", "type": dataset.PARKS_TYPES[1]}]
+
+def test_diff_swapped_names():
+    """Testing that parks matching one park by code and another by name count as renamed, keeping the code."""
+    parks = create_parks()[:2]
+    diff = scrape.diff_parks(parks, [{"code": "1", "name": "Old Name"}, {"code": "2", "name": "Same Park"}])
+    assert diff["renamed"] == [{"park": parks[0], "name": "Old Name"}, {"park": parks[1], "name": "Same Park"}]
+    assert not diff["added"] and not diff["recoded"] and not diff["removed"] and not diff["unchanged"]
+
+def test_update_accepting_changes():
+    """Testing that accepted changes rename, recode, add, and remove parks, sorted by name."""
+    parks_json = dataset.new_parks_json()
+    parks_json["parks"] = create_parks()
+    confirmed = []
+    coords = []
+
+    def confirm(kind, message, change):
+        confirmed.append((kind, change))
+        return True
+
+    def get_coords(code, name):
+        coords.append((code, name))
+        return "37,-122"
+
+    scrape.update_parks(parks_json, create_new_parks_data(), confirm, get_coords)
+    assert confirmed == [
+        ("rename", {"code": "2", "name": "Old Name", "value": "New Name"}),
+        ("recode", {"code": "3", "name": "Recoded Park", "value": "30"}),
+        ("remove", {"code": "4", "name": "Removed Park"}),
+    ]
+    assert coords == [("5", "Added Park")]
+    assert [(park["code"], park["name"]) for park in parks_json["parks"]] == [
+        ("5", "Added Park"),
+        ("2", "New Name"),
+        ("30", "Recoded Park"),
+        ("1", "Same Park"),
+    ]
+    assert parks_json["parks"][0]["coordinates"] == "37,-122"
+    assert parks_json["parks"][3]["coordinates"] == "36.5,-121.9"
+
+def test_update_declining_changes():
+    """Testing that declined changes keep the current names, codes, and parks."""
+    parks_json = dataset.new_parks_json()
+    parks_json["parks"] = create_parks()
+    scrape.update_parks(parks_json, create_new_parks_data(), lambda kind, message, change: False, lambda code, name: "")
+    assert [(park["code"], park["name"]) for park in parks_json["parks"]] == [
+        ("5", "Added Park"),
+        ("2", "Old Name"),
+        ("3", "Recoded Park"),
+        ("4", "Removed Park"),
+        ("1", "Same Park"),
+    ]
+
+def test_override_aliases():
+    """Testing that overrides only apply when both the code and name match, replacing the name and type."""
+    overrides_index = scrape.get_overrides_index(
+        {
+            "overrides": [
+                {"code": "1", "name": "Long Park Name", "alias": "Short Name"},
+                {"code": "2", "name": "Typed Park", "alias": "Typed Alias", "type": dataset.OTHER_PARK_TYPE},
+                {"code": "1", "name": "Second Override", "alias": "Ignored"},
+            ]
+        }
+    )
+    park_type = dataset.PARKS_TYPES[0]
+    assert scrape.add_overrides({"code": "1", "name": "Long Park Name", "type": park_type}, overrides_index) == {
+        "code": "1",
+        "name": "Short Name",
+        "type": park_type,
+    }
+    assert scrape.add_overrides({"code": "2", "name": "Typed Park", "type": park_type}, overrides_index) == {
+        "code": "2",
+        "name": "Typed Alias",
+        "type": dataset.OTHER_PARK_TYPE,
+    }
+    for park in [
+        {"code": "3", "name": "Long Park Name", "type": park_type},
+        {"code": "1", "name": "Renamed Park", "type": park_type},
+        {"code": "1", "name": "Second Override", "type": park_type},
+    ]:
+        assert scrape.add_overrides(park, overrides_index) == park
+
+def test_listing_overrides():
+    """Testing that the parks of the saved listing page are unique and take their aliases from overrides.json."""
+    overrides_json = dataset.load_overrides()
+    overrides_index = scrape.get_overrides_index(overrides_json)
+    with open(LISTING_HTML, "rb") as html_file:
+        parks = [scrape.add_overrides(park, overrides_index) for park in scrape.parse_listing(html_file.read())]
+    scrape.verify_unique(parks)
+    names = {park["code"]: park["name"] for park in parks}
+    aliased = [override for override in overrides_json["overrides"] if override["code"] in names]
+    assert aliased
+    assert all(names[override["code"]] == override["alias"] for override in aliased)
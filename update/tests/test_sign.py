@@ -0,0 +1,43 @@
+"""test_sign.py checks that park names failing to render are collected per park while the other parks still render."""
+
+import json  # Used to read manifest.json.
+import os  # Used to check svg files.
+import pytest  # Used to parametrize tests.
+
+pytest.importorskip("cairo", reason="needs the pycairo package")
+
+from stateparks import layout  # Used to reset the text extents cache. pylint: disable=C0413
+from stateparks import sign  # Used to create svg images. pylint: disable=C0413
+
+FAILING_NAME = "W" * 80  # Park name with a word too long for one line of the sign and overlay.
+PARKS = [
+    {"code": "1", "name": "Big Basin Redwoods"},
+    {"code": "2", "name": FAILING_NAME},
+    {"code": "3", "name": "Point Lobos"},
+]
+
+@pytest.fixture(name="directories")
+def fixture_directories(tmp_path, monkeypatch):
+    """Pointing the svg directories, manifest.json, and the text extents cache at a temporary directory."""
+    monkeypatch.setattr(layout, "extents_cache", {})
+    monkeypatch.setattr(layout, "new_extents", {})
+    for name in ["parks_directory", "overlay_directory"]:
+        os.makedirs(tmp_path / name)
+        monkeypatch.setattr(sign, name, str(tmp_path / name))
+    monkeypatch.setattr(sign, "manifest_path", str(tmp_path / "manifest.json"))
+    monkeypatch.setattr(sign, "extents_cache_path", str(tmp_path / "extents.json"))
+    return tmp_path
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_failing_park_collected(directories, jobs, capsys):
+    """Testing that a failing park name lands in the per-park errors while the other parks still render."""
+    svg_errors = sign.sync_parks_svgs(PARKS, jobs)
+    assert list(svg_errors) == ["2"]
+    assert all(FAILING_NAME in error for error in svg_errors["2"])
+    for code in ["1", "3"]:
+        assert os.path.isfile(os.path.join(sign.parks_directory, code + ".svg"))
+        assert os.path.isfile(os.path.join(sign.overlay_directory, code + ".svg"))
+    with open(directories / "manifest.json", encoding="utf-8") as manifest_json_file:
+        assert sorted(json.load(manifest_json_file)) == ["1", "3"]
+    sign.print_svg_errors(svg_errors)
+    assert "Failed to create svg images for 1 park(s):" in capsys.readouterr().out
@@ -0,0 +1,27 @@
+"""test_sprite.py checks that overlay svg images are combined into a sprite with unique ids."""
+
+import os  # Used to check the sprite directory.
+from stateparks import sprite  # Used to build the overlay sprite.
+
+# Overlay svg image with a glyph id like the ones Cairo creates.
+OVERLAY_SVG = """<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" width="975" height="1300" viewBox="0 0 975 1300">
+<defs><g id="glyph0-1"><path d="M 1 2 L 3 4 Z"/></g></defs>
+<use xlink:href="#glyph0-1" x="1" y="2"/>
+</svg>
+"""
+
+def test_build_overlay_sprite(tmp_path):
+    """Testing that every overlay becomes a symbol with prefixed ids and the sprite replaces the previous sprite."""
+    for code in ["1", "2"]:
+        (tmp_path / (code + ".svg")).write_text(OVERLAY_SVG, encoding="utf-8")
+    sprite_path = tmp_path / "sprite" / "overlay-sprite.svg"
+    os.makedirs(sprite_path.parent)
+    sprite_path.write_text("previous", encoding="utf-8")
+    sprite.build_overlay_sprite(["1", "2"], str(tmp_path), str(sprite_path))
+    sprite_svg = sprite_path.read_text(encoding="utf-8")
+    for code in ["1", "2"]:
+        assert '<symbol id="o-' + code + '" viewBox="0 0 975 1300">' in sprite_svg
+        assert 'id="o-' + code + '-glyph0-1"' in sprite_svg
+        assert 'xlink:href="#o-' + code + '-glyph0-1"' in sprite_svg
+    assert os.listdir(sprite_path.parent) == ["overlay-sprite.svg"]
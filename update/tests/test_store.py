@@ -0,0 +1,75 @@
+"""test_store.py checks that parks.db keeps the same parks as parks.json and only writes the parks that changed."""
+
+import os  # Used to check journal files.
+import pytest  # Used to set up parks.db.
+from stateparks import dataset  # Used to create parks and use the sqlite dataset.
+from stateparks import journal  # Used to reset the journal counts.
+from stateparks import paths  # Used to point parks.db at a temporary directory.
+from stateparks import store  # Used to save and load parks in parks.db.
+
+@pytest.fixture(name="parks_json")
+def fixture_parks_json():
+    """Creating parks with empty, shared, and gathered photo links."""
+    parks_json = dataset.new_parks_json()
+    parks_json["firstname"] = "First"
+    parks_json["lastname"] = "Last"
+    for code, name in [("3", "Big Basin Redwoods"), ("1", "Point Lobos"), ("2", "Café Beach")]:
+        parks_json["parks"].append(dataset.new_park_entry(code, name, dataset.PARKS_TYPES[0], "36.5,-121.9"))
+    parks_json["parks"][0]["visited"] = True
+    parks_json["parks"][0]["photos"]["sign"]["encrypt"] = {"share": "https://photos.app.goo.gl/a", "photo": "https://a"}
+    parks_json["parks"][0]["photos"]["landscape2"]["guest"]["share"] = "https://photos.app.goo.gl/b"
+    parks_json["parks"][2]["overlay"] = True
+    return parks_json
+
+@pytest.fixture(name="connection")
+def fixture_connection(tmp_path):
+    """Opening an empty parks.db in a temporary directory."""
+    connection = store.open_store(str(tmp_path / "parks.db"))
+    yield connection
+    connection.close()
+
+def test_round_trip(connection, parks_json):
+    """Testing that parks saved to parks.db load back as the same parks.json dict, in the same order."""
+    store.save_parks_json(connection, parks_json)
+    assert store.load_parks_json(connection) == parks_json
+
+def test_save_only_changes(connection, parks_json):
+    """Testing that saving only writes the parks and photos that changed."""
+    assert store.save_parks_json(connection, parks_json) == 3 + 2
+    assert store.save_parks_json(connection, parks_json) == 0
+    parks_json["parks"][1]["visited"] = True
+    parks_json["parks"][0]["photos"]["landscape2"]["guest"]["photo"] = "https://b"
+    parks_json["parks"][0]["photos"]["sign"]["encrypt"] = {"share": "", "photo": ""}
+    assert store.save_parks_json(connection, parks_json) == 3
+    del parks_json["parks"][2]
+    assert store.save_parks_json(connection, parks_json) == 1
+    assert store.load_parks_json(connection) == parks_json
+
+def test_get_park(connection, parks_json):
+    """Testing that single parks are found by code and by name along with their photos."""
+    store.save_parks_json(connection, parks_json)
+    assert store.get_park(connection, code="3") == parks_json["parks"][0]
+    assert store.get_park(connection, name="Café Beach") == parks_json["parks"][2]
+    assert store.get_park(connection, code="4") is None
+    assert store.get_park(connection, name="Missing") is None
+
+def test_set_park_value_updates_store(parks_json, tmp_path, monkeypatch):
+    """Testing that park changes made with the sqlite dataset update parks.db right away without a journal."""
+    monkeypatch.setattr(dataset, "DATASET_BACKEND", "sqlite")
+    monkeypatch.setattr(journal, "counts", {})
+    monkeypatch.setattr(paths, "PARKS_DB", str(tmp_path / "parks.db"))
+    monkeypatch.setattr(paths, "PARKS_JOURNAL", str(tmp_path / "parks.journal.jsonl"))
+    dataset.save_parks(parks_json)
+    parks_json = dataset.load_parks()
+    dataset.set_park_value(parks_json, parks_json["parks"][1], ["visited"], True)
+    dataset.set_park_value(parks_json, parks_json["parks"][0], ["photos", "landscape2", "guest", "photo"], "https://b")
+    dataset.set_park_value(parks_json, parks_json["parks"][0], ["photos", "sign", "encrypt", "share"], "")
+    assert not os.path.isfile(paths.PARKS_JOURNAL)
+    assert dataset.load_parks() == parks_json
+    connection = store.open_store(paths.PARKS_DB)
+    try:
+        assert store.get_park(connection, code="1")["visited"]
+        assert store.get_park(connection, code="3")["photos"]["sign"]["encrypt"] == {"share": "", "photo": "https://a"}
+        assert store.save_parks_json(connection, parks_json) == 0
+    finally:
+        connection.close()
@@ -0,0 +1,128 @@
+"""test_svgmin.py checks that compacted svg images draw the same as the svg images Cairo created."""
+
+# No svg rasterizer is a dependency of this project, so drawing the same is checked on the parsed svg instead. Both svg
+# images need the same elements with the same attributes, once svg defaults are removed, colors are converted, and
+# glyph ids are mapped. Coordinates may only move by the rounding precision. Transforms need to be kept exactly since
+# they scale everything they are applied to.
+
+import os  # Used to locate the park sign svg images.
+import re  # Used to split svg attribute values into numbers and commands.
+import xml.etree.ElementTree as ET  # Used to parse svg images.
+import pytest  # Used to parametrize tests.
+from stateparks import paths  # Used to locate the park sign svg images.
+from stateparks import svgmin  # Used to compact svg images.
+
+PRECISION = 2  # Decimal places kept by sign.py by default.
+XLINK_HREF = "{http://www.w3.org/1999/xlink}href"  # Link attribute of <use> elements.
+NUMBER_RE = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:e-?\d+)?")  # Numbers in svg attribute values.
+DEFAULT_STYLES = {"stroke:none", "fill-opacity:1"}  # Style declarations removed by svgmin.py.
+DEFAULT_ATTRS = {"fill-rule": "nonzero", "fill-opacity": "1"}  # Attributes removed by svgmin.py.
+
+# Svg image drawn the way Cairo draws text with show_text, with an image placed by a transform matrix.
+CAIRO_SVG = """<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" width="975" height="1300" \
+viewBox="0 0 975 1300">
+<defs>
+<g>
+<symbol overflow="visible" id="glyph0-1">
+<path style="stroke:none;" d="M 1.234567 -2.345678 L 3.5 0 C 4.123456 1.987654 5.5 2.25 6.000001 3.999999 Z \
+M 1.5 -2.5 "/>
+</symbol>
+<symbol overflow="visible" id="glyph0-2">
+<path style="stroke:none;" d="M 0.333333 0 L 0.333333 -7.666667 L 5.111111 -7.666667 Z "/>
+</symbol>
+</g>
+<image id="image5" width="400" height="300" xlink:href="data:image/png;base64,iVBORw0KGgo="/>
+</defs>
+<path fill-rule="nonzero" fill="rgb(34.901961%, 14.901961%, 14.901961%)" fill-opacity="1" \
+d="M 134.75 672.625 C 131.875 674.875 125.5 679.625 115.125 679.625 L 90.875 651.25 Z "/>
+<g fill="rgb(100%, 100%, 100%)" fill-opacity="1">
+<use xlink:href="#glyph0-1" x="12.345678" y="678.901234"/>
+<use xlink:href="#glyph0-2" x="20.004999" y="678.901234"/>
+<use xlink:href="#glyph0-1" x="27.5" y="678.901234"/>
+</g>
+<use xlink:href="#image5" transform="matrix(0.123456,0,0,0.123456,100.987654,200.123456)"/>
+</svg>
+"""
+
+def parse_svg(svg):
+    """Parsing an svg string. Returns its elements in document order."""
+    return list(ET.fromstring(svg.encode("utf-8")).iter())
+
+def normalize_color(value):
+    """Converting a Cairo percentage rgb color to an rgb tuple, or a hex color to an rgb tuple."""
+    match = svgmin.RGB_RE.fullmatch(value)
+    if match:
+        return tuple(round(float(channel) * 255 / 100) for channel in match.groups())
+    if re.fullmatch(r"#[0-9a-f]{6}", value):
+        return tuple(int(value[i : i + 2], 16) for i in (1, 3, 5))
+    return value
+
+def normalize_attrs(element):
+    """Getting the attributes of an element without the svg defaults svgmin.py removes."""
+    attrs = {name: value for name, value in element.attrib.items() if DEFAULT_ATTRS.get(name) != value}
+    if "style" in attrs:
+        styles = [style.strip() for style in attrs.pop("style").split(";")]
+        styles = [style for style in styles if style and style not in DEFAULT_STYLES]
+        if styles:
+            attrs["style"] = ";".join(styles)
+    return attrs
+
+def assert_numbers_close(original, compacted, tolerance):
+    """Checking that two attribute values have the same commands and their numbers differ by at most tolerance."""
+    assert re.sub(r"[\s,]", "", NUMBER_RE.sub("", original)) == re.sub(r"[\s,]", "", NUMBER_RE.sub("", compacted))
+    original_numbers = [float(number) for number in NUMBER_RE.findall(original)]
+    compacted_numbers = [float(number) for number in NUMBER_RE.findall(compacted)]
+    assert len(original_numbers) == len(compacted_numbers)
+    for original_number, compacted_number in zip(original_numbers, compacted_numbers):
+        assert abs(original_number - compacted_number) <= tolerance
+
+def assert_draws_same(original_svg, compacted_svg, precision):
+    """Checking that a compacted svg image draws the same as the original svg image."""
+    original_elements = parse_svg(original_svg)
+    compacted_elements = parse_svg(compacted_svg)
+    assert [element.tag for element in original_elements] == [element.tag for element in compacted_elements]
+    tolerance = 0.5 * 10**-precision + 1e-9
+    ids = {}  # Compacted ids by original id.
+    for original, compacted in zip(original_elements, compacted_elements):
+        original_attrs = normalize_attrs(original)
+        compacted_attrs = normalize_attrs(compacted)
+        assert set(original_attrs) == set(compacted_attrs)
+        for name, value in original_attrs.items():
+            if name == "id":
+                assert ids.setdefault(value, compacted_attrs[name]) == compacted_attrs[name]
+            elif name == XLINK_HREF and value.startswith("#"):
+                assert ids.setdefault(value[1:], compacted_attrs[name][1:]) == compacted_attrs[name][1:]
+            elif name in ("d", "x", "y", "width", "height"):
+                assert_numbers_close(value, compacted_attrs[name], tolerance)
+            elif name == "fill":
+                assert normalize_color(value) == normalize_color(compacted_attrs[name])
+            else:
+                assert value == compacted_attrs[name], name
+    assert len(set(ids.values())) == len(ids)
+
+def test_compact_svg_draws_same():
+    """Testing that compacting Cairo text glyphs and placed images keeps the drawing the same."""
+    compacted_svg = svgmin.compact_svg(CAIRO_SVG, PRECISION)
+    assert len(compacted_svg) < len(CAIRO_SVG)
+    assert_draws_same(CAIRO_SVG, compacted_svg, PRECISION)
+
+def test_compact_svg_keeps_transforms():
+    """Testing that transform matrices aren't rounded."""
+    compacted_svg = svgmin.compact_svg(CAIRO_SVG, PRECISION)
+    assert 'transform="matrix(0.123456,0,0,0.123456,100.987654,200.123456)"' in compacted_svg
+
+@pytest.mark.parametrize("name", sorted(os.listdir(paths.PARKS_IMAGES_DIR))[:5])
+def test_compact_park_sign_draws_same(name):
+    """Testing that compacting park sign svg images keeps the drawing the same."""
+    with open(os.path.join(paths.PARKS_IMAGES_DIR, name), encoding="utf-8") as svg_file:
+        original_svg = svg_file.read()
+    assert_draws_same(original_svg, svgmin.compact_svg(original_svg, PRECISION), PRECISION)
+
+def test_compact_svg_file_replaces(tmp_path):
+    """Testing that compacting an svg file replaces it without leaving the temporary file behind."""
+    path = tmp_path / "1.svg"
+    path.write_text(CAIRO_SVG, encoding="utf-8")
+    svgmin.compact_svg_file(str(path), PRECISION)
+    assert path.read_text(encoding="utf-8") == svgmin.compact_svg(CAIRO_SVG, PRECISION)
+    assert os.listdir(tmp_path) == ["1.svg"]
@@ -0,0 +1,128 @@
+"""watch.py rebuilds the html files as their inputs change and serves the website locally."""
+
+# This script is used while editing parks.json, overrides.json, passphrase.txt, or the jinja html templates. The html
+# files are built once like build.py, then only the html files depending on a changed file are rebuilt. main.html and
+# guest.html are rebuilt as soon as a change is saved. Encrypting main.html into index.html is delayed until the changes
+# stop for a couple of seconds. The assets directory is watched with inotify on Linux and polled on other platforms, or
+# when the -l/--poll argument is set.
+#
+# The website is served on http://localhost:8000 while watching. The port can be set with the -p/--port argument and
+# serving can be turned off with the -n/--no-serve argument. Press Ctrl+C to stop watching.
+#
+# The -r/--route argument adds the route in route.json to the html files like build.py and rebuilds them when route.py
+# plans a new route. The -m/--mirror argument serves the photos mirrored in mirror.json the same way, rebuilding the
+# html files when mirror.py mirrors new photos. The -w/--widths and --no-webp arguments set the Google Photos widths and
+# format like build.py.
+#
+# The watching and rebuilding itself lives in stateparks/watch.py. This script is a command line entry point around it.
+#
+# Example: [python watch.py -p 8080]
+
+import argparse  # Used to process command line arguments.
+import sys  # Used to exit script on errors.
+from stateparks import dataset  # Used to catch dataset errors.
+from stateparks import encrypt  # Used to get the default PBKDF2 iterations.
+from stateparks import pages  # Used to get the default photo widths.
+from stateparks import watch  # Used to watch and rebuild html files.
+
+# Running file from command line.
+if __name__ == "__main__":
+    # Start script execution.
+    print("Running watch.py")
+
+    # Processing command line arguments.
+    def positive_type_check(arg):
+        """Validates positive integer arguments."""
+        if not arg.isdigit() or int(arg) < 1:
+            raise argparse.ArgumentTypeError('the value "' + arg + '" needs to be a positive integer')
+        return int(arg)
+
+    def widths_type_check(arg):
+        """Validates photo widths argument."""
+        widths = arg.replace(" ", "").split(",")
+        if not all(width.isdigit() and int(width) > 0 for width in widths):
+            raise argparse.ArgumentTypeError('the widths "' + arg + '" need to be comma separated positive integers')
+        return [int(width) for width in widths]
+
+    parser = argparse.ArgumentParser(description="Script is used to rebuild html files as their inputs change")
+    parser.add_argument(
+        "-s",
+        "--sprite",
+        help="combine park overlay svg images into a single svg sprite referenced by the html files",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-i",
+        "--iterations",
+        help="PBKDF2 iterations used to encrypt main.html, defaults to " + str(encrypt.ITERATIONS),
+        type=positive_type_check,
+        default=encrypt.ITERATIONS,
+    )
+    parser.add_argument(
+        "-r",
+        "--route",
+        help="add the route planned by route.py in route.json to the html files",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-m",
+        "--mirror",
+        help="serve the photos mirrored by mirror.py in mirror.json",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-w",
+        "--widths",
+        help="comma separated Google Photos widths offered to browsers, defaults to "
+        + ",".join(str(width) for width in pages.PHOTO_WIDTHS),
+        type=widths_type_check,
+    )
+    parser.add_argument(
+        "--no-webp",
+        help="request Google Photos images in their original format instead of WebP",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-p",
+        "--port",
+        help="port the website is served on, defaults to 8000",
+        type=positive_type_check,
+        default=8000,
+    )
+    parser.add_argument(
+        "-n",
+        "--no-serve",
+        help="only rebuild the html files without serving the website",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-l",
+        "--poll",
+        help="check file modification times instead of using inotify",
+        action="store_true",
+    )
+    args = vars(parser.parse_args())
+
+    # Building the html files then watching for changes.
+    try:
+        watch.watch(
+            args["sprite"],
+            args["iterations"],
+            None if args["no_serve"] else args["port"],
+            args["poll"],
+            args["route"],
+            args["widths"],
+            not args["no_webp"],
+            args["mirror"],
+        )
+    except dataset.DatasetError as e:
+        print(e)
+        print("Exiting")
+        sys.exit()
+    except OSError as e:
+        print("Failed to serve the website: " + str(e))
+        print("Exiting")
+        sys.exit()
+    except KeyboardInterrupt:
+        print("Stopped watching")
+    print("Execution of watch.py complete")